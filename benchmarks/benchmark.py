@@ -0,0 +1,362 @@
+"""Benchmarks de las etapas reales del proyecto sobre datos sintéticos.
+
+Mide tiempo y memoria pico (RSS) de la carga, el filtrado/agregado de los dashboards,
+la exportación XML, las facturas y la presentación PPTX, y guarda cada ejecución en
+``benchmarks/historial.json`` para detectar regresiones entre versiones.
+
+    python benchmarks/benchmark.py --filas 1000 100000
+    python benchmarks/benchmark.py --etapas carga_csv dash_update --fallar-si-regresion
+"""
+import argparse
+import contextlib
+import datetime as dt
+import gc
+import importlib.util
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+from comun.datos import asegurar_instantanea, cargar_ventas, parsear_csv, traducir_columnas
+from comun.cubo import construir_cubo
+from comun.consultas import MotorDuckDB, MotorPandas
+from comun.filtros import VentasPorFecha, filtrar_ventas
+from comun.sintetico import generar
+
+HISTORIAL = Path(__file__).resolve().parent / "historial.json"
+TAMANOS = [1_000, 100_000, 1_000_000, 10_000_000]
+MAX_FACTURAS = 1_000  # Facturas individuales medidas (con código de barras) por tamaño
+UMBRAL_REGRESION = 0.20
+MIN_SEGUNDOS = 0.05  # Por debajo, el ruido de medición domina y no se comparan
+
+
+# --- Medición ---
+
+def _rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MedidorMemoria:
+    # Muestrea el RSS del proceso en un hilo; el pico se da relativo al inicio de la etapa
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.pico = None
+
+    def _muestrear(self):
+        while not self._parar.is_set():
+            self._max = max(self._max, _rss())
+            self._parar.wait(self.intervalo)
+
+    def __enter__(self):
+        self._base = _rss()
+        if self._base is not None:
+            self._max = self._base
+            self._parar = threading.Event()
+            self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+            self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._base is not None:
+            self._parar.set()
+            self._hilo.join()
+            self._max = max(self._max, _rss())
+            self.pico = (self._max - self._base) / 2**20
+
+
+def medir(funcion):
+    gc.collect()
+    with MedidorMemoria() as memoria:
+        inicio = time.perf_counter()
+        unidades = funcion()
+        segundos = time.perf_counter() - inicio
+    return segundos, memoria.pico, unidades
+
+
+# Scripts del proyecto que se miden (se importan por ruta: no son paquetes)
+SCRIPTS = {
+    'dash': RAIZ / "vizualization" / "dash" / "supermarket_sales_dash.py",
+    'crear_xml': RAIZ / "invoicing" / "crear_xml.py",
+    'facturas': RAIZ / "invoicing" / "generate-xml-invoice.py",
+    'pptx': RAIZ / "reporting" / "crear_pptx.py",
+}
+_modulos = {}
+
+
+def script(nombre):
+    if nombre not in _modulos:
+        spec = importlib.util.spec_from_file_location(f"bench_{nombre}", SCRIPTS[nombre])
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        _modulos[nombre] = modulo
+    return _modulos[nombre]
+
+
+# --- Etapas ---
+
+class Contexto:
+    """Estado compartido entre etapas para un tamaño: rutas temporales y datos cargados."""
+
+    def __init__(self, filas, directorio):
+        self.filas = filas
+        self.dir = Path(directorio)
+        self.csv = self.dir / f"ventas_{filas}.csv"
+        generar(self.csv, filas)
+        self.df = traducir_columnas(parsear_csv(self.csv))
+        self._dash = None
+        self._motores = {}
+
+    def motor(self, nombre):
+        # Motores de consulta sobre los datos sintéticos (DuckDB lee su instantánea Parquet)
+        if nombre not in self._motores:
+            if nombre == 'duckdb':
+                self._motores[nombre] = MotorDuckDB(*asegurar_instantanea(self.csv, self.dir / "cache_duckdb"))
+            else:
+                self._motores[nombre] = MotorPandas(self.df)
+        return self._motores[nombre]
+
+    def dash(self, motor='pandas'):
+        # La app de Dash carga el dataset real al importarse; se le inyecta el motor sintético
+        if self._dash is None:
+            self._dash = script('dash')
+        self._dash.motor = self.motor(motor)
+        return self._dash
+
+
+def etapa_carga_csv(ctx):
+    parsear_csv(ctx.csv)
+    return ctx.filas
+
+
+def etapa_carga_snapshot_fria(ctx):
+    # Parseo del CSV + escritura de la instantánea Parquet
+    cargar_ventas(ctx.csv, dir_cache=ctx.dir / "cache")
+    return ctx.filas
+
+
+def etapa_carga_snapshot(ctx):
+    cargar_ventas(ctx.csv, dir_cache=ctx.dir / "cache")
+    return ctx.filas
+
+
+def etapa_cubo(ctx):
+    construir_cubo(ctx.df)
+    return ctx.filas
+
+
+def _filtros_dash(ctx):
+    ciudades = list(ctx.df['Ciudad'].cat.categories[:2])
+    productos = list(ctx.df['Línea de Producto'].cat.categories[:3])
+    return [('2019-01-01', '2019-03-30', None, None), ('2019-01-15', '2019-02-15', ciudades, productos)]
+
+
+def _dash_sin_cache(ctx, motor):
+    # Sin caché: cada llamada invalida los resultados memoizados
+    dash = ctx.dash(motor)
+    for filtros in _filtros_dash(ctx):
+        dash.cache_resultados.invalidar_si_cambia(object())
+        dash.update_dashboard(*filtros)
+    return len(_filtros_dash(ctx))
+
+
+def etapa_dash_update(ctx):
+    return _dash_sin_cache(ctx, 'pandas')
+
+
+def etapa_dash_update_duckdb(ctx):
+    return _dash_sin_cache(ctx, 'duckdb')
+
+
+def preparar_dash_update_cache(ctx):
+    dash = ctx.dash()
+    for filtros in _filtros_dash(ctx):
+        dash.update_dashboard(*filtros)
+
+
+def etapa_dash_update_cache(ctx):
+    # Mismos filtros que ya están memoizados
+    dash = ctx.dash()
+    for filtros in _filtros_dash(ctx):
+        dash.update_dashboard(*filtros)
+    return len(_filtros_dash(ctx))
+
+
+def etapa_streamlit_filtro(ctx):
+    ciudades = list(ctx.df['Ciudad'].cat.categories[:2])
+    filtrar_ventas(ctx.df, dt.date(2019, 1, 15), dt.date(2019, 2, 15), ciudades, None)
+    return ctx.filas
+
+
+def preparar_streamlit_filtro_indexado(ctx):
+    ctx.ventas = VentasPorFecha(ctx.df)
+
+
+def etapa_streamlit_filtro_indexado(ctx):
+    # Rango por búsqueda binaria sobre las ventas ordenadas y ciudades por código de categoría
+    ciudades = list(ctx.df['Ciudad'].cat.categories[:2])
+    ctx.ventas.filtrar(dt.date(2019, 1, 15), dt.date(2019, 2, 15), ciudades, None)
+    return ctx.filas
+
+
+def etapa_crear_xml(ctx):
+    script('crear_xml').crear_xml(ctx.df, salida=str(ctx.dir / "facturas.xml"))
+    return ctx.filas
+
+
+def etapa_crear_xml_streaming(ctx):
+    script('crear_xml').crear_xml_streaming(ctx.csv, salida=str(ctx.dir / "facturas_stream.xml"))
+    return ctx.filas
+
+
+def etapa_factura_xml(ctx):
+    # Una factura por llamada (con código de barras), como el script original
+    modulo = script('facturas')
+    muestra = ctx.df.head(MAX_FACTURAS)
+    directorio = ctx.dir / "facturas"
+    directorio.mkdir(exist_ok=True)
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        for _, fila in muestra.iterrows():
+            modulo.generar_factura_xml(fila)
+    finally:
+        os.chdir(anterior)
+    return len(muestra)
+
+
+def etapa_pptx(ctx):
+    script('pptx').crear_presentacion(construir_cubo(ctx.df), salida=str(ctx.dir / "reporte.pptx"))
+    return ctx.filas
+
+
+# Preparación de cada etapa fuera de la medición (importar scripts, calentar cachés)
+PREPARAR = {
+    'dash_update': lambda ctx: ctx.dash(),
+    'dash_update_duckdb': lambda ctx: ctx.dash('duckdb'),
+    'dash_update_cache': preparar_dash_update_cache,
+    'streamlit_filtro_indexado': preparar_streamlit_filtro_indexado,
+    'crear_xml': lambda ctx: script('crear_xml'),
+    'crear_xml_streaming': lambda ctx: script('crear_xml'),
+    'factura_xml': lambda ctx: script('facturas'),
+    'pptx': lambda ctx: script('pptx'),
+}
+
+ETAPAS = {
+    'carga_csv': etapa_carga_csv,
+    'carga_snapshot_fria': etapa_carga_snapshot_fria,
+    'carga_snapshot': etapa_carga_snapshot,
+    'cubo': etapa_cubo,
+    'dash_update': etapa_dash_update,
+    'dash_update_cache': etapa_dash_update_cache,
+    'dash_update_duckdb': etapa_dash_update_duckdb,
+    'streamlit_filtro': etapa_streamlit_filtro,
+    'streamlit_filtro_indexado': etapa_streamlit_filtro_indexado,
+    'crear_xml': etapa_crear_xml,
+    'crear_xml_streaming': etapa_crear_xml_streaming,
+    'factura_xml': etapa_factura_xml,
+    'pptx': etapa_pptx,
+}
+
+
+# --- Historial ---
+
+def version_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocida'
+
+
+def cargar_historial(ruta=HISTORIAL):
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def regresiones(resultados, historial, umbral=UMBRAL_REGRESION):
+    """Etapas más lentas que su última medición previa (mismo tamaño) por encima del umbral."""
+    previos = {}
+    for ejecucion in historial:
+        for r in ejecucion['resultados']:
+            if r.get('segundos') is not None:
+                previos[(r['etapa'], r['filas'])] = (ejecucion['version'], r['segundos'])
+    encontradas = []
+    for r in resultados:
+        previo = previos.get((r['etapa'], r['filas']))
+        if (previo and previo[1] >= MIN_SEGUNDOS and r.get('segundos') is not None
+                and r['segundos'] > previo[1] * (1 + umbral)):
+            encontradas.append((r, previo))
+    return encontradas
+
+
+def ejecutar(tamanos, etapas):
+    resultados = []
+    for filas in tamanos:
+        with tempfile.TemporaryDirectory(prefix='bench_ventas_') as directorio:
+            print(f"\n== {filas:,} filas ==")
+            ctx = Contexto(filas, directorio)
+            for nombre in etapas:
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        if nombre in PREPARAR:
+                            PREPARAR[nombre](ctx)
+                        segundos, pico_mb, unidades = medir(lambda: ETAPAS[nombre](ctx))
+                except ImportError as e:  # Dependencia opcional ausente (p. ej. streamlit); otros errores fallan
+                    error = f"{type(e).__name__}: {(str(e).strip().splitlines() or [''])[0]}"
+                    print(f"{nombre:<26} omitida: {error}")
+                    resultados.append({'etapa': nombre, 'filas': filas, 'segundos': None, 'error': error})
+                    continue
+                pico = f"{pico_mb:8.1f} MB" if pico_mb is not None else "       ? MB"
+                print(f"{nombre:<26} {segundos:9.3f} s {pico}  ({unidades / segundos:,.0f} unidades/s)")
+                resultados.append({'etapa': nombre, 'filas': filas, 'segundos': round(segundos, 6),
+                                   'pico_mb': None if pico_mb is None else round(pico_mb, 2),
+                                   'unidades': unidades})
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, filtrado, agregado, facturas y reportes")
+    parser.add_argument("--filas", type=int, nargs="+", default=TAMANOS)
+    parser.add_argument("--etapas", nargs="+", choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument("--historial", default=str(HISTORIAL))
+    parser.add_argument("--no-guardar", action="store_true", help="No añadir la ejecución al historial")
+    parser.add_argument("--fallar-si-regresion", action="store_true",
+                        help=f"Salir con código 1 si alguna etapa es >{UMBRAL_REGRESION:.0%} más lenta")
+    args = parser.parse_args()
+
+    historial = cargar_historial(args.historial)
+    resultados = ejecutar(args.filas, args.etapas)
+
+    encontradas = regresiones(resultados, historial)
+    for r, (version, segundos) in encontradas:
+        print(f"REGRESIÓN {r['etapa']} ({r['filas']:,} filas): {r['segundos']:.3f}s vs {segundos:.3f}s en {version}")
+
+    if not args.no_guardar:
+        historial.append({
+            'fecha': dt.datetime.now().isoformat(timespec='seconds'),
+            'version': version_codigo(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'resultados': resultados,
+        })
+        with open(args.historial, 'w', encoding='utf-8') as f:
+            json.dump(historial, f, indent=2, ensure_ascii=False)
+
+    sys.exit(1 if encontradas and args.fallar_si_regresion else 0)
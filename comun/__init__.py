@@ -0,0 +1,3 @@
+from .datos import cargar_ventas, columnas_traducidas, traducir_columnas
+
+__all__ = ['cargar_ventas', 'columnas_traducidas', 'traducir_columnas']
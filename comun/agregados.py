@@ -0,0 +1,193 @@
+"""Almacén persistente de agregados diarios para los informes.
+
+Guarda el cubo de ``comun.cubo`` (sumas de Total, Ingreso Bruto y Cantidad y número de
+transacciones por día, ciudad, sucursal, línea de producto, tipo de cliente, género y
+pago) en partes Parquet. Añadir el CSV de un día nuevo solo agrega ese CSV; el histórico
+no se vuelve a leer.
+
+- Un CSV ya incorporado (mismo hash) se ignora.
+- Un CSV con días que ya están en el almacén se rechaza, o con ``reemplazar=True`` sustituye
+  esos días (p. ej. la reexportación corregida de un día): nunca se suman dos veces.
+- Por encima de ``MAX_PARTES`` partes se compactan en una sola, así que leer el almacén
+  no crece con el número de días añadidos.
+
+    python -m comun.agregados --reconstruir data/supermarket_sales.csv
+    python -m comun.agregados --agregar ventas_2019-03-31.csv
+    python -m comun.agregados --agregar ventas_2019-03-31_corregido.csv --reemplazar
+"""
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from comun.archivos import escritura_atomica, guardar_json
+from comun.cubo import DIMENSIONES, construir_cubo
+from comun.datos import DIR_CACHE, RUTA_CSV, _hash_archivo, parsear_csv, traducir_columnas
+
+DIR_AGREGADOS = DIR_CACHE / "agregados"
+MANIFIESTO = 'manifiesto.json'
+MAX_PARTES = 32
+
+
+def leer_manifiesto(directorio=DIR_AGREGADOS):
+    try:
+        with open(Path(directorio) / MANIFIESTO, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'partes': []}
+
+
+def _guardar_manifiesto(directorio, manifiesto):
+    guardar_json(Path(directorio) / MANIFIESTO, manifiesto, indent=2, ensure_ascii=False)
+
+
+def _escribir_parte(directorio, nombre, cubo):
+    with escritura_atomica(Path(directorio) / nombre) as tmp:
+        cubo.to_parquet(tmp, index=False)
+
+
+def _describir_parte(nombre, cubo, fuentes):
+    return {
+        'archivo': nombre,
+        'desde': cubo['Fecha'].min().date().isoformat(),
+        'hasta': cubo['Fecha'].max().date().isoformat(),
+        'fuentes': fuentes,
+    }
+
+
+def _leer_parte(directorio, parte):
+    return pd.read_parquet(Path(directorio) / parte['archivo'])
+
+
+def _sin_dias(directorio, parte, dias):
+    """Parte sin las filas de ``dias`` (``None`` si no tenía ninguno de esos días)."""
+    cubo = _leer_parte(directorio, parte)
+    solapados = cubo['Fecha'].isin(dias)
+    return cubo[~solapados] if solapados.any() else None
+
+
+def agregar_csv(ruta_csv, directorio=DIR_AGREGADOS, reemplazar=False, max_partes=MAX_PARTES):
+    """Incorpora ``ruta_csv`` al almacén y devuelve el número de filas agregadas.
+
+    Un CSV ya incorporado (mismo hash) devuelve 0. Si el CSV trae días que ya están en el
+    almacén se lanza ``ValueError``, salvo con ``reemplazar=True``: entonces esos días se
+    quitan de las partes existentes y quedan solo los del CSV nuevo.
+    """
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    manifiesto = leer_manifiesto(directorio)
+    hash_csv = _hash_archivo(ruta_csv)
+    if any(fuente['hash'] == hash_csv for parte in manifiesto['partes'] for fuente in parte['fuentes']):
+        return 0
+
+    df = traducir_columnas(parsear_csv(ruta_csv))
+    cubo = construir_cubo(df)
+    dias = cubo['Fecha'].unique()
+    desde, hasta = cubo['Fecha'].min().date().isoformat(), cubo['Fecha'].max().date().isoformat()
+
+    # Solo se leen las partes cuyo rango de fechas se cruza con el del CSV
+    recortes = {}
+    for parte in manifiesto['partes']:
+        if parte['desde'] <= hasta and desde <= parte['hasta']:
+            recorte = _sin_dias(directorio, parte, dias)
+            if recorte is not None:
+                recortes[parte['archivo']] = recorte
+    if recortes and not reemplazar:
+        raise ValueError(f"{ruta_csv} contiene días ya incorporados al almacén ({desde} a {hasta}, "
+                         f"en {', '.join(sorted(recortes))}); usa reemplazar=True (--reemplazar) "
+                         "si es una versión corregida")
+
+    partes, obsoletos = [], []
+    for parte in manifiesto['partes']:
+        recorte = recortes.get(parte['archivo'])
+        if recorte is None:
+            partes.append(parte)
+            continue
+        obsoletos.append(parte['archivo'])
+        if len(recorte):
+            clave = f"{parte['archivo']}|{hash_csv}".encode()
+            nombre = f"parte-{hashlib.blake2b(clave, digest_size=16).hexdigest()}.parquet"
+            _escribir_parte(directorio, nombre, recorte)
+            partes.append(_describir_parte(nombre, recorte, parte['fuentes']))
+
+    nombre = f"parte-{hash_csv}.parquet"
+    _escribir_parte(directorio, nombre, cubo)
+    partes.append(_describir_parte(nombre, cubo, [{'origen': str(ruta_csv), 'hash': hash_csv, 'filas': len(df)}]))
+    manifiesto['partes'] = partes
+    _guardar_manifiesto(directorio, manifiesto)
+    for archivo in obsoletos:
+        (directorio / archivo).unlink(missing_ok=True)
+
+    if len(partes) > max_partes:
+        compactar(directorio)
+    return len(df)
+
+
+def _unir(cubos):
+    if len(cubos) == 1:
+        return cubos[0]
+    cubo = pd.concat(cubos, ignore_index=True)
+    for dimension in DIMENSIONES[1:]:
+        cubo[dimension] = cubo[dimension].astype('category')
+    return cubo.groupby(DIMENSIONES, observed=True, sort=True).sum().reset_index()
+
+
+def compactar(directorio=DIR_AGREGADOS):
+    """Une todas las partes en una sola (el cubo base) y borra las anteriores."""
+    directorio = Path(directorio)
+    manifiesto = leer_manifiesto(directorio)
+    if len(manifiesto['partes']) <= 1:
+        return
+    cubo = _unir([_leer_parte(directorio, parte) for parte in manifiesto['partes']])
+    h = hashlib.blake2b(digest_size=16)
+    for parte in manifiesto['partes']:
+        h.update(parte['archivo'].encode())
+    nombre = f"base-{h.hexdigest()}.parquet"
+    _escribir_parte(directorio, nombre, cubo)
+    anteriores = [parte['archivo'] for parte in manifiesto['partes']]
+    fuentes = [fuente for parte in manifiesto['partes'] for fuente in parte['fuentes']]
+    manifiesto['partes'] = [_describir_parte(nombre, cubo, fuentes)]
+    _guardar_manifiesto(directorio, manifiesto)
+    for archivo in anteriores:
+        (directorio / archivo).unlink(missing_ok=True)
+
+
+def reconstruir(rutas_csv=None, directorio=DIR_AGREGADOS):
+    """Vacía el almacén y lo vuelve a crear a partir de ``rutas_csv`` (por defecto, el CSV original)."""
+    directorio = Path(directorio)
+    for parte in leer_manifiesto(directorio)['partes']:
+        (directorio / parte['archivo']).unlink(missing_ok=True)
+    (directorio / MANIFIESTO).unlink(missing_ok=True)
+    return sum(agregar_csv(ruta, directorio) for ruta in (rutas_csv or [RUTA_CSV]))
+
+
+def cargar_agregados(directorio=DIR_AGREGADOS):
+    """Cubo con todas las partes del almacén (como mucho ``MAX_PARTES`` más el cubo base)."""
+    directorio = Path(directorio)
+    partes = [_leer_parte(directorio, parte) for parte in leer_manifiesto(directorio)['partes']]
+    if not partes:
+        raise FileNotFoundError(f"No hay agregados en {directorio}: ejecuta python -m comun.agregados --reconstruir")
+    return _unir(partes)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mantiene el almacén de agregados diarios de los informes')
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--agregar', nargs='+', metavar='CSV', help='CSV nuevos (p. ej. las ventas de un día)')
+    grupo.add_argument('--reconstruir', nargs='*', metavar='CSV', help='Rehacer desde cero (por defecto, el CSV original)')
+    grupo.add_argument('--compactar', action='store_true', help='Unir todas las partes en el cubo base')
+    parser.add_argument('--reemplazar', action='store_true',
+                        help='Los días de los CSV agregados sustituyen a los ya incorporados')
+    parser.add_argument('--directorio', default=str(DIR_AGREGADOS))
+    args = parser.parse_args()
+
+    if args.agregar:
+        for ruta in args.agregar:
+            filas = agregar_csv(ruta, args.directorio, reemplazar=args.reemplazar)
+            print(f"{ruta}: {filas:,} filas agregadas" if filas else f"{ruta}: ya estaba incorporado")
+    elif args.compactar:
+        compactar(args.directorio)
+    else:
+        print(f"{reconstruir(args.reconstruir, args.directorio):,} filas agregadas en {args.directorio}")
@@ -0,0 +1,126 @@
+"""Almacén Parquet particionado por año, mes y sucursal (estilo Hive).
+
+Amplía el ``COPY ... TO 'ventas_enero_2019.parquet'`` del notebook a todo el histórico:
+
+    data/almacen/anio=2019/mes=1/Branch=A/data_0.parquet
+
+Cada archivo va ordenado por fecha y hora, así que las estadísticas min/max de sus row
+groups también sirven para descartar bloques dentro de una partición. El manifiesto
+``_almacen.json`` guarda el inventario de particiones y qué sucursales hay en cada
+ciudad: los filtros de fecha y ciudad eligen los archivos a leer sin listar el
+directorio ni abrir los demás.
+
+    python -m comun.almacen --origen data/supermarket_sales.csv --destino data/almacen
+    python -m comun.almacen --origen data/sintetico --destino data/almacen_sintetico
+"""
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from comun.archivos import escritura_atomica, guardar_json
+from comun.datos import RAIZ_PROYECTO, TIPOS_CSV, asegurar_instantanea
+
+DIR_ALMACEN = RAIZ_PROYECTO / "data" / "almacen"
+MANIFIESTO = '_almacen.json'
+PARTICIONES = ['anio', 'mes', 'Branch']
+FILAS_POR_ROW_GROUP = 100_000
+
+
+def origen_sql(origen):
+    """Expresión ``read_parquet(...)`` de DuckDB para un archivo Parquet o un directorio particionado."""
+    ruta = Path(origen)
+    if ruta.is_dir():
+        return f"read_parquet('{(ruta / '**' / '*.parquet').as_posix()}', hive_partitioning = true)"
+    return f"read_parquet('{ruta.as_posix()}')"
+
+
+def leer_manifiesto(destino):
+    """Manifiesto del almacén en ``destino`` o ``None`` si no es un almacén particionado."""
+    try:
+        with open(Path(destino) / MANIFIESTO, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ingerir(origen=None, destino=DIR_ALMACEN, hilos=None):
+    """Reescribe ``origen`` (CSV, Parquet o directorio Parquet) en el almacén particionado.
+
+    Un CSV pasa antes por su instantánea Parquet tipada. El almacén se escribe en un
+    directorio temporal y sustituye al anterior de una vez.
+    """
+    import duckdb
+
+    origen = Path(origen or asegurar_instantanea()[0])
+    if origen.suffix == '.csv':
+        origen = asegurar_instantanea(origen)[0]
+    destino = Path(destino)
+    inicio = time.perf_counter()
+    with escritura_atomica(destino) as tmp:
+        con = duckdb.connect()
+        if hilos:
+            con.execute(f"SET threads = {int(hilos)}")
+        columnas = ', '.join(f'"{c}"' for c in list(TIPOS_CSV) + ['Timestamp'])
+        con.execute(f"CREATE VIEW origen AS SELECT {columnas}, year(\"Date\") AS anio, month(\"Date\") AS mes "
+                    f"FROM {origen_sql(origen)}")
+        con.execute(f"""
+            COPY (SELECT * FROM origen ORDER BY "Timestamp")
+            TO '{tmp.as_posix()}'
+            (FORMAT PARQUET, PARTITION_BY ({', '.join(PARTICIONES)}), ROW_GROUP_SIZE {FILAS_POR_ROW_GROUP})
+        """)
+
+        particiones = []
+        for carpeta in sorted(tmp.glob('anio=*/mes=*/Branch=*')):
+            valores = dict(parte.split('=', 1) for parte in carpeta.relative_to(tmp).parts)
+            archivos = sorted(a.relative_to(tmp).as_posix() for a in carpeta.glob('*.parquet'))
+            particiones.append([int(valores['anio']), int(valores['mes']), valores['Branch'], archivos])
+
+        ciudades = {}
+        for ciudad, sucursal in con.execute('SELECT DISTINCT "City", "Branch" FROM origen ORDER BY 1, 2').fetchall():
+            ciudades.setdefault(ciudad, []).append(sucursal)
+        filas, desde, hasta = con.execute('SELECT count(*), min("Date"), max("Date") FROM origen').fetchone()
+        con.close()
+        manifiesto = {
+            'origen': str(origen),
+            'filas': filas,
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'ciudades': ciudades,
+            'columnas_particion': PARTICIONES,
+            'particiones': particiones,
+            # Identifica esta versión del almacén (p. ej. para invalidar cachés de resultados)
+            'version': hashlib.blake2b(f"{origen}{time.time_ns()}".encode(), digest_size=16).hexdigest(),
+        }
+        guardar_json(tmp / MANIFIESTO, manifiesto, indent=2, ensure_ascii=False)
+    print(f"{filas:,} filas en {destino} ({time.perf_counter() - inicio:.1f}s)")
+    return manifiesto
+
+
+def archivos_particion(manifiesto, destino, start_date=None, end_date=None, ciudades=None):
+    """Archivos de las particiones año/mes/sucursal que pueden contener ventas con esos
+    filtros de fecha y ciudad (el resto del almacén no se lee)."""
+    desde = (start_date.year, start_date.month) if start_date is not None else None
+    hasta = (end_date.year, end_date.month) if end_date is not None else None
+    sucursales = None
+    if ciudades:
+        sucursales = {s for c in ciudades for s in manifiesto['ciudades'].get(c, [])}
+    archivos = []
+    for anio, mes, sucursal, rutas in manifiesto['particiones']:
+        if desde and (anio, mes) < desde or hasta and (anio, mes) > hasta:
+            continue
+        if sucursales is not None and sucursal not in sucursales:
+            continue
+        archivos.extend((Path(destino) / r).as_posix() for r in rutas)
+    return archivos
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Escribe las ventas en un almacén Parquet particionado por año/mes/sucursal')
+    parser.add_argument('--origen', help='CSV, Parquet o directorio Parquet (por defecto, el CSV original)')
+    parser.add_argument('--destino', default=str(DIR_ALMACEN))
+    parser.add_argument('--hilos', type=int, default=None)
+    args = parser.parse_args()
+
+    ingerir(args.origen, args.destino, args.hilos)
@@ -0,0 +1,52 @@
+"""Escrituras atómicas: otro proceso nunca ve un archivo (o directorio) a medio escribir.
+
+Se escribe en un temporal junto al destino (``<nombre>.<pid>.tmp``) y se renombra con
+``os.replace``, que en el mismo sistema de archivos sustituye el destino de una vez.
+
+    with escritura_atomica(ruta_parquet) as tmp:
+        df.to_parquet(tmp)
+"""
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def _borrar(ruta):
+    if ruta.is_dir():
+        shutil.rmtree(ruta, ignore_errors=True)
+    else:
+        ruta.unlink(missing_ok=True)
+
+
+def reemplazar(tmp, destino):
+    """Sustituye ``destino`` por ``tmp``; un directorio existente se aparta antes y se borra después."""
+    destino = Path(destino)
+    if Path(tmp).is_dir() and destino.exists():
+        anterior = destino.with_name(f"{destino.name}.{os.getpid()}.old")
+        os.replace(destino, anterior)
+        os.replace(tmp, destino)
+        shutil.rmtree(anterior, ignore_errors=True)
+    else:
+        os.replace(tmp, destino)
+
+
+@contextmanager
+def escritura_atomica(destino, sufijo=''):
+    """Ruta temporal para escribir ``destino``: al salir sin errores lo sustituye y, si hay
+    una excepción, se borra. ``sufijo`` conserva la extensión para quien la necesite."""
+    destino = Path(destino)
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp{sufijo}")
+    _borrar(tmp)  # Restos de un intento interrumpido
+    try:
+        yield tmp
+        reemplazar(tmp, destino)
+    finally:
+        _borrar(tmp)
+
+
+def guardar_json(ruta, datos, **opciones):
+    with escritura_atomica(ruta) as tmp:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, **opciones)
@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Caché LRU con límite de entradas y de memoria aproximada (en bytes).
+
+    Cada entrada guarda el tamaño que declara quien la inserta. ``version`` identifica
+    la instantánea de datos con la que se calcularon los resultados: si cambia, la
+    caché se vacía entera.
+    """
+
+    def __init__(self, max_entradas=128, max_bytes=64 * 2**20):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.version = None
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def invalidar_si_cambia(self, version):
+        with self._lock:
+            if version != self.version:
+                self._datos.clear()
+                self.bytes = 0
+                self.version = version
+
+    def get(self, clave, default=None):
+        with self._lock:
+            if clave not in self._datos:
+                self.fallos += 1
+                return default
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return self._datos[clave][0]
+
+    def put(self, clave, valor, tamano=0):
+        if tamano > self.max_bytes:
+            return  # Nunca cabría: no se desaloja todo lo demás por ella
+        with self._lock:
+            if clave in self._datos:
+                self.bytes -= self._datos.pop(clave)[1]
+            self._datos[clave] = (valor, tamano)
+            self.bytes += tamano
+            while len(self._datos) > self.max_entradas or self.bytes > self.max_bytes:
+                _, (_, liberado) = self._datos.popitem(last=False)
+                self.bytes -= liberado
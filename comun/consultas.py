@@ -0,0 +1,371 @@
+"""Motores de consulta intercambiables para los dashboards.
+
+Todos responden a las mismas preguntas (métricas, sumas y conteos por dimensión, filas
+filtradas) para unos filtros ``(start_date, end_date, ciudades, productos)``:
+
+- ``MotorPandas``: datos en memoria y cubo pre-agregado (comportamiento original).
+- ``MotorDuckDB``: SQL sobre el Parquet (instantánea del CSV o directorio particionado),
+  multihilo y sin cargar el dataset completo en memoria. Sobre un almacén de
+  ``comun.almacen`` (``$ALMACEN_VENTAS``) los filtros de fecha y ciudad eligen, con su
+  manifiesto, las particiones año/mes/sucursal a leer antes de tocar ningún archivo.
+  ``MotorPandas`` no usa ``$ALMACEN_VENTAS``: carga todas las ventas en memoria.
+
+El motor se elige con ``crear_motor(nombre)`` o con la variable ``MOTOR_CONSULTAS``.
+"""
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from comun.almacen import MANIFIESTO, archivos_particion, leer_manifiesto, origen_sql
+from comun.cubo import construir_cubo, filtrar_cubo, metricas, sumar_por, contar_por
+from comun.filtros import VentasPorFecha
+from comun.instrumentacion import fase
+from comun.datos import (COLUMNAS_INTERNAS, TIPOS_CSV, asegurar_instantanea, cargar_instantanea_arrow,
+                         columnas_traducidas)
+
+MOTOR_POR_DEFECTO = 'pandas'
+
+
+def _fecha(valor):
+    return pd.Timestamp(valor) if valor else None
+
+
+def _como_lista(por):
+    return [por] if isinstance(por, str) else list(por)
+
+
+def _fase_agrupar(por):
+    return 'agrupar:' + '+'.join(_como_lista(por))
+
+
+def _columnas_datos(disponibles):
+    # Columnas de una página sin selección: las del CSV en su orden, sin las de partición (anio, mes)
+    return [c for c in columnas_traducidas.values() if c in disponibles]
+
+
+class MotorPandas:
+    """Consultas sobre el DataFrame en memoria: agregados desde el cubo pre-agregado y
+    filas desde las ventas ordenadas por fecha (búsqueda binaria del rango)."""
+
+    nombre = 'pandas'
+
+    def __init__(self, df=None):
+        df = cargar_instantanea_arrow() if df is None else df
+        self.ventas = VentasPorFecha(df)
+        self.df = self.ventas.df
+        self.df.attrs = df.attrs
+        self.cubo = construir_cubo(self.df)
+        self.version = self.df.attrs.get('huella', id(self.df))
+        self.columnas_pagina = _columnas_datos(self.df.columns)
+        self._filtrar = lru_cache(maxsize=64)(self._filtrar_cubo)
+        # Posiciones de las filas filtradas ya ordenadas (se reutilizan al pasar de página)
+        self._ordenar = lru_cache(maxsize=8)(self._orden_filas)
+
+    def _filtrar_cubo(self, start_date, end_date, ciudades, productos):
+        return filtrar_cubo(self.cubo, _fecha(start_date), _fecha(end_date), list(ciudades), list(productos))
+
+    def _cubo(self, filtros):
+        start_date, end_date, ciudades, productos = filtros
+        with fase('filtrado'):
+            return self._filtrar(start_date, end_date, tuple(ciudades or ()), tuple(productos or ()))
+
+    def version_datos(self):
+        # Los datos están en memoria: no cambian mientras viva el motor
+        return self.version
+
+    def rango_fechas(self):
+        return self.df['Fecha'].min(), self.df['Fecha'].max()
+
+    def categorias(self, columna):
+        return list(self.df[columna].cat.categories)
+
+    def metricas(self, filtros):
+        cubo = self._cubo(filtros)
+        with fase('agrupar:metricas'):
+            return metricas(cubo)
+
+    def sumar_por(self, filtros, por, medida='Total'):
+        cubo = self._cubo(filtros)
+        with fase(_fase_agrupar(por)):
+            return sumar_por(cubo, por, medida)
+
+    def contar_por(self, filtros, por):
+        cubo = self._cubo(filtros)
+        with fase(_fase_agrupar(por)):
+            return contar_por(cubo, por)
+
+    def promedio(self, filtros, columna):
+        return self.filas(filtros, [columna])[columna].mean()
+
+    def filas(self, filtros, columnas=None):
+        start_date, end_date, ciudades, productos = filtros
+        return self.ventas.filtrar(start_date or None, end_date or None, ciudades, productos, columnas)
+
+    def columnas(self):
+        return [c for c in self.columnas_pagina if c not in COLUMNAS_INTERNAS]
+
+    def _posiciones(self, start_date, end_date, ciudades, productos):
+        return self.ventas.posiciones(start_date or None, end_date or None, ciudades, productos)
+
+    def _orden_filas(self, start_date, end_date, ciudades, productos, orden, descendente):
+        posiciones = self._posiciones(start_date, end_date, ciudades, productos)
+        valores = self.df[orden].iloc[posiciones].to_numpy()
+        if descendente:
+            # Descendente con los empates en orden cronológico (como ORDER BY ... DESC, "Fecha y Hora")
+            permutacion = (len(valores) - 1 - np.argsort(valores[::-1], kind='stable'))[::-1]
+        else:
+            permutacion = np.argsort(valores, kind='stable')
+        return posiciones[permutacion]
+
+    def pagina(self, filtros, columnas=None, orden=None, descendente=False, desplazamiento=0, limite=100):
+        """Filas ``[desplazamiento, desplazamiento + limite)`` del resultado ordenado por ``orden``
+        (por defecto, fecha y hora), solo con ``columnas``.
+
+        Se ordenan posiciones, no filas: solo se copian las ``limite`` filas de la página.
+        """
+        start_date, end_date, ciudades, productos = filtros
+        clave = (start_date, end_date, tuple(ciudades or ()), tuple(productos or ()))
+        orden = orden or 'Fecha y Hora'
+        if orden == 'Fecha y Hora' and not descendente:
+            # Las posiciones ya van en orden cronológico
+            posiciones = self._posiciones(*clave)
+        else:
+            posiciones = self._ordenar(*clave, orden, descendente)
+        seleccion = posiciones[desplazamiento:desplazamiento + limite]
+        return self.df.take(seleccion)[columnas or self.columnas_pagina]
+
+
+# --- DuckDB ---
+
+# Una base DuckDB por proceso y por origen; cada hilo usa su propio cursor
+# (las conexiones no se comparten entre hilos ni sobreviven a un fork)
+_conexiones = {}
+_selecciones = {}  # Lista de columnas renombradas de la vista de cada origen
+_lock_conexiones = threading.Lock()
+_cursores = threading.local()
+
+
+def _conexion_base(ruta_parquet, hilos):
+    import duckdb
+
+    clave = (os.getpid(), str(ruta_parquet))
+    with _lock_conexiones:
+        con = _conexiones.get(clave)
+        if con is None:
+            con = duckdb.connect()
+            if hilos:
+                con.execute(f"SET threads = {int(hilos)}")
+            # Vista con los nombres en español que usan los dashboards; las columnas de
+            # partición (anio, mes) se conservan para poder filtrar por ellas
+            origen = origen_sql(ruta_parquet)
+            disponibles = [fila[0] for fila in con.execute(f"DESCRIBE SELECT * FROM {origen}").fetchall()]
+            columnas = [f'"{c}" AS "{columnas_traducidas[c]}"' if c in columnas_traducidas else f'"{c}"'
+                        for c in disponibles]
+            _selecciones[str(ruta_parquet)] = ', '.join(columnas)
+            con.execute(f"CREATE VIEW ventas AS SELECT {_selecciones[str(ruta_parquet)]} FROM {origen}")
+            _conexiones[clave] = con
+        return con
+
+
+def conexion(ruta_parquet, hilos=None):
+    """Cursor DuckDB del hilo actual sobre la vista ``ventas`` de ``ruta_parquet``."""
+    clave = (os.getpid(), str(ruta_parquet))
+    cursores = getattr(_cursores, 'por_clave', None)
+    if cursores is None:
+        cursores = _cursores.por_clave = {}
+    cursor = cursores.get(clave)
+    if cursor is None:
+        cursor = cursores[clave] = _conexion_base(ruta_parquet, hilos).cursor()
+    return cursor
+
+
+def _where(filtros):
+    start_date, end_date, ciudades, productos = filtros
+    condiciones, parametros = [], []
+    if start_date:
+        condiciones.append('"Fecha" >= ?')
+        parametros.append(_fecha(start_date).to_pydatetime())
+    if end_date:
+        condiciones.append('"Fecha" <= ?')
+        parametros.append(_fecha(end_date).to_pydatetime())
+    for columna, valores in (('Ciudad', ciudades), ('Línea de Producto', productos)):
+        if valores:
+            condiciones.append(f'"{columna}" IN ({", ".join("?" * len(valores))})')
+            parametros.extend(valores)
+    return (' WHERE ' + ' AND '.join(condiciones) if condiciones else ''), parametros
+
+
+# sum() de enteros en DuckDB da HUGEINT (float en pandas): se devuelve a BIGINT como en pandas
+COLUMNAS_ENTERAS = {columnas_traducidas[c] for c, tipo in TIPOS_CSV.items() if tipo == 'int64'}
+
+
+def _suma_sql(medida):
+    return f'CAST(sum("{medida}") AS BIGINT)' if medida in COLUMNAS_ENTERAS else f'sum("{medida}")'
+
+
+def _columnas_sql(columnas):
+    return ', '.join(f'"{c}"' for c in columnas)
+
+
+def _marca_archivo(ruta):
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class MotorDuckDB:
+    """Consultas SQL de DuckDB directamente sobre Parquet."""
+
+    nombre = 'duckdb'
+
+    def __init__(self, ruta_parquet=None, version=None, hilos=None):
+        ruta_parquet = ruta_parquet or os.environ.get('ALMACEN_VENTAS')
+        if ruta_parquet is None:
+            ruta_parquet, version = asegurar_instantanea()
+        self.ruta_parquet = Path(ruta_parquet)
+        self.manifiesto = leer_manifiesto(self.ruta_parquet)
+        if version is None and self.manifiesto:
+            version = self.manifiesto['version']
+        self.version = version or os.stat(self.ruta_parquet).st_mtime_ns
+        self.hilos = hilos
+        # Archivo que cambia cuando cambian los datos: el manifiesto del almacén o la huella
+        # (.json) de la instantánea; un Parquet suelto sin huella se vigila a sí mismo
+        if self.ruta_parquet.is_dir():
+            self._ruta_version = self.ruta_parquet / MANIFIESTO
+        elif self.ruta_parquet.with_suffix('.json').exists():
+            self._ruta_version = self.ruta_parquet.with_suffix('.json')
+        else:
+            self._ruta_version = self.ruta_parquet
+        self._marca = _marca_archivo(self._ruta_version)
+        self._lock_version = threading.Lock()
+
+    def version_datos(self):
+        """Versión de los datos en disco, releída solo si su manifiesto o huella cambió
+        (p. ej. tras reingerir el almacén o regenerar la instantánea)."""
+        marca = _marca_archivo(self._ruta_version)
+        if marca != self._marca:
+            with self._lock_version:
+                if marca != self._marca:
+                    self._recargar(marca)
+        return self.version
+
+    def _recargar(self, marca):
+        if self.ruta_parquet.is_dir():
+            self.manifiesto = leer_manifiesto(self.ruta_parquet)
+            self.version = self.manifiesto['version'] if self.manifiesto else marca
+        elif self._ruta_version != self.ruta_parquet:
+            try:
+                with open(self._ruta_version, encoding='utf-8') as f:
+                    self.version = json.load(f)['hash']
+            except (OSError, ValueError, KeyError):
+                self.version = marca
+        else:
+            self.version = marca
+        self._marca = marca
+
+    def _fuente(self, filtros):
+        """Origen (``ventas`` o las particiones que pueden coincidir), ``WHERE`` y parámetros."""
+        with fase('filtrado'):
+            return self._fuente_filtrada(filtros)
+
+    def _fuente_filtrada(self, filtros):
+        where, parametros = _where(filtros)
+        self.version_datos()  # Poda con el manifiesto vigente si el almacén se reingirió
+        if not self.manifiesto:
+            return 'ventas', where, parametros
+        start_date, end_date, ciudades, _ = filtros
+        archivos = archivos_particion(self.manifiesto, self.ruta_parquet,
+                                      _fecha(start_date), _fecha(end_date), ciudades)
+        if not archivos:
+            return '(SELECT * FROM ventas LIMIT 0) AS ventas', where, parametros
+        conexion(self.ruta_parquet, self.hilos)  # Garantiza la lista de columnas de la vista
+        lista = ', '.join("'{}'".format(a.replace("'", "''")) for a in archivos)
+        origen = (f"(SELECT {_selecciones[str(self.ruta_parquet)]} "
+                  f"FROM read_parquet([{lista}], hive_partitioning = true)) AS ventas")
+        return origen, where, parametros
+
+    def _consultar(self, sql, parametros=()):
+        return conexion(self.ruta_parquet, self.hilos).execute(sql, list(parametros)).df()
+
+    def rango_fechas(self):
+        self.version_datos()
+        if self.manifiesto:
+            return pd.Timestamp(self.manifiesto['desde']), pd.Timestamp(self.manifiesto['hasta'])
+        fila = self._consultar('SELECT min("Fecha") AS desde, max("Fecha") AS hasta FROM ventas').iloc[0]
+        return fila['desde'], fila['hasta']
+
+    def categorias(self, columna):
+        self.version_datos()
+        if self.manifiesto and columna == 'Ciudad':
+            return sorted(self.manifiesto['ciudades'])
+        sql = f'SELECT DISTINCT "{columna}" AS valor FROM ventas ORDER BY valor'
+        return self._consultar(sql)['valor'].tolist()
+
+    def metricas(self, filtros):
+        origen, where, parametros = self._fuente(filtros)
+        with fase('agrupar:metricas'):
+            fila = self._consultar('SELECT sum("Total") AS total, count(*) AS n, sum("Ingreso Bruto") AS bruto '
+                                   f'FROM {origen}{where}', parametros).iloc[0]
+        num_transacciones = int(fila['n'])
+        if num_transacciones == 0:
+            return 0.0, 0, 0, float('nan')
+        return (fila['total'], num_transacciones, fila['total'] / num_transacciones,
+                fila['bruto'] / num_transacciones)
+
+    def sumar_por(self, filtros, por, medida='Total'):
+        origen, where, parametros = self._fuente(filtros)
+        grupos = _columnas_sql(_como_lista(por))
+        with fase(_fase_agrupar(por)):
+            resultado = self._consultar(f'SELECT {grupos}, {_suma_sql(medida)} AS "{medida}" '
+                                        f'FROM {origen}{where} GROUP BY {grupos} ORDER BY {grupos}', parametros)
+        return resultado.set_index(por)[medida]
+
+    def contar_por(self, filtros, por):
+        # Mismo orden que value_counts(): de mayor a menor conteo, empates por categoría
+        origen, where, parametros = self._fuente(filtros)
+        with fase(_fase_agrupar(por)):
+            resultado = self._consultar(f'SELECT "{por}", count(*) AS count FROM {origen}{where} '
+                                        f'GROUP BY "{por}" ORDER BY count DESC, "{por}"', parametros)
+        return resultado.set_index(por)['count']
+
+    def promedio(self, filtros, columna):
+        origen, where, parametros = self._fuente(filtros)
+        return self._consultar(f'SELECT avg("{columna}") AS media FROM {origen}{where}', parametros).iloc[0]['media']
+
+    def filas(self, filtros, columnas=None):
+        origen, where, parametros = self._fuente(filtros)
+        seleccion = _columnas_sql(columnas) if columnas else '*'
+        return self._consultar(f'SELECT {seleccion} FROM {origen}{where} ORDER BY "Fecha y Hora"', parametros)
+
+    def _columnas_vista(self):
+        return self._consultar('DESCRIBE SELECT * FROM ventas')['column_name'].tolist()
+
+    def columnas(self):
+        # Las columnas de partición (anio, mes) y las internas no se muestran
+        return [c for c in _columnas_datos(self._columnas_vista()) if c not in COLUMNAS_INTERNAS]
+
+    def pagina(self, filtros, columnas=None, orden=None, descendente=False, desplazamiento=0, limite=100):
+        # ORDER BY + LIMIT: DuckDB resuelve el top-N sin ordenar ni transferir todo el resultado
+        origen, where, parametros = self._fuente(filtros)
+        seleccion = _columnas_sql(columnas or _columnas_datos(self._columnas_vista()))
+        criterio = f'"{orden or "Fecha y Hora"}"{" DESC" if descendente else ""}'
+        return self._consultar(f'SELECT {seleccion} FROM {origen}{where} ORDER BY {criterio}, "Fecha y Hora" '
+                               'LIMIT ? OFFSET ?', parametros + [int(limite), int(desplazamiento)])
+
+
+MOTORES = {'pandas': MotorPandas, 'duckdb': MotorDuckDB}
+
+
+def crear_motor(nombre=None, **opciones):
+    """Motor de consultas ``nombre`` (o ``$MOTOR_CONSULTAS``, por defecto pandas)."""
+    nombre = nombre or os.environ.get('MOTOR_CONSULTAS', MOTOR_POR_DEFECTO)
+    if nombre not in MOTORES:
+        raise ValueError(f"Motor de consultas desconocido: {nombre!r} (opciones: {', '.join(MOTORES)})")
+    return MOTORES[nombre](**opciones)
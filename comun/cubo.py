@@ -0,0 +1,46 @@
+import pandas as pd
+
+# Dimensiones del cubo: todas las que los dashboards usan para filtrar o agrupar
+DIMENSIONES = ['Fecha', 'Ciudad', 'Sucursal', 'Línea de Producto', 'Tipo de Cliente', 'Género', 'Método de Pago']
+
+
+def construir_cubo(df):
+    """Sumas de Total, Ingreso Bruto y Cantidad y número de transacciones por combinación
+    de dimensiones. Su tamaño depende de la cardinalidad, no del número de filas."""
+    agrupado = df.groupby(DIMENSIONES, observed=True, sort=True)
+    cubo = agrupado[['Total', 'Ingreso Bruto', 'Cantidad']].sum()
+    cubo['Transacciones'] = agrupado.size()
+    return cubo.reset_index()
+
+
+def filtrar_cubo(cubo, start_date=None, end_date=None, ciudades=None, productos=None):
+    mask = pd.Series(True, index=cubo.index)
+    if start_date and end_date:
+        mask &= (cubo['Fecha'] >= start_date) & (cubo['Fecha'] <= end_date)
+    if ciudades:
+        mask &= cubo['Ciudad'].isin(ciudades)
+    if productos:
+        mask &= cubo['Línea de Producto'].isin(productos)
+    return cubo[mask]
+
+
+def metricas(cubo):
+    """Ventas totales, transacciones, venta promedio y margen bruto promedio."""
+    ventas_totales = cubo['Total'].sum()
+    num_transacciones = int(cubo['Transacciones'].sum())
+    if num_transacciones == 0:
+        return ventas_totales, 0, 0, float('nan')
+    return (ventas_totales, num_transacciones, ventas_totales / num_transacciones,
+            cubo['Ingreso Bruto'].sum() / num_transacciones)
+
+
+def sumar_por(cubo, por, medida='Total'):
+    return cubo.groupby(por, observed=True)[medida].sum()
+
+
+def contar_por(cubo, por):
+    # Equivalente a value_counts() sobre las filas originales
+    conteo = cubo.groupby(por, observed=True)['Transacciones'].sum()
+    conteo = conteo[conteo > 0].sort_values(ascending=False, kind='stable')
+    conteo.name = 'count'
+    return conteo
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from comun.archivos import escritura_atomica, guardar_json
+
+# Ruta por defecto del CSV (independiente del directorio desde el que se ejecute el script)
+RAIZ_PROYECTO = Path(__file__).resolve().parents[1]
+RUTA_CSV = RAIZ_PROYECTO / "data" / "supermarket_sales.csv"
+DIR_CACHE = RAIZ_PROYECTO / "data" / ".cache"
+# Instantánea Arrow para el arranque de los dashboards (se puede desplegar sin el CSV)
+RUTA_INSTANTANEA_ARROW = DIR_CACHE / "supermarket_sales.arrow"
+
+# Esquema explícito del CSV: evita la inferencia de tipos de pandas
+TIPOS_CSV = {
+    'Invoice ID': 'string',
+    'Branch': 'category',
+    'City': 'category',
+    'Customer type': 'category',
+    'Gender': 'category',
+    'Product line': 'category',
+    'Unit price': 'float64',
+    'Quantity': 'int64',
+    'Tax 5%': 'float64',
+    'Total': 'float64',
+    'Date': 'string',
+    'Time': 'string',
+    'Payment': 'category',
+    'Cost of goods sold': 'float64',
+    'Gross margin percentage': 'float64',
+    'Gross income': 'float64',
+    'Customer stratification rating': 'float64',
+}
+FORMATO_FECHA = '%m/%d/%Y'
+FORMATO_FECHA_HORA = FORMATO_FECHA + ' %H:%M'
+
+# Diccionario para traducir nombres de columnas
+columnas_traducidas = {
+    'Invoice ID': 'ID de Factura',
+    'Branch': 'Sucursal',
+    'City': 'Ciudad',
+    'Customer type': 'Tipo de Cliente',
+    'Gender': 'Género',
+    'Product line': 'Línea de Producto',
+    'Unit price': 'Precio Unitario',
+    'Quantity': 'Cantidad',
+    'Tax 5%': 'Impuesto 5%',
+    'Total': 'Total',
+    'Date': 'Fecha',
+    'Time': 'Hora',
+    'Payment': 'Método de Pago',
+    'Cost of goods sold': 'Costo de Bienes Vendidos',
+    'Gross margin percentage': 'Porcentaje de Margen Bruto',
+    'Gross income': 'Ingreso Bruto',
+    'Customer stratification rating': 'Calificación de Estratificación del Cliente',
+    'Timestamp': 'Fecha y Hora',
+}
+
+# Fecha y hora fusionadas (orden e índices por fecha): no forman parte del esquema original
+# del CSV, así que no se exportan en las facturas ni se listan en la tabla de datos
+COLUMNAS_INTERNAS = ['Timestamp', 'Fecha y Hora']
+
+# Versión del esquema: cambiarla invalida todas las instantáneas existentes
+VERSION_ESQUEMA = 1
+
+
+def _hash_archivo(ruta, tam_bloque=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def huella_csv(ruta_csv, guardada=None):
+    """Tamaño, mtime y hash del CSV.
+
+    Si el tamaño y el mtime coinciden con la huella ``guardada`` se reutiliza su hash
+    y no se vuelve a leer el archivo.
+    """
+    st = os.stat(ruta_csv)
+    huella = {'version': VERSION_ESQUEMA, 'tamano': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    if guardada and all(guardada.get(k) == v for k, v in huella.items()):
+        huella['hash'] = guardada['hash']
+    else:
+        huella['hash'] = _hash_archivo(ruta_csv)
+    return huella
+
+
+def parsear_csv(origen, chunksize=None):
+    """Lee el CSV (ruta o buffer) con el esquema explícito y tipa las fechas.
+
+    Con ``chunksize`` devuelve un generador de bloques ya tipados.
+    """
+    if chunksize:
+        lector = pd.read_csv(origen, dtype=TIPOS_CSV, chunksize=chunksize)
+        return (tipar_fechas(bloque) for bloque in lector)
+    return tipar_fechas(pd.read_csv(origen, dtype=TIPOS_CSV))
+
+
+def tipar_fechas(df):
+    # Formato explícito: sin inferencia fila a fila
+    df['Timestamp'] = pd.to_datetime(df['Date'] + ' ' + df['Time'], format=FORMATO_FECHA_HORA)
+    df['Date'] = df['Timestamp'].dt.normalize()
+    return df
+
+
+def _rutas_instantanea(ruta_csv, dir_cache=None):
+    base = Path(dir_cache or DIR_CACHE) / Path(ruta_csv).stem
+    return base.with_suffix('.parquet'), base.with_suffix('.json')
+
+
+def _leer_huella(ruta_huella):
+    try:
+        with open(ruta_huella, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _misma_huella(huella, guardada):
+    return all(huella[k] == guardada.get(k) for k in ('version', 'tamano', 'hash'))
+
+
+def _guardar_huella(ruta_huella, huella):
+    try:
+        guardar_json(ruta_huella, huella)
+    except OSError:
+        pass
+
+
+def _escribir_instantanea(df, ruta_parquet, ruta_huella, huella):
+    ruta_parquet.parent.mkdir(parents=True, exist_ok=True)
+    # Escritura atómica: otro proceso nunca ve un parquet a medio escribir
+    with escritura_atomica(ruta_parquet) as tmp:
+        df.to_parquet(tmp, index=False)
+    _guardar_huella(ruta_huella, huella)
+
+
+def cargar_ventas(ruta_csv=None, traducir=True, usar_cache=True, dir_cache=None):
+    """Carga las ventas con tipos explícitos.
+
+    La primera carga parsea el CSV y guarda una instantánea Parquet en ``data/.cache``
+    (o en ``dir_cache``); las siguientes la leen directamente mientras el CSV no cambie
+    (tamaño, mtime y hash).
+    El hash queda en ``df.attrs['huella']``. Sin ``pyarrow`` instalado se lee siempre el CSV.
+    """
+    ruta_csv = ruta_csv or RUTA_CSV
+    df = None
+
+    if usar_cache:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            usar_cache = False
+
+    if usar_cache:
+        ruta_parquet, ruta_huella = _rutas_instantanea(ruta_csv, dir_cache)
+        guardada = _leer_huella(ruta_huella)
+        huella = huella_csv(ruta_csv, guardada)
+        if guardada and ruta_parquet.exists() and _misma_huella(huella, guardada):
+            df = pd.read_parquet(ruta_parquet)
+            if huella != guardada:
+                # Solo cambió el mtime (p. ej. una copia): se actualiza la huella
+                _guardar_huella(ruta_huella, huella)
+        else:
+            df = parsear_csv(ruta_csv)
+            try:
+                _escribir_instantanea(df, ruta_parquet, ruta_huella, huella)
+            except OSError:
+                pass  # Directorio de solo lectura: se sigue sin instantánea
+        # Identifica la versión de los datos (p. ej. para invalidar cachés de resultados)
+        df.attrs['huella'] = huella['hash']
+    else:
+        df = parsear_csv(ruta_csv)
+
+    if traducir:
+        df = traducir_columnas(df)
+    return df
+
+
+def asegurar_instantanea(ruta_csv=None, dir_cache=None):
+    """Ruta de la instantánea Parquet del CSV y su hash, regenerándola solo si el CSV cambió.
+
+    A diferencia de ``cargar_ventas`` no deja los datos en memoria cuando la instantánea
+    está al día (para motores que consultan el Parquet directamente). Sin el CSV se usa la
+    instantánea existente tal cual; si tampoco existe se lanza ``FileNotFoundError``.
+    """
+    ruta_csv = ruta_csv or RUTA_CSV
+    ruta_parquet, ruta_huella = _rutas_instantanea(ruta_csv, dir_cache)
+    guardada = _leer_huella(ruta_huella)
+    if not Path(ruta_csv).exists():
+        if guardada and ruta_parquet.exists():
+            return ruta_parquet, guardada['hash']
+        raise FileNotFoundError(f"No existe el CSV {ruta_csv} ni su instantánea Parquet {ruta_parquet}: "
+                                "copia la instantánea (con su .json) o usa un almacén (ALMACEN_VENTAS)")
+    huella = huella_csv(ruta_csv, guardada)
+    if guardada and ruta_parquet.exists() and _misma_huella(huella, guardada):
+        if huella != guardada:
+            _guardar_huella(ruta_huella, huella)
+    else:
+        _escribir_instantanea(parsear_csv(ruta_csv), ruta_parquet, ruta_huella, huella)
+    return ruta_parquet, huella['hash']
+
+
+def _ruta_suma(ruta_arrow):
+    return Path(ruta_arrow).with_suffix('.arrow.json')
+
+
+def escribir_instantanea_arrow(ruta_csv=None, destino=None):
+    """Instantánea Arrow (Feather v2 sin comprimir) del CSV y su suma de verificación.
+
+    Se lee con memory map sin decodificar nada; junto con su ``.arrow.json`` basta para
+    arrancar los dashboards en hosts sin el CSV ni acceso a la red.
+    """
+    from pyarrow import feather
+
+    ruta_csv = ruta_csv or RUTA_CSV
+    destino = Path(destino or RUTA_INSTANTANEA_ARROW)
+    huella = huella_csv(ruta_csv)
+    df = parsear_csv(ruta_csv)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with escritura_atomica(destino) as tmp:
+        feather.write_feather(df, tmp, compression='uncompressed')
+        suma = _hash_archivo(tmp)
+    st = os.stat(destino)
+    _guardar_huella(_ruta_suma(destino), {'version': VERSION_ESQUEMA, 'hash': suma, 'filas': len(df),
+                                          'tamano': st.st_size, 'mtime_ns': st.st_mtime_ns, 'csv': huella})
+    return destino
+
+
+def cargar_instantanea_arrow(ruta=None, ruta_csv=None, verificar=True, traducir=True):
+    """Carga de arranque desde la instantánea Arrow (``$INSTANTANEA_VENTAS`` o ``data/.cache``).
+
+    Antes de usarla se comprueba su suma de verificación y, si el CSV de origen está
+    disponible, que no haya cambiado (tamaño y mtime; el hash solo si difieren). Con la
+    instantánea ocurre lo mismo: solo se vuelve a leer entera si su tamaño o su mtime no
+    son los registrados. Una instantánea ausente, dañada u obsoleta se regenera desde el
+    CSV; sin CSV es un error.
+    """
+    try:
+        from pyarrow import feather
+    except ImportError:
+        return cargar_ventas(ruta_csv, traducir=traducir)
+
+    ruta = Path(ruta or os.environ.get('INSTANTANEA_VENTAS') or RUTA_INSTANTANEA_ARROW)
+    ruta_csv = Path(ruta_csv or RUTA_CSV)
+    suma = _leer_huella(_ruta_suma(ruta))
+    hay_csv = ruta_csv.exists()
+
+    valida = suma is not None and suma.get('version') == VERSION_ESQUEMA and ruta.exists()
+    if valida and hay_csv:
+        valida = _misma_huella(huella_csv(ruta_csv, suma['csv']), suma['csv'])
+    if valida and verificar:
+        st = os.stat(ruta)
+        if (suma.get('tamano'), suma.get('mtime_ns')) != (st.st_size, st.st_mtime_ns):
+            valida = _hash_archivo(ruta) == suma['hash']
+            if valida:
+                # Copiada o tocada pero intacta: se registra su tamaño y mtime actuales
+                suma.update(tamano=st.st_size, mtime_ns=st.st_mtime_ns)
+                _guardar_huella(_ruta_suma(ruta), suma)
+
+    if not valida:
+        if not hay_csv:
+            if not ruta.exists():
+                raise FileNotFoundError(f"No existe la instantánea {ruta} ni el CSV {ruta_csv}")
+            raise ValueError(f"La instantánea {ruta} no coincide con su suma de verificación y no hay CSV")
+        try:
+            escribir_instantanea_arrow(ruta_csv, ruta)
+        except OSError:
+            return cargar_ventas(ruta_csv, traducir=traducir)  # Directorio de solo lectura
+        suma = _leer_huella(_ruta_suma(ruta))
+
+    df = feather.read_table(ruta, memory_map=True).to_pandas()
+    df.attrs['huella'] = suma['csv']['hash']
+    return traducir_columnas(df) if traducir else df
+
+
+def leer_por_bloques(ruta_csv=None, tam_bloque=100_000, traducir=True):
+    """Itera el CSV en bloques tipados de ``tam_bloque`` filas (memoria acotada)."""
+    for bloque in parsear_csv(ruta_csv or RUTA_CSV, chunksize=tam_bloque):
+        yield traducir_columnas(bloque) if traducir else bloque
+
+
+def traducir_columnas(df):
+    return df.rename(columns=columnas_traducidas)
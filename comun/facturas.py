@@ -0,0 +1,193 @@
+"""Facturas HTML de las ventas: índice de búsqueda, plantilla y exportación ZIP por bloques.
+
+Sin dependencia de Streamlit: lo usan la app de facturación y el servidor que entrega los
+ZIP en streaming (``invoicing/servidor_facturas.py``).
+"""
+import io
+import zipfile
+
+import jinja2
+import pandas as pd
+
+from comun.datos import cargar_ventas
+
+
+def cargar_datos():
+    # Carga el CSV (o su instantánea Parquet) con el esquema tipado
+    df = cargar_ventas(traducir=False)
+    # Renombrar columnas para mantener consistencia
+    columnas = {
+        'Invoice ID': 'Invoice_ID',
+        'Branch': 'Branch',
+        'City': 'City',
+        'Customer type': 'Customer_type',
+        'Gender': 'Gender',
+        'Product line': 'Product_line',
+        'Unit price': 'Unit_price',
+        'Quantity': 'Quantity',
+        'Tax 5%': 'Tax_5',
+        'Total': 'Total',
+        'Date': 'Date',
+        'Time': 'Time',
+        'Payment': 'Payment',
+        'Cost of goods sold': 'cogs',
+        'Gross margin percentage': 'gross_margin_percentage',
+        'Gross income': 'gross_income',
+        'Customer stratification rating': 'Rating'
+    }
+    df = df.rename(columns=columnas)
+    return df
+
+
+class IndiceFacturas:
+    """Facturas indexadas para búsquedas interactivas.
+
+    - Índice hash ``Invoice_ID -> posición``: una factura en O(1).
+    - Índice secundario ``(sucursal, fecha) -> tramo``: las filas quedan ordenadas por
+      sucursal, fecha y hora, así que las facturas de un día son un tramo contiguo (O(k)).
+    """
+
+    def __init__(self, df):
+        self.df = df.sort_values(['Branch', 'Date', 'Time'], kind='stable', ignore_index=True)
+        self.posiciones = dict(zip(self.df['Invoice_ID'], range(len(self.df))))
+        tamanos = self.df.groupby(['Branch', 'Date'], observed=True, sort=True).size()
+        fines = tamanos.cumsum()
+        self.tramos = {(sucursal, fecha.date()): (fin - n, fin)
+                       for (sucursal, fecha), n, fin in zip(tamanos.index, tamanos.to_numpy(), fines.to_numpy())}
+        por_sucursal = self.df.groupby('Branch', observed=True, sort=True).size()
+        self.tramos_sucursal = dict(zip(por_sucursal.index, zip(por_sucursal.cumsum() - por_sucursal, por_sucursal.cumsum())))
+        self.sucursales = list(self.df['Branch'].cat.categories)
+        self.fechas = list(pd.DatetimeIndex(self.df['Date'].unique()).sort_values().date)
+
+    def facturas(self, sucursal, fecha):
+        inicio, fin = self.tramos.get((sucursal, fecha), (0, 0))
+        return self.df.iloc[inicio:fin]
+
+    def facturas_rango(self, sucursal, desde, hasta):
+        # Dentro de la sucursal las fechas están ordenadas: el rango también es un tramo contiguo
+        inicio, fin = self.tramos_sucursal.get(sucursal, (0, 0))
+        fechas = self.df['Date'].iloc[inicio:fin]
+        return self.df.iloc[inicio + fechas.searchsorted(pd.Timestamp(desde), 'left'):
+                            inicio + fechas.searchsorted(pd.Timestamp(hasta), 'right')]
+
+    def factura(self, invoice_id):
+        posicion = self.posiciones.get(invoice_id)
+        return None if posicion is None else self.df.iloc[posicion]
+
+
+# Plantilla de la factura, compilada una sola vez en el entorno de Jinja
+PLANTILLA_FACTURA = """
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; }
+        .factura { max-width: 800px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; }
+        .cabecera { background: #4a90e2; color: white; padding: 20px; text-align: center; }
+        .info-tienda { text-align: center; margin: 20px 0; }
+        .detalles { margin: 20px 0; }
+        .productos { width: 100%; border-collapse: collapse; margin: 20px 0; }
+        .productos th { background: #4a90e2; color: white; padding: 10px; }
+        .productos td { padding: 10px; border-bottom: 1px solid #ddd; }
+        .total { text-align: right; margin-top: 20px; }
+    </style>
+</head>
+<body>
+    <div class="factura">
+        <div class="cabecera">
+            <h1>FACTURA</h1>
+            <div>Nº: {{ datos['Invoice_ID'] }}</div>
+        </div>
+
+        <div class="info-tienda">
+            <h2>Sucursal {{ datos['Branch'] }} - {{ datos['City'] }}</h2>
+            <p>Fecha: {{ datos['Date'].date() }}</p>
+            <p>Hora: {{ datos['Time'] }}</p>
+        </div>
+
+        <div class="detalles">
+            <h3>Información del Cliente:</h3>
+            <p>Tipo de Cliente: {{ datos['Customer_type'] }}</p>
+            <p>Género: {{ datos['Gender'] }}</p>
+            <p>Rating: {{ datos['Rating'] }}</p>
+        </div>
+
+        <table class="productos">
+            <tr>
+                <th>Producto</th>
+                <th>Cantidad</th>
+                <th>Precio Unitario</th>
+                <th>Total</th>
+            </tr>
+            <tr>
+                <td>{{ datos['Product_line'] }}</td>
+                <td>{{ datos['Quantity'] }}</td>
+                <td>${{ "%.2f"|format(datos['Unit_price']) }}</td>
+                <td>${{ "%.2f"|format(datos['Total']) }}</td>
+            </tr>
+        </table>
+
+        <div class="total">
+            <p>Subtotal: ${{ "%.2f"|format(datos['Total'] - datos['Tax_5']) }}</p>
+            <p>Impuesto (5%): ${{ "%.2f"|format(datos['Tax_5']) }}</p>
+            <p><strong>TOTAL: ${{ "%.2f"|format(datos['Total']) }}</strong></p>
+        </div>
+
+        <div class="pie" style="text-align: center; margin-top: 20px;">
+            <p>Método de pago: {{ datos['Payment'] }}</p>
+            <p>Margen bruto: {{ "%.2f"|format(datos['gross_margin_percentage']) }}%</p>
+            <p>Ingreso bruto: ${{ "%.2f"|format(datos['gross_income']) }}</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
+entorno_jinja = jinja2.Environment()
+plantilla_factura = entorno_jinja.from_string(PLANTILLA_FACTURA)
+
+
+def generar_html_factura(datos_factura):
+    return plantilla_factura.render(datos=datos_factura)
+
+
+FACTURAS_POR_BLOQUE = 500
+
+
+class _Tuberia(io.RawIOBase):
+    # Destino no posicionable para zipfile: acumula los bytes escritos hasta que se recogen
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self.buffer += datos
+        return len(datos)
+
+    def recoger(self):
+        datos = bytes(self.buffer)
+        self.buffer.clear()
+        return datos
+
+
+def zip_facturas(facturas, tam_bloque=FACTURAS_POR_BLOQUE):
+    """Genera el ZIP con una factura HTML por fila, en trozos de bytes.
+
+    Se renderizan ``tam_bloque`` facturas cada vez y se entrega lo comprimido hasta ese
+    momento: la memoria no crece con el número de facturas.
+    """
+    tuberia = _Tuberia()
+    with zipfile.ZipFile(tuberia, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for inicio in range(0, len(facturas), tam_bloque):
+            for datos in facturas.iloc[inicio:inicio + tam_bloque].to_dict('records'):
+                zf.writestr(f"factura_{datos['Invoice_ID']}.html", generar_html_factura(datos))
+            yield tuberia.recoger()
+    yield tuberia.recoger()  # Directorio central del ZIP
+
+
+def exportar_zip(facturas, destino, tam_bloque=FACTURAS_POR_BLOQUE):
+    for trozo in zip_facturas(facturas, tam_bloque):
+        destino.write(trozo)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+NS_POR_DIA = 86_400 * 10**9
+
+
+def filtrar_ventas(df, start_date, end_date, ciudades=None, productos=None):
+    """Filtro de la barra lateral de Streamlit: rango de fechas (``date``) y listas opcionales."""
+    mask = (df['Fecha'].dt.date >= start_date) & (df['Fecha'].dt.date <= end_date)
+    if ciudades:
+        mask &= df['Ciudad'].isin(ciudades)
+    if productos:
+        mask &= df['Línea de Producto'].isin(productos)
+    return df[mask]
+
+
+def numero_dia(valor):
+    """Días desde 1970-01-01 de una fecha (``date``, ``Timestamp`` o texto)."""
+    return pd.Timestamp(valor).value // NS_POR_DIA
+
+
+def _codigos_aceptados(columna, valores):
+    # Tabla código -> aceptado; el código -1 (nulo) cae en la última posición, siempre False
+    tabla = np.zeros(len(columna.cat.categories) + 1, dtype=bool)
+    indices = columna.cat.categories.get_indexer(list(valores))
+    tabla[indices[indices >= 0]] = True
+    return tabla
+
+
+class VentasPorFecha:
+    """Ventas ordenadas por fecha y hora con un índice entero de días.
+
+    Un rango de fechas se resuelve con ``searchsorted`` sobre el índice (un tramo contiguo,
+    sin máscara sobre todo el DataFrame) y ciudades/productos se filtran solo en ese tramo
+    comparando códigos de categoría.
+    """
+
+    def __init__(self, df):
+        self.df = df.sort_values('Fecha y Hora', kind='stable', ignore_index=True)
+        self.dias = self.df['Fecha'].to_numpy().astype('datetime64[D]').astype(np.int64)
+
+    def __len__(self):
+        return len(self.df)
+
+    def tramo(self, start_date=None, end_date=None):
+        """Posiciones ``[inicio, fin)`` de las ventas entre las dos fechas (incluidas)."""
+        inicio = 0 if start_date is None else int(np.searchsorted(self.dias, numero_dia(start_date), 'left'))
+        fin = len(self.dias) if end_date is None else int(np.searchsorted(self.dias, numero_dia(end_date), 'right'))
+        return inicio, max(inicio, fin)
+
+    def _mascara(self, inicio, fin, ciudades, productos):
+        mask = None
+        for nombre, valores in (('Ciudad', ciudades), ('Línea de Producto', productos)):
+            if valores:
+                columna = self.df[nombre]
+                aceptados = _codigos_aceptados(columna, valores)[columna.cat.codes.to_numpy()[inicio:fin]]
+                mask = aceptados if mask is None else mask & aceptados
+        return mask
+
+    def posiciones(self, start_date=None, end_date=None, ciudades=None, productos=None):
+        """Posiciones (en orden cronológico) de las ventas que cumplen los filtros, sin copiar filas."""
+        inicio, fin = self.tramo(start_date, end_date)
+        mask = self._mascara(inicio, fin, ciudades, productos)
+        return np.arange(inicio, fin) if mask is None else inicio + np.flatnonzero(mask)
+
+    def filtrar(self, start_date=None, end_date=None, ciudades=None, productos=None, columnas=None):
+        inicio, fin = self.tramo(start_date, end_date)
+        mask = self._mascara(inicio, fin, ciudades, productos)
+        tramo = self.df.iloc[inicio:fin]
+        if columnas is not None:
+            tramo = tramo[columnas]
+        return tramo if mask is None else tramo[mask]
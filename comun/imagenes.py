@@ -0,0 +1,73 @@
+"""Exportación de figuras de Plotly a imagen por lotes y con caché por contenido.
+
+La clave de cada imagen es un hash del JSON de la figura (datos y layout) y de las
+opciones de exportación: una figura que no cambió entre dos informes se lee del disco
+sin pasar por Kaleido. Las que faltan se renderizan todas juntas en una sola sesión de
+Kaleido con varias pestañas en paralelo (o, con Kaleido < 1, en un pool de procesos).
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+import plotly
+import plotly.io as pio
+
+from comun.archivos import escritura_atomica
+from comun.datos import DIR_CACHE
+
+DIR_IMAGENES = DIR_CACHE / "graficos"
+
+
+def clave_figura(fig, formato='png', ancho=None, alto=None, escala=1):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{plotly.__version__}|{formato}|{ancho}|{alto}|{escala}|".encode())
+    h.update(fig.to_json().encode())
+    return h.hexdigest()
+
+
+def _kaleido_por_lotes():
+    try:
+        import kaleido
+    except ImportError:
+        return None
+    # Kaleido >= 1: un navegador con ``n`` pestañas para toda la lista de figuras
+    return kaleido if hasattr(kaleido, 'write_fig_from_object_sync') else None
+
+
+def _a_imagen(fig_json, formato, ancho, alto, escala):
+    return pio.from_json(fig_json).to_image(format=formato, width=ancho, height=alto, scale=escala)
+
+
+def _renderizar(figs, rutas, formato, ancho, alto, escala, paralelo):
+    kaleido = _kaleido_por_lotes()
+    if kaleido is not None:
+        opciones = {'format': formato, 'width': ancho, 'height': alto, 'scale': escala}
+        especificaciones = [{'fig': fig.to_dict(), 'path': ruta, 'opts': opciones} for fig, ruta in zip(figs, rutas)]
+        kaleido.write_fig_from_object_sync(especificaciones, kopts={'n': min(paralelo, len(figs))})
+        return
+    with ProcessPoolExecutor(max_workers=min(paralelo, len(figs))) as pool:
+        imagenes = pool.map(_a_imagen, [fig.to_json() for fig in figs],
+                            *([valor] * len(figs) for valor in (formato, ancho, alto, escala)))
+        for ruta, imagen in zip(rutas, imagenes):
+            Path(ruta).write_bytes(imagen)
+
+
+def exportar_figuras(figs, formato='png', ancho=None, alto=None, escala=1, dir_cache=None, paralelo=None):
+    """Bytes de la imagen de cada figura, en el mismo orden, renderizando solo las nuevas."""
+    dir_cache = Path(dir_cache or DIR_IMAGENES)
+    dir_cache.mkdir(parents=True, exist_ok=True)
+    rutas = [dir_cache / f"{clave_figura(fig, formato, ancho, alto, escala)}.{formato}" for fig in figs]
+
+    pendientes = {}
+    for fig, ruta in zip(figs, rutas):
+        if not ruta.exists():
+            pendientes.setdefault(ruta, fig)  # Figuras idénticas se renderizan una vez
+    if pendientes:
+        # Se escribe en temporales y se renombra: la caché nunca contiene imágenes a medias
+        with ExitStack() as pila:
+            temporales = [pila.enter_context(escritura_atomica(ruta, f".{formato}")) for ruta in pendientes]
+            _renderizar(list(pendientes.values()), temporales, formato, ancho, alto, escala,
+                        paralelo or os.cpu_count() or 1)
+    return [ruta.read_bytes() for ruta in rutas]
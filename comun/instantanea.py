@@ -0,0 +1,16 @@
+"""Escribe la instantánea Arrow de arranque de los dashboards (``comun.datos``).
+
+Para desplegar en hosts sin red ni CSV: se copia junto a la app con su ``.arrow.json``.
+
+    python -m comun.instantanea --destino data/.cache/supermarket_sales.arrow
+"""
+import argparse
+
+from comun.datos import RUTA_CSV, RUTA_INSTANTANEA_ARROW, escribir_instantanea_arrow
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Escribe la instantánea Arrow de arranque de los dashboards')
+    parser.add_argument('--csv', default=str(RUTA_CSV))
+    parser.add_argument('--destino', default=str(RUTA_INSTANTANEA_ARROW))
+    args = parser.parse_args()
+    print(f"Instantánea escrita: {escribir_instantanea_arrow(args.csv, args.destino)}")
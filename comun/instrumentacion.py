@@ -0,0 +1,242 @@
+"""Instrumentación de los callbacks de Dash: tiempos por fase, filas y tamaño de respuesta.
+
+- ``instrumentar(nombre)`` envuelve un callback y ``fase(nombre)`` mide un tramo dentro de
+  él (filtrado, cada agrupación, construcción de figuras). Fuera de un callback
+  instrumentado ``fase`` no hace nada, así que los motores pueden usarla siempre.
+- ``instalar(servidor)`` engancha el servidor Flask de Dash: añade la fase
+  ``serializacion`` (JSON de la respuesta y despacho de Dash), el tamaño de la respuesta
+  y la ruta ``/metrics`` con histogramas en formato de texto de Prometheus.
+- ``Arranque`` desglosa el tiempo de arranque de un dashboard por etapas (importaciones,
+  datos, layout...); ``instalar`` también lo publica en ``/metrics``.
+- Con ``PERFILADO_MUESTREO`` (fracción de peticiones, p. ej. ``0.01``) se muestrea la pila
+  de esas peticiones y se añade en formato "collapsed" de flamegraph.pl/speedscope a
+  ``data/.cache/perfiles/dash.folded``.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from pathlib import Path
+
+from comun.datos import DIR_CACHE
+
+DIR_PERFILES = DIR_CACHE / "perfiles"
+RUTA_ACTUALIZACION = '/_dash-update-component'
+
+BUCKETS_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_FILAS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BUCKETS_BYTES = (256, 1024, 4096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class Histograma:
+    """Histograma acumulativo con etiquetas, como los de ``prometheus_client``."""
+
+    def __init__(self, nombre, ayuda, etiquetas, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}  # valores de etiquetas -> [conteos por bucket, suma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *etiquetas):
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exposicion(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = sorted((etiquetas, (list(c), s, n)) for etiquetas, (c, s, n) in self._series.items())
+        for valores, (conteos, suma, total) in series:
+            base = ','.join(f'{e}="{_escapar(v)}"' for e, v in zip(self.etiquetas, valores))
+            separador = ',' if base else ''
+            for limite, conteo in zip(self.buckets, conteos):
+                lineas.append(f'{self.nombre}_bucket{{{base}{separador}le="{limite}"}} {conteo}')
+            lineas.append(f'{self.nombre}_bucket{{{base}{separador}le="+Inf"}} {total}')
+            lineas.append(f'{self.nombre}_sum{{{base}}} {suma}')
+            lineas.append(f'{self.nombre}_count{{{base}}} {total}')
+        return '\n'.join(lineas)
+
+
+DURACION_CALLBACK = Histograma('dash_callback_duracion_segundos', 'Duración de cada callback de Dash',
+                               ['callback'], BUCKETS_SEGUNDOS)
+DURACION_FASE = Histograma('dash_fase_duracion_segundos', 'Duración de cada fase de un callback',
+                           ['callback', 'fase'], BUCKETS_SEGUNDOS)
+FILAS = Histograma('dash_callback_filas', 'Filas de los resultados agregados de un callback',
+                   ['callback'], BUCKETS_FILAS)
+BYTES_RESPUESTA = Histograma('dash_respuesta_bytes', 'Tamaño de la respuesta JSON de un callback',
+                             ['callback'], BUCKETS_BYTES)
+HISTOGRAMAS = [DURACION_CALLBACK, DURACION_FASE, FILAS, BYTES_RESPUESTA]
+
+_estado = threading.local()
+
+
+def _activo():
+    return getattr(_estado, 'activo', False)
+
+
+class fase:
+    """Mide un tramo del callback en curso: ``with fase('filtrado'): ...``."""
+
+    __slots__ = ('nombre', 'inicio')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter() if _activo() else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.inicio is not None and _activo():
+            fases = _estado.fases
+            fases[self.nombre] = fases.get(self.nombre, 0.0) + time.perf_counter() - self.inicio
+        return False
+
+
+def registrar_filas(filas):
+    if _activo():
+        _estado.filas += int(filas)
+
+
+def instrumentar(nombre):
+    """Decorador de callbacks: duración total, fases y filas de cada llamada."""
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            _estado.callback, _estado.fases, _estado.filas, _estado.activo = nombre, {}, 0, True
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                _estado.activo = False
+                _estado.duracion = time.perf_counter() - inicio
+                DURACION_CALLBACK.observar(_estado.duracion, nombre)
+                for nombre_fase, segundos in _estado.fases.items():
+                    DURACION_FASE.observar(segundos, nombre, nombre_fase)
+                if _estado.filas:
+                    FILAS.observar(_estado.filas, nombre)
+        return envoltura
+    return decorador
+
+
+def exposicion():
+    """Todas las métricas en formato de texto de Prometheus."""
+    return '\n'.join(h.exposicion() for h in HISTOGRAMAS) + '\n'
+
+
+class Arranque:
+    """Cronómetro de arranque: ``marcar(etapa)`` asigna a la etapa lo transcurrido desde la marca anterior."""
+
+    def __init__(self, inicio=None):
+        self.inicio = self._ultima = time.perf_counter() if inicio is None else inicio
+        self.etapas = {}
+
+    def marcar(self, etapa):
+        ahora = time.perf_counter()
+        self.etapas[etapa] = self.etapas.get(etapa, 0.0) + ahora - self._ultima
+        self._ultima = ahora
+
+    def total(self):
+        return self._ultima - self.inicio
+
+    def resumen(self):
+        etapas = ' · '.join(f"{etapa} {segundos:.3f} s" for etapa, segundos in self.etapas.items())
+        return f"Arranque en {self.total():.3f} s: {etapas}"
+
+    def exposicion(self, nombre='dash_arranque_segundos'):
+        lineas = [f"# HELP {nombre} Duración de cada etapa del arranque del proceso", f"# TYPE {nombre} gauge"]
+        lineas += [f'{nombre}{{etapa="{_escapar(etapa)}"}} {segundos}' for etapa, segundos in self.etapas.items()]
+        return '\n'.join(lineas)
+
+
+class MuestreadorPila:
+    """Muestrea cada ``intervalo`` segundos la pila de un hilo (pilas "collapsed" con su conteo)."""
+
+    def __init__(self, id_hilo, intervalo=0.001):
+        self.id_hilo = id_hilo
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            marco = sys._current_frames().get(self.id_hilo)
+            pila = []
+            while marco is not None:
+                modulo = marco.f_globals.get('__name__') or Path(marco.f_code.co_filename).stem
+                pila.append(f"{modulo}:{marco.f_code.co_name}")
+                marco = marco.f_back
+            if pila:
+                self.pilas[';'.join(reversed(pila))] += 1
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._parar.set()
+        self._hilo.join()
+        return self.pilas
+
+
+def _guardar_pilas(pilas, callback, dir_perfiles):
+    Path(dir_perfiles).mkdir(parents=True, exist_ok=True)
+    with open(Path(dir_perfiles) / "dash.folded", 'a', encoding='utf-8') as f:
+        for pila, conteo in pilas.items():
+            f.write(f"{callback};{pila} {conteo}\n")
+
+
+def instalar(servidor, ruta_metricas='/metrics', muestreo=None, dir_perfiles=None, arranque=None):
+    """Engancha el servidor Flask de una app Dash y publica ``ruta_metricas``."""
+    from flask import Response, g, request
+
+    muestreo = float(os.environ.get('PERFILADO_MUESTREO', 0) if muestreo is None else muestreo)
+    dir_perfiles = dir_perfiles or DIR_PERFILES
+
+    @servidor.before_request
+    def _inicio_peticion():
+        if request.path.endswith(RUTA_ACTUALIZACION):
+            _estado.callback = None
+            g.inicio_callback = time.perf_counter()
+            if muestreo and random.random() < muestreo:
+                g.muestreador = MuestreadorPila(threading.get_ident()).iniciar()
+
+    @servidor.after_request
+    def _fin_peticion(respuesta):
+        inicio = g.pop('inicio_callback', None)
+        muestreador = g.pop('muestreador', None)
+        callback = getattr(_estado, 'callback', None)
+        pilas = muestreador.detener() if muestreador is not None else None
+        if inicio is None or callback is None:
+            return respuesta
+        total = time.perf_counter() - inicio
+        # Lo que no es el callback: despacho de Dash y serialización JSON de la respuesta
+        DURACION_FASE.observar(max(total - _estado.duracion, 0.0), callback, 'serializacion')
+        BYTES_RESPUESTA.observar(respuesta.calculate_content_length() or 0, callback)
+        if pilas:
+            _guardar_pilas(pilas, callback, dir_perfiles)
+        _estado.callback = None
+        return respuesta
+
+    @servidor.route(ruta_metricas)
+    def _metricas():
+        texto = exposicion() + (arranque.exposicion() + '\n' if arranque is not None else '')
+        return Response(texto, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    return servidor
@@ -0,0 +1,73 @@
+"""Mapa de ventas: puntos agregados por ubicación y su render HTML con folium.
+
+Las funciones son puras (puntos -> HTML) para que los dashboards puedan cachear el
+mapa por los totales agregados y reconstruirlo solo cuando cambian.
+"""
+import csv
+from collections import defaultdict
+
+from comun.datos import RAIZ_PROYECTO
+
+# Coordenadas de las ciudades de Myanmar
+COORDENADAS_CIUDADES = {
+    'Yangon': (16.8409, 96.1735),
+    'Naypyitaw': (19.7633, 96.0785),
+    'Mandalay': (21.9588, 96.0891),
+}
+CENTRO_MAPA = (19.7500, 96.0800)  # Centrado en Myanmar
+
+# Coordenadas propias de cada sucursal (opcional): Sucursal,Latitud,Longitud
+RUTA_SUCURSALES = RAIZ_PROYECTO / "data" / "sucursales.csv"
+
+MODOS = {
+    'ciudades': 'Marcadores por ciudad',
+    'clusters': 'Sucursales agrupadas (clusters)',
+    'calor': 'Mapa de calor por sucursal',
+}
+
+
+def cargar_coordenadas_sucursales(ruta=RUTA_SUCURSALES):
+    try:
+        with open(ruta, encoding='utf-8', newline='') as f:
+            return {fila['Sucursal']: (float(fila['Latitud']), float(fila['Longitud'])) for fila in csv.DictReader(f)}
+    except OSError:
+        return {}
+
+
+def puntos_ventas(totales, coordenadas_sucursales=None, por_sucursal=True):
+    """Puntos ``(lat, lon, etiqueta, total)`` a partir de los totales por (ciudad, sucursal).
+
+    Una sucursal sin coordenadas propias se sitúa en su ciudad; con ``por_sucursal=False``
+    se suman por ciudad. Los totales se redondean a céntimos para que el resultado sirva
+    de clave de caché estable. Las ubicaciones desconocidas se omiten.
+    """
+    coordenadas_sucursales = coordenadas_sucursales or {}
+    agregados = defaultdict(float)
+    for (ciudad, sucursal), total in totales.items():
+        if por_sucursal and sucursal in coordenadas_sucursales:
+            agregados[(coordenadas_sucursales[sucursal], f"{sucursal} ({ciudad})")] += total
+        elif ciudad in COORDENADAS_CIUDADES:
+            etiqueta = f"{sucursal} ({ciudad})" if por_sucursal else ciudad
+            agregados[(COORDENADAS_CIUDADES[ciudad], etiqueta)] += total
+    return tuple(sorted((lat, lon, etiqueta, round(total, 2))
+                        for ((lat, lon), etiqueta), total in agregados.items()))
+
+
+def mapa_html(puntos, modo='ciudades'):
+    """HTML completo del mapa para ``puntos``: marcadores, clusters o mapa de calor."""
+    import folium
+    from folium.plugins import HeatMap, MarkerCluster
+
+    m = folium.Map(location=list(CENTRO_MAPA), zoom_start=6)
+    if modo == 'calor':
+        maximo = max((total for *_, total in puntos), default=0) or 1
+        HeatMap([[lat, lon, total / maximo] for lat, lon, _, total in puntos], radius=25).add_to(m)
+    else:
+        destino = MarkerCluster().add_to(m) if modo == 'clusters' else m
+        for lat, lon, etiqueta, total in puntos:
+            folium.Marker(
+                location=[lat, lon],
+                popup=f"{etiqueta}: ${total:,.2f}",
+                icon=folium.Icon(color='red', icon='dollar-sign', prefix='fa')
+            ).add_to(destino)
+    return m.get_root().render()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# Decimales significativos de cada columna numérica (los del CSV original). Se redondea
+# y se escribe la representación más corta, igual que str(valor) sobre el dato leído.
+DECIMALES = {
+    'Precio Unitario': 2,
+    'Impuesto 5%': 4,
+    'Total': 4,
+    'Costo de Bienes Vendidos': 2,
+    'Porcentaje de Margen Bruto': 9,
+    'Ingreso Bruto': 4,
+    'Calificación de Estratificación del Cliente': 1,
+}
+
+FORMATO_FECHA_HORA = '%Y-%m-%d %H:%M:%S'  # El mismo que str(pd.Timestamp)
+
+
+def escapar_xml(textos):
+    # Solo se recorre lo que realmente contiene caracteres especiales
+    return [t.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            if ('&' in t or '<' in t or '>' in t) else t
+            for t in textos]
+
+
+def _por_valores_unicos(serie, formatear):
+    # Formatea cada valor distinto una sola vez y lo reparte con los códigos
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    return np.asarray(formatear(unicos), dtype=object)[codigos].tolist()
+
+
+def columna_a_texto(serie, decimales=None, escapar=True):
+    """Convierte una columna completa a una lista de textos listos para XML."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = [str(c) for c in serie.cat.categories]
+        if escapar:
+            categorias = escapar_xml(categorias)
+        return np.asarray(categorias + ['nan'], dtype=object)[serie.cat.codes.to_numpy()].tolist()
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return _por_valores_unicos(serie, lambda u: pd.DatetimeIndex(u).strftime(FORMATO_FECHA_HORA))
+    if pd.api.types.is_float_dtype(serie):
+        valores = serie.to_numpy(dtype='float64')
+        if decimales is not None:
+            valores = np.round(valores, decimales)
+        return valores.astype(str).tolist()
+    if pd.api.types.is_integer_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        return serie.to_numpy().astype(str).tolist()
+    textos = serie.astype(str).tolist()
+    return escapar_xml(textos) if escapar else textos
+
+
+def columnas_a_texto(df, columnas=None, escapar=True):
+    """Textos de cada columna, calculados una vez por columna y no por celda."""
+    columnas = list(df.columns) if columnas is None else columnas
+    return [columna_a_texto(df[col], DECIMALES.get(col), escapar) for col in columnas]
+
+
+def ensamblar(plantilla, columnas):
+    """Une las columnas de texto fila a fila con una plantilla ``str.format`` precompilada."""
+    return [plantilla.format(*fila) for fila in zip(*columnas)]
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Puntos máximos que se envían al navegador por serie temporal
+MAX_PUNTOS = 2000
+
+
+def _a_numerico(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype('int64').astype('float64')
+    return x.astype('float64')
+
+
+def lttb(x, y, n):
+    """Índices de los ``n`` puntos elegidos por Largest-Triangle-Three-Buckets.
+
+    Conserva la forma de la serie (picos incluidos) mejor que un muestreo uniforme.
+    """
+    total = len(y)
+    if n >= total or n < 3:
+        return np.arange(total)
+    xs, ys = _a_numerico(x), np.asarray(y, dtype='float64')
+    bordes = np.linspace(1, total - 1, n - 1).astype(int)  # n-2 cubos entre el primer y el último punto
+    indices = np.empty(n, dtype=int)
+    indices[0], indices[-1] = 0, total - 1
+    anterior = 0
+    for i in range(n - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        # Punto medio del cubo siguiente (o el último punto)
+        sig_fin = bordes[i + 2] if i + 2 < len(bordes) else total
+        cx, cy = xs[fin:sig_fin].mean(), ys[fin:sig_fin].mean()
+        ax, ay = xs[anterior], ys[anterior]
+        areas = np.abs((ax - cx) * (ys[inicio:fin] - ay) - (ax - xs[inicio:fin]) * (cy - ay))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def minmax(y, n):
+    """Índices del mínimo y el máximo de cada cubo (como mucho ``n`` puntos)."""
+    total = len(y)
+    if n >= total or n < 2:
+        return np.arange(total)
+    ys = np.asarray(y, dtype='float64')
+    bordes = np.linspace(0, total, n // 2 + 1).astype(int)
+    indices = []
+    for inicio, fin in zip(bordes[:-1], bordes[1:]):
+        if fin > inicio:
+            tramo = ys[inicio:fin]
+            indices.extend(sorted({inicio + int(np.argmin(tramo)), inicio + int(np.argmax(tramo))}))
+    return np.asarray(indices, dtype=int)
+
+
+def reducir_serie(serie, max_puntos=MAX_PUNTOS, metodo='lttb', desde=None, hasta=None):
+    """Recorta ``serie`` (índice ordenado) al rango visible y la reduce a ``max_puntos``."""
+    if desde is not None or hasta is not None:
+        serie = serie.loc[desde:hasta]
+    if len(serie) <= max_puntos:
+        return serie
+    if metodo == 'minmax':
+        indices = minmax(serie.values, max_puntos)
+    else:
+        indices = lttb(serie.index.values, serie.values, max_puntos)
+    return serie.iloc[indices]
+
+
+def figura_serie_temporal(serie, titulo, max_puntos=MAX_PUNTOS, webgl=True, metodo='lttb'):
+    """Gráfico de líneas con número de puntos acotado y, opcionalmente, trazas WebGL."""
+    import plotly.express as px  # Solo al dibujar: la reducción de series no necesita plotly
+
+    reducida = reducir_serie(serie, max_puntos, metodo)
+    datos = pd.DataFrame({serie.index.name or 'x': reducida.index, serie.name or 'y': reducida.values})
+    x, y = datos.columns
+    return px.line(datos, x=x, y=y, title=titulo, render_mode='webgl' if webgl else 'svg')
@@ -1,24 +1,211 @@
 from lxml import etree
-import weasyprint
+import argparse
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
 
-# Cargar el archivo XML y la hoja de estilo XSLT
-xml_path = 'factura_750-67-8428.xml'
-xslt_path = 'factura_style.xslt'
+# Hoja de estilo por defecto: la que referencian las facturas de generate-xml-invoice.py
+XSLT_POR_DEFECTO = 'factura_style.xsl'
 
-with open(xml_path, 'rb') as xml_file:
-    xml_tree = etree.parse(xml_file)
+# La transformación se compila una sola vez por proceso
+_transform = None
 
-with open(xslt_path, 'rb') as xslt_file:
-    xslt_tree = etree.parse(xslt_file)
-    transform = etree.XSLT(xslt_tree)
 
-# Aplicar la transformación XSLT al XML
-html_tree = transform(xml_tree)
+def compilar_xslt(xslt_path):
+    with open(xslt_path, 'rb') as xslt_file:
+        return etree.XSLT(etree.parse(xslt_file))
 
-# Convertir el HTML resultante a PDF
-html_string = etree.tostring(html_tree, pretty_print=True).decode()
 
-pdf_file = 'factura_750-67-8428.pdf'
-weasyprint.HTML(string=html_string).write_pdf(pdf_file)
+def _iniciar_worker(xslt_path):
+    global _transform
+    _transform = compilar_xslt(xslt_path)
 
-print(f'PDF generado: {pdf_file}')
+
+def _parsear(origen):
+    # origen: ruta en disco, (ruta del .zip, miembro) o bytes leídos de un .tar
+    if isinstance(origen, bytes):
+        return etree.ElementTree(etree.fromstring(origen))
+    if isinstance(origen, tuple):
+        ruta_zip, miembro = origen
+        with _abrir_zip(ruta_zip).open(miembro) as f:
+            return etree.parse(f)
+    return etree.parse(origen)
+
+
+# Cada worker abre una vez cada .zip y lee de él solo los miembros de sus tareas
+_zips = {}
+
+
+def _abrir_zip(ruta_zip):
+    if ruta_zip not in _zips:
+        _zips[ruta_zip] = zipfile.ZipFile(ruta_zip)
+    return _zips[ruta_zip]
+
+
+def _documento(origen, transform):
+    import weasyprint  # Solo al maquetar: leer y agrupar facturas no necesita Pango
+
+    # Aplicar la transformación XSLT al XML y maquetar el HTML resultante
+    html_string = str(transform(_parsear(origen)))
+    return weasyprint.HTML(string=html_string).render()
+
+
+def convertir(xml_path, pdf_path, transform):
+    _documento(xml_path, transform).write_pdf(pdf_path)
+    return pdf_path
+
+
+def _convertir_lote(lote, directorio):
+    # Un PDF por factura
+    generados = []
+    for nombre, origen in lote:
+        pdf_path = os.path.join(directorio, os.path.splitext(os.path.basename(nombre))[0] + '.pdf')
+        generados.append(convertir(origen, pdf_path, _transform))
+    return generados
+
+
+def _convertir_grupo(facturas, pdf_path):
+    # Todas las facturas del grupo como páginas de un único PDF
+    documentos = [_documento(origen, _transform) for _, origen in sorted(facturas)]
+    paginas = [pagina for doc in documentos for pagina in doc.pages]
+    documentos[0].copy(paginas).write_pdf(pdf_path)
+    return [pdf_path]
+
+
+def leer_entradas(entrada):
+    """(nombre, origen) de cada factura XML de un directorio, un .zip o un .tar(.gz), de una en una.
+
+    ``origen`` es una ruta en disco o ``(ruta del .zip, miembro)``, que lee el propio worker;
+    un .tar solo se puede recorrer en secuencia, así que de él se entregan los bytes de cada
+    miembro según se leen (sin cargar el archivo entero).
+    """
+    if os.path.isdir(entrada):
+        for nombre in sorted(os.listdir(entrada)):
+            if nombre.endswith('.xml'):
+                yield nombre, os.path.join(entrada, nombre)
+    elif zipfile.is_zipfile(entrada):
+        with zipfile.ZipFile(entrada) as zf:
+            nombres = sorted(nombre for nombre in zf.namelist() if nombre.endswith('.xml'))
+        for nombre in nombres:
+            yield nombre, (entrada, nombre)
+    elif tarfile.is_tarfile(entrada):
+        with tarfile.open(entrada, mode='r|*') as tf:
+            for miembro in tf:
+                if miembro.isfile() and miembro.name.endswith('.xml'):
+                    yield miembro.name, tf.extractfile(miembro).read()
+    else:
+        yield entrada, entrada
+
+
+def _volcar_tar(entrada, directorio):
+    # Para agrupar hay que releer cada factura: los miembros de un .tar se copian a disco
+    # (de uno en uno) y los workers los leen de ahí
+    with tarfile.open(entrada, mode='r|*') as tf:
+        for i, miembro in enumerate(tf):
+            if miembro.isfile() and miembro.name.endswith('.xml'):
+                destino = os.path.join(directorio, f'{i:08d}.xml')
+                with tf.extractfile(miembro) as origen, open(destino, 'wb') as f:
+                    shutil.copyfileobj(origen, f)
+                yield miembro.name, destino
+
+
+def _en_lotes(elementos, tam_lote):
+    lote = []
+    for elemento in elementos:
+        lote.append(elemento)
+        if len(lote) == tam_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _resultados_acotados(pool, funcion, tareas, max_pendientes):
+    """Envía ``tareas`` (tuplas de argumentos) con como mucho ``max_pendientes`` en vuelo
+    y devuelve los resultados según terminan: solo esas tareas están en memoria a la vez."""
+    pendientes = set()
+    for argumentos in tareas:
+        if len(pendientes) >= max_pendientes:
+            hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                yield futuro.result()
+        pendientes.add(pool.submit(funcion, *argumentos))
+    for futuro in as_completed(pendientes):
+        yield futuro.result()
+
+
+def clave_sucursal_dia(origen):
+    raiz = _parsear(origen).getroot()
+    sucursal = raiz.findtext('DatosSucursal/Nombre', default='SinSucursal')
+    fecha = raiz.findtext('Encabezado/Fecha', default='SinFecha')[:10]
+    return sucursal, fecha
+
+
+def _claves_lote(lote):
+    # Las claves se calculan en los workers; al proceso principal solo vuelven nombres y rutas
+    return [(clave_sucursal_dia(origen), nombre, origen) for nombre, origen in lote]
+
+
+def convertir_lote(entrada, directorio='pdf', xslt_path=XSLT_POR_DEFECTO, procesos=None,
+                   unir=False, tam_lote=20):
+    """Convierte en paralelo todas las facturas XML de ``entrada`` a PDF.
+
+    Con ``unir=True`` se escribe un PDF de varias páginas por sucursal y día. Las facturas
+    se leen y se envían a los workers por lotes, con un número acotado de lotes en vuelo,
+    así que la memoria no crece con el tamaño del archivo de entrada.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.perf_counter()
+    max_pendientes = 2 * (procesos or os.cpu_count() or 1)
+    total = 0
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_worker,
+                             initargs=(xslt_path,)) as pool, tempfile.TemporaryDirectory() as volcado:
+        pdfs = []
+        if unir:
+            facturas = (_volcar_tar(entrada, volcado) if not os.path.isdir(entrada) and tarfile.is_tarfile(entrada)
+                        else leer_entradas(entrada))
+            grupos = defaultdict(list)
+            lotes = ((lote,) for lote in _en_lotes(facturas, tam_lote))
+            for claves in _resultados_acotados(pool, _claves_lote, lotes, max_pendientes):
+                for clave, nombre, origen in claves:
+                    grupos[clave].append((nombre, origen))
+                    total += 1
+            tareas = ((grupo, os.path.join(directorio, f'facturas_{sucursal}_{fecha}.pdf'))
+                      for (sucursal, fecha), grupo in sorted(grupos.items()))
+        else:
+            tareas = ((lote, directorio) for lote in _en_lotes(leer_entradas(entrada), tam_lote))
+        funcion = _convertir_grupo if unir else _convertir_lote
+        for generados in _resultados_acotados(pool, funcion, tareas, max_pendientes):
+            pdfs.extend(generados)
+        if not unir:
+            total = len(pdfs)
+
+    transcurrido = time.perf_counter() - inicio
+    print(f'{total:,} facturas -> {len(pdfs):,} PDF en {transcurrido:.1f}s '
+          f'({total / max(transcurrido, 1e-9):,.1f} facturas/s) en {directorio}/')
+    return pdfs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convierte facturas XML a PDF con XSLT + WeasyPrint')
+    parser.add_argument('entrada', nargs='?', default='factura_750-67-8428.xml',
+                        help='Factura XML, directorio, .zip o .tar(.gz) con facturas')
+    parser.add_argument('--salida', default='pdf', help='Directorio de salida')
+    parser.add_argument('--xslt', default=XSLT_POR_DEFECTO)
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos del pool (por defecto, todos los núcleos)')
+    parser.add_argument('--unir', action='store_true', help='Un PDF de varias páginas por sucursal y día')
+    args = parser.parse_args()
+
+    if os.path.isfile(args.entrada) and args.entrada.endswith('.xml'):
+        # Conversión individual, como antes
+        pdf_file = os.path.splitext(args.entrada)[0] + '.pdf'
+        convertir(args.entrada, pdf_file, compilar_xslt(args.xslt))
+        print(f'PDF generado: {pdf_file}')
+    else:
+        convertir_lote(args.entrada, args.salida, args.xslt, args.procesos, args.unir)
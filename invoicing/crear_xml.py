@@ -1,32 +1,15 @@
-import pandas as pd
-import xml.etree.ElementTree as ET
+import argparse
+import gzip
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from comun.datos import COLUMNAS_INTERNAS, cargar_ventas, leer_por_bloques
+from comun.serializacion import columnas_a_texto, ensamblar
 
 def load_data():
-    df = pd.read_csv("supermarket_Sales.csv")
-    columnas_traducidas = {
-        'Invoice ID': 'ID de Factura',
-        'Branch': 'Sucursal',
-        'City': 'Ciudad',
-        'Customer type': 'Tipo de Cliente',
-        'Gender': 'Género',
-        'Product line': 'Línea de Producto',
-        'Unit price': 'Precio Unitario',
-        'Quantity': 'Cantidad',
-        'Tax 5%': 'Impuesto 5%',
-        'Total': 'Total',
-        'Date': 'Fecha',
-        'Time': 'Hora',
-        'Payment': 'Método de Pago',
-        'Cost of goods sold': 'Costo de Bienes Vendidos',
-        'Gross margin percentage': 'Porcentaje de Margen Bruto',
-        'Gross income': 'Ingreso Bruto',
-        'Customer stratification rating': 'Calificación de Estratificación del Cliente'
-    }
-    df = df.rename(columns=columnas_traducidas)
-    df['Fecha'] = pd.to_datetime(df['Fecha'])
-    return df
-
-df = load_data()
+    return cargar_ventas()
 
 def clean_column_name(name):
     # Reemplazar espacios por guiones bajos y eliminar caracteres no válidos
@@ -36,27 +19,62 @@ def clean_column_name(name):
     name = name.replace('ñ', 'n')  # Reemplaza ñ por n
     return name
 
-def crear_xml(df, stylesheet_path="factura_style.xslt"):
-    # Crear el elemento raíz y agregar la declaración xml-stylesheet
-    root = ET.Element("Facturas")
-    xml_declaration = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    stylesheet_declaration = f'<?xml-stylesheet type="text/xsl" href="{stylesheet_path}"?>\n'
-
-    for _, row in df.iterrows():
-        factura = ET.SubElement(root, "Factura")
-        
-        for field in df.columns:
-            clean_name = clean_column_name(field)
-            elemento = ET.SubElement(factura, clean_name)
-            elemento.text = str(row[field])
-    
-    # Convertir el árbol a un string de XML
-    xml_str = xml_declaration + stylesheet_declaration + ET.tostring(root, encoding='unicode')
-    
-    # Guardar el XML en un archivo
-    with open("facturas.xml", "w", encoding="utf-8") as f:
-        f.write(xml_str)
-
-    print("Archivo XML con stylesheet generado: facturas.xml")
-
-crear_xml(df)
+def plantilla_factura(columnas):
+    # Nombres de etiqueta limpiados una sola vez; cada fila solo rellena los huecos
+    etiquetas = [clean_column_name(col) for col in columnas]
+    return "<Factura>" + "".join(f"<{e}>{{}}</{e}>" for e in etiquetas) + "</Factura>"
+
+def escribir_facturas(out, bloques, stylesheet_path="factura_style.xslt"):
+    # Escritor incremental: cada bloque se serializa por columnas y se descarta al momento
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write(f'<?xml-stylesheet type="text/xsl" href="{stylesheet_path}"?>\n')
+    out.write("<Facturas>")
+    total = 0
+    plantilla = None
+    for bloque in bloques:
+        # Mismos elementos que el CSV original: sin las columnas internas del cargador
+        bloque = bloque.drop(columns=COLUMNAS_INTERNAS, errors='ignore')
+        if plantilla is None:
+            plantilla = plantilla_factura(bloque.columns)
+        out.write("".join(ensamblar(plantilla, columnas_a_texto(bloque))))
+        total += len(bloque)
+    out.write("</Facturas>")
+    return total
+
+def crear_xml(df, stylesheet_path="factura_style.xslt", salida="facturas.xml"):
+    # Serialización por columnas del DataFrame completo (sin iterrows ni str() por celda)
+    with open(salida, "w", encoding="utf-8") as f:
+        escribir_facturas(f, [df], stylesheet_path)
+
+    print(f"Archivo XML con stylesheet generado: {salida}")
+
+def abrir_salida(ruta, comprimir=False):
+    # Texto UTF-8, opcionalmente comprimido con gzip
+    if comprimir:
+        return gzip.open(ruta, "wt", encoding="utf-8", compresslevel=6)
+    return open(ruta, "w", encoding="utf-8")
+
+def crear_xml_streaming(ruta_csv=None, salida="facturas.xml", stylesheet_path="factura_style.xslt",
+                        tam_bloque=50_000, comprimir=False):
+    # Lee el CSV por bloques: la memoria pico depende de tam_bloque, no del número de filas
+    if comprimir and not str(salida).endswith(".gz"):
+        salida = f"{salida}.gz"
+    with abrir_salida(salida, comprimir) as out:
+        total = escribir_facturas(out, leer_por_bloques(ruta_csv, tam_bloque), stylesheet_path)
+    print(f"Archivo XML con stylesheet generado: {salida} ({total:,} facturas)")
+    return salida
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta las ventas a un XML de facturas")
+    parser.add_argument("--csv", help="CSV de ventas (por defecto data/supermarket_sales.csv)")
+    parser.add_argument("--salida", default="facturas.xml")
+    parser.add_argument("--streaming", action="store_true", help="Leer y escribir por bloques (memoria acotada)")
+    parser.add_argument("--bloque", type=int, default=50_000, help="Filas por bloque en modo streaming")
+    parser.add_argument("--gzip", action="store_true", help="Comprimir la salida (.xml.gz)")
+    args = parser.parse_args()
+
+    if args.streaming or args.gzip:
+        crear_xml_streaming(args.csv, args.salida, tam_bloque=args.bloque, comprimir=args.gzip)
+    else:
+        df = cargar_ventas(args.csv) if args.csv else load_data()
+        crear_xml(df, salida=args.salida)
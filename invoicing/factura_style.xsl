@@ -69,7 +69,10 @@
             <div class="barcode" style="margin-left: auto;">
               <img style="width: 200px; height: auto;">
                 <xsl:attribute name="src">
-                  <xsl:text>data:image/png;base64,</xsl:text>
+                  <!-- Data URI completa (SVG o PNG); las facturas antiguas traen solo el PNG en base64 -->
+                  <xsl:if test="not(starts-with(Factura/Encabezado/CodigoBarras, 'data:'))">
+                    <xsl:text>data:image/png;base64,</xsl:text>
+                  </xsl:if>
                   <xsl:value-of select="Factura/Encabezado/CodigoBarras"/>
                 </xsl:attribute>
                 <xsl:attribute name="alt">Código de Barras</xsl:attribute>
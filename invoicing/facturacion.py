@@ -1,114 +1,67 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-import jinja2
+import os
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlencode
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from comun.datos import RUTA_CSV
+from comun.facturas import IndiceFacturas, cargar_datos, exportar_zip, generar_html_factura
 
 # Configuración de la página
 st.set_page_config(page_title="Sistema de Facturación", layout="wide")
 
-def cargar_datos():
-    # Carga el CSV
-    df = pd.read_csv('supermarket_sales.csv')
-    # Renombrar columnas para mantener consistencia
-    columnas = {
-        'Invoice ID': 'Invoice_ID',
-        'Branch': 'Branch',
-        'City': 'City',
-        'Customer type': 'Customer_type',
-        'Gender': 'Gender',
-        'Product line': 'Product_line',
-        'Unit price': 'Unit_price',
-        'Quantity': 'Quantity',
-        'Tax 5%': 'Tax_5',
-        'Total': 'Total',
-        'Date': 'Date',
-        'Time': 'Time',
-        'Payment': 'Payment',
-        'Cost of goods sold': 'cogs',
-        'Gross margin percentage': 'gross_margin_percentage',
-        'Gross income': 'gross_income',
-        'Rating': 'Rating'
-    }
-    df = df.rename(columns=columnas)
-    return df
-
-def generar_html_factura(datos_factura):
-    template_string = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 0; padding: 20px; }
-            .factura { max-width: 800px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; }
-            .cabecera { background: #4a90e2; color: white; padding: 20px; text-align: center; }
-            .info-tienda { text-align: center; margin: 20px 0; }
-            .detalles { margin: 20px 0; }
-            .productos { width: 100%; border-collapse: collapse; margin: 20px 0; }
-            .productos th { background: #4a90e2; color: white; padding: 10px; }
-            .productos td { padding: 10px; border-bottom: 1px solid #ddd; }
-            .total { text-align: right; margin-top: 20px; }
-        </style>
-    </head>
-    <body>
-        <div class="factura">
-            <div class="cabecera">
-                <h1>FACTURA</h1>
-                <div>Nº: {{ datos['Invoice_ID'] }}</div>
-            </div>
-
-            <div class="info-tienda">
-                <h2>Sucursal {{ datos['Branch'] }} - {{ datos['City'] }}</h2>
-                <p>Fecha: {{ datos['Date'] }}</p>
-                <p>Hora: {{ datos['Time'] }}</p>
-            </div>
+# Servidor de ZIP en streaming (invoicing/servidor_facturas.py), p. ej. http://localhost:8502
+URL_EXPORTACION = os.environ.get('URL_EXPORTACION_FACTURAS')
+# Sin ese servidor, st.download_button necesita el ZIP entero en memoria: se limita su tamaño
+MAX_BYTES_DESCARGA = 200 * 2**20
 
-            <div class="detalles">
-                <h3>Información del Cliente:</h3>
-                <p>Tipo de Cliente: {{ datos['Customer_type'] }}</p>
-                <p>Género: {{ datos['Gender'] }}</p>
-                <p>Rating: {{ datos['Rating'] }}</p>
-            </div>
+# Índice cacheado entre reruns y sesiones; se reconstruye solo si cambia el CSV
+@st.cache_resource(max_entries=1)
+def cargar_indice(version_csv):
+    return IndiceFacturas(cargar_datos())
 
-            <table class="productos">
-                <tr>
-                    <th>Producto</th>
-                    <th>Cantidad</th>
-                    <th>Precio Unitario</th>
-                    <th>Total</th>
-                </tr>
-                <tr>
-                    <td>{{ datos['Product_line'] }}</td>
-                    <td>{{ datos['Quantity'] }}</td>
-                    <td>${{ "%.2f"|format(datos['Unit_price']) }}</td>
-                    <td>${{ "%.2f"|format(datos['Total']) }}</td>
-                </tr>
-            </table>
-
-            <div class="total">
-                <p>Subtotal: ${{ "%.2f"|format(datos['Total'] - datos['Tax_5']) }}</p>
-                <p>Impuesto (5%): ${{ "%.2f"|format(datos['Tax_5']) }}</p>
-                <p><strong>TOTAL: ${{ "%.2f"|format(datos['Total']) }}</strong></p>
-            </div>
+def exportacion_masiva(indice, sucursal, fecha):
+    st.subheader("Exportación masiva")
+    alcance = st.radio("Facturas a exportar", ["Sucursal y fecha seleccionadas", "Rango de fechas"], horizontal=True)
+    if alcance == "Rango de fechas":
+        rango = st.date_input("Rango de fechas", (indice.fechas[0], indice.fechas[-1]),
+                              min_value=indice.fechas[0], max_value=indice.fechas[-1])
+        if len(rango) != 2:
+            return
+        desde, hasta = rango
+    else:
+        desde = hasta = fecha
+    facturas = indice.facturas_rango(sucursal, desde, hasta)
+    nombre = f"facturas_{sucursal}_{desde}_{hasta}.zip"
 
-            <div class="pie" style="text-align: center; margin-top: 20px;">
-                <p>Método de pago: {{ datos['Payment'] }}</p>
-                <p>Margen bruto: {{ "%.2f"|format(datos['gross_margin_percentage']) }}%</p>
-                <p>Ingreso bruto: ${{ "%.2f"|format(datos['gross_income']) }}</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    template = jinja2.Template(template_string)
-    html_out = template.render(datos=datos_factura)
-    return html_out
+    st.write(f"{len(facturas):,} facturas")
+    if not len(facturas):
+        return
+    if URL_EXPORTACION:
+        # El servidor genera y envía el ZIP por trozos mientras se descarga
+        consulta = urlencode({'sucursal': sucursal, 'desde': desde, 'hasta': hasta})
+        st.link_button("Descargar ZIP", f"{URL_EXPORTACION.rstrip('/')}/facturas.zip?{consulta}")
+    elif st.button("Preparar ZIP"):
+        # El ZIP se escribe por bloques en disco, pero download_button lo lee entero en memoria
+        # antes de enviarlo: solo para exportaciones acotadas (sin URL_EXPORTACION_FACTURAS)
+        with tempfile.TemporaryFile() as archivo:
+            with st.spinner("Generando facturas..."):
+                exportar_zip(facturas, archivo)
+            if archivo.tell() > MAX_BYTES_DESCARGA:
+                st.error(f"El ZIP ocupa {archivo.tell() / 2**20:,.0f} MB (máximo {MAX_BYTES_DESCARGA // 2**20} MB "
+                         "por esta vía). Usa el servidor de exportación (URL_EXPORTACION_FACTURAS) o un rango menor.")
+                return
+            archivo.seek(0)
+            st.download_button(label="Descargar ZIP", data=archivo.read(), file_name=nombre, mime="application/zip")
 
 def main():
     st.title("🧾 Sistema de Facturación")
     
     try:
-        df = cargar_datos()
+        indice = cargar_indice(os.stat(RUTA_CSV).st_mtime_ns)
         st.success("Datos cargados correctamente")
     except Exception as e:
         st.error(f"Error al cargar el archivo CSV: {str(e)}")
@@ -116,16 +69,10 @@ def main():
 
     st.sidebar.header("Filtros")
     
-    sucursales = df['Branch'].unique()
-    sucursal = st.sidebar.selectbox("Seleccionar Sucursal", sucursales)
+    sucursal = st.sidebar.selectbox("Seleccionar Sucursal", indice.sucursales)
+    fecha = st.sidebar.selectbox("Seleccionar Fecha", indice.fechas)
     
-    fechas = pd.to_datetime(df['Date']).dt.date.unique()
-    fecha = st.sidebar.selectbox("Seleccionar Fecha", sorted(fechas))
-    
-    df_filtrado = df[
-        (df['Branch'] == sucursal) & 
-        (pd.to_datetime(df['Date']).dt.date == fecha)
-    ]
+    df_filtrado = indice.facturas(sucursal, fecha)
     
     st.subheader("Facturas Disponibles")
     if len(df_filtrado) == 0:
@@ -140,7 +87,7 @@ def main():
         )
         
         if factura_seleccionada:
-            datos_factura = df_filtrado[df_filtrado['Invoice_ID'] == factura_seleccionada].iloc[0]
+            datos_factura = indice.factura(factura_seleccionada)
             
             col1, col2 = st.columns(2)
             
@@ -168,5 +115,7 @@ def main():
                     mime="text/html"
                 )
 
+    exportacion_masiva(indice, sucursal, fecha)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,50 +1,40 @@
 import pandas as pd
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
-import barcode
-from barcode.writer import SVGWriter, ImageWriter
-from io import BytesIO
-import base64
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from comun.datos import cargar_ventas
+from comun.serializacion import DECIMALES, columna_a_texto, ensamblar
+from comun import codigos_barras
 
 def load_data():
-    df = pd.read_csv("supermarket_Sales.csv")
-    columnas_traducidas = {
-        'Invoice ID': 'ID de Factura',
-        'Branch': 'Sucursal',
-        'City': 'Ciudad',
-        'Customer type': 'Tipo de Cliente',
-        'Gender': 'Género',
-        'Product line': 'Línea de Producto',
-        'Unit price': 'Precio Unitario',
-        'Quantity': 'Cantidad',
-        'Tax 5%': 'Impuesto 5%',
-        'Total': 'Total',
-        'Date': 'Fecha',
-        'Time': 'Hora',
-        'Payment': 'Método de Pago',
-        'Cost of goods sold': 'Costo de Bienes Vendidos',
-        'Gross margin percentage': 'Porcentaje de Margen Bruto',
-        'Gross income': 'Ingreso Bruto',
-        'Customer stratification rating': 'Calificación de Estratificación del Cliente'
-    }
-    df = df.rename(columns=columnas_traducidas)
-    df['Fecha'] = pd.to_datetime(df['Fecha'])
-    return df
-
-def generate_barcode(invoice_id):
-    code128 = barcode.get_barcode_class('code128')
-    buffer = BytesIO()
-    code128(invoice_id, writer=ImageWriter()).write(buffer)
-    
-    # Convert to base64
-    buffer.seek(0)
-    encoded_string = base64.b64encode(buffer.getvalue()).decode()
-    return encoded_string
+    return cargar_ventas()
+
+FORMATO_CODIGO = "svg"  # "svg": trazo vectorial precalculado (µs); "png": rasterizado con Pillow (ms)
+
+def generate_barcode(invoice_id, formato=FORMATO_CODIGO):
+    # Data URI lista para el atributo src de la imagen en la plantilla XSL
+    if formato == "png":
+        return "data:image/png;base64," + codigos_barras.png_base64(invoice_id)
+    return codigos_barras.data_uri(invoice_id)
+
+def generate_barcodes(invoice_ids, formato=FORMATO_CODIGO):
+    if formato == "png":
+        return [generate_barcode(invoice_id, formato) for invoice_id in invoice_ids]
+    return codigos_barras.data_uris(invoice_ids)
 
 class XMLInvoiceTemplate:
     def __init__(self):
         self.root = ET.Element("Factura")
         self.structure = {}
+        self._compiladas = {}
 
     def add_element(self, path, field_name):
         parts = path.split('/')
@@ -66,6 +56,35 @@ class XMLInvoiceTemplate:
         
         return ET.tostring(self.root, encoding='unicode')
 
+    def compile(self, campos_disponibles):
+        # Plantilla str.format equivalente a generate_xml: un hueco por campo con datos,
+        # elementos vacíos para los que no tienen columna. Se calcula una sola vez.
+        campos = []
+
+        def render(element):
+            tag = element.tag
+            children = list(element)
+            if children:
+                return f"<{tag}>" + "".join(render(child) for child in children) + f"</{tag}>"
+            field = element.attrib.get('field')
+            if field in campos_disponibles:
+                campos.append(field)
+                return f"<{tag}>{{}}</{tag}>"
+            return f"<{tag} />"
+
+        return render(self.root), campos
+
+    def generate_xml_batch(self, df, extra=None):
+        # Serialización por columnas: cada campo se formatea una vez para todas las filas
+        extra = extra or {}
+        disponibles = frozenset(df.columns) | frozenset(extra)
+        if disponibles not in self._compiladas:
+            self._compiladas[disponibles] = self.compile(disponibles)
+        plantilla, campos = self._compiladas[disponibles]
+        columnas = [extra[campo] if campo in extra else columna_a_texto(df[campo], DECIMALES.get(campo))
+                    for campo in campos]
+        return ensamblar(plantilla, columnas)
+
 def crear_plantilla_personalizada():
     template = XMLInvoiceTemplate()
     
@@ -95,32 +114,94 @@ def crear_plantilla_personalizada():
     
     return template
 
-def generar_factura_xml(fila):
-    template = crear_plantilla_personalizada()
-    
+# Plantilla compilada una sola vez por proceso (factura individual y workers del modo masivo)
+_plantilla_proceso = None
+
+def plantilla_compilada():
+    global _plantilla_proceso
+    if _plantilla_proceso is None:
+        _plantilla_proceso = crear_plantilla_personalizada()
+    return _plantilla_proceso
+
+def generar_factura_xml(fila, directorio=""):
     # Generar el código de barras
-    barcode_png = generate_barcode(str(fila['ID de Factura']))
+    codigo_barras = generate_barcode(str(fila['ID de Factura']))
     
-    # Añadir el código de barras a los datos
-    datos = fila.to_dict()
-    datos['Codigo de Barras'] = barcode_png
-    
-    # Crear el documento XML
-    xml_factura = template.generate_xml(datos)
+    # La fila como lote de uno: mismo XML que el modo masivo, sin reconstruir la plantilla
+    lote = fila.to_frame().T.infer_objects()
+    xml_factura = plantilla_compilada().generate_xml_batch(lote, extra={'Codigo de Barras': [codigo_barras]})[0]
     
+    nombre_archivo = escribir_factura(fila['ID de Factura'], xml_factura, directorio)
+    print(f"Factura generada: {nombre_archivo}")
+    return nombre_archivo
+
+
+def escribir_factura(invoice_id, xml_factura, directorio=""):
     # Crear el documento XML completo con la declaración XML y la referencia XSL
     xml_completo = f'''<?xml version="1.0" encoding="UTF-8"?>
 <?xml-stylesheet type="text/xsl" href="factura_style.xsl"?>
 {xml_factura}'''
-    
-    nombre_archivo = f"factura_{fila['ID de Factura']}.xml"
+
+    nombre_archivo = os.path.join(directorio, f"factura_{invoice_id}.xml")
     with open(nombre_archivo, "w", encoding="utf-8") as f:
         f.write(xml_completo)
-    
-    print(f"Factura generada: {nombre_archivo}")
+    return nombre_archivo
+
+
+# --- Modo masivo: todas las facturas (o un subconjunto) en un pool de procesos ---
+
+_directorio_worker = ""
+_formato_codigo_worker = FORMATO_CODIGO
+
+
+def _iniciar_worker(directorio, formato_codigo=FORMATO_CODIGO):
+    # La plantilla se construye y compila una sola vez por proceso
+    global _directorio_worker, _formato_codigo_worker
+    plantilla_compilada()
+    _directorio_worker = directorio
+    _formato_codigo_worker = formato_codigo
 
 
-def crear_xsl_basico():
+def _generar_lote(lote):
+    ids = lote['ID de Factura'].astype(str).tolist()
+    codigos = generate_barcodes(ids, _formato_codigo_worker)
+    xmls = plantilla_compilada().generate_xml_batch(lote, extra={'Codigo de Barras': codigos})
+    for invoice_id, xml_factura in zip(ids, xmls):
+        escribir_factura(invoice_id, xml_factura, _directorio_worker)
+    return len(lote)
+
+
+def filtrar_ventas(df, sucursales=None, desde=None, hasta=None):
+    mask = pd.Series(True, index=df.index)
+    if sucursales:
+        mask &= df['Sucursal'].isin(sucursales)
+    if desde:
+        mask &= df['Fecha'] >= pd.Timestamp(desde)
+    if hasta:
+        mask &= df['Fecha'] <= pd.Timestamp(hasta)
+    return df[mask]
+
+
+def generar_facturas_masivo(df, directorio="facturas", procesos=None, tam_lote=500, formato_codigo=FORMATO_CODIGO):
+    """Genera una factura XML por fila de ``df`` repartiendo lotes entre procesos."""
+    os.makedirs(directorio, exist_ok=True)
+    total = len(df)
+    lotes = [df.iloc[i:i + tam_lote] for i in range(0, total, tam_lote)]
+    hechas = 0
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_worker,
+                             initargs=(directorio, formato_codigo)) as pool:
+        for n in (f.result() for f in as_completed(pool.submit(_generar_lote, lote) for lote in lotes)):
+            hechas += n
+            transcurrido = time.perf_counter() - inicio
+            print(f"\r{hechas:,}/{total:,} facturas ({hechas / transcurrido:,.0f} facturas/s)", end="", flush=True)
+    transcurrido = time.perf_counter() - inicio
+    print(f"\nGeneradas {hechas:,} facturas en {transcurrido:.1f}s "
+          f"({hechas / max(transcurrido, 1e-9):,.0f} facturas/s) en {directorio}/")
+    return hechas
+
+
+def crear_xsl_basico(directorio=""):
     xsl_content = """<?xml version="1.0" encoding="UTF-8"?>
 <xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
   <xsl:template match="/">
@@ -192,7 +273,10 @@ def crear_xsl_basico():
             <div class="barcode" style="margin-left: auto;">
               <img style="width: 200px; height: auto;">
                 <xsl:attribute name="src">
-                  <xsl:text>data:image/png;base64,</xsl:text>
+                  <!-- Data URI completa (SVG o PNG); las facturas antiguas traen solo el PNG en base64 -->
+                  <xsl:if test="not(starts-with(Factura/Encabezado/CodigoBarras, 'data:'))">
+                    <xsl:text>data:image/png;base64,</xsl:text>
+                  </xsl:if>
                   <xsl:value-of select="Factura/Encabezado/CodigoBarras"/>
                 </xsl:attribute>
                 <xsl:attribute name="alt">Código de Barras</xsl:attribute>
@@ -297,19 +381,41 @@ def crear_xsl_basico():
   </xsl:template>
 </xsl:stylesheet>
 """
-    with open("factura_style.xsl", "w", encoding="utf-8") as f:
+    # Junto a las facturas: las referencian por ruta relativa (href="factura_style.xsl")
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, "factura_style.xsl")
+    with open(ruta, "w", encoding="utf-8") as f:
         f.write(xsl_content)
-    print("Archivo XSL básico creado: factura_style.xsl")
+    print(f"Archivo XSL básico creado: {ruta}")
+    return ruta
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera facturas XML con código de barras")
+    parser.add_argument("--masivo", action="store_true", help="Generar todas las facturas (o las filtradas)")
+    parser.add_argument("--sucursal", nargs="+", help="Sucursal(es) a incluir, p. ej. A C")
+    parser.add_argument("--desde", help="Fecha inicial (AAAA-MM-DD)")
+    parser.add_argument("--hasta", help="Fecha final (AAAA-MM-DD)")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--lote", type=int, default=500, help="Facturas por tarea")
+    parser.add_argument("--salida", default="facturas", help="Directorio de salida en modo masivo")
+    parser.add_argument("--codigo-barras", choices=["svg", "png"], default=FORMATO_CODIGO,
+                        help="SVG vectorial (por defecto) o PNG rasterizado")
+    args = parser.parse_args()
+
     # Cargar los datos
     df = load_data()
     
-    # Crear el archivo XSL básico
-    crear_xsl_basico()
+    # Crear el archivo XSL básico (en modo masivo, en el directorio de las facturas)
+    crear_xsl_basico(args.salida if args.masivo else "")
+
+    if args.masivo:
+        seleccion = filtrar_ventas(df, args.sucursal, args.desde, args.hasta)
+        generar_facturas_masivo(seleccion, args.salida, args.procesos, args.lote, args.codigo_barras)
+        sys.exit(0)
 
-    # Generar una factura XML para la primera venta(modificar la funcion si quieres generar todos)
+    # Generar una factura XML para la primera venta (usar --masivo para generarlas todas)
     sale = df.iloc[0]
     
     # Generar la factura XML
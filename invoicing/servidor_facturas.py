@@ -0,0 +1,69 @@
+"""Servidor de exportación masiva de facturas: ZIP en streaming, sin archivo intermedio.
+
+El ZIP se genera por bloques con ``comun.facturas.zip_facturas`` y cada trozo se envía
+al cliente en cuanto está comprimido (respuesta HTTP chunked): ni el servidor ni el
+navegador necesitan el archivo completo en memoria.
+
+    python invoicing/servidor_facturas.py --puerto 8502
+    curl -o facturas.zip "http://localhost:8502/facturas.zip?sucursal=A&desde=2019-01-01&hasta=2019-03-31"
+
+La app de facturación enlaza aquí si ``URL_EXPORTACION_FACTURAS`` apunta a este servidor.
+"""
+import argparse
+import datetime as dt
+import os
+import sys
+import threading
+from pathlib import Path
+
+from flask import Flask, Response, abort, request, stream_with_context
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from comun.datos import RUTA_CSV
+from comun.facturas import IndiceFacturas, cargar_datos, zip_facturas
+
+app = Flask(__name__)
+
+_indice = {'version': None, 'indice': None}
+_lock = threading.Lock()
+
+
+def indice_actual():
+    # Se reconstruye solo si cambia el CSV (mismo criterio que la app de Streamlit)
+    version = os.stat(RUTA_CSV).st_mtime_ns
+    with _lock:
+        if _indice['version'] != version:
+            _indice['indice'], _indice['version'] = IndiceFacturas(cargar_datos()), version
+        return _indice['indice']
+
+
+def _fecha(nombre, defecto):
+    valor = request.args.get(nombre)
+    if not valor:
+        return defecto
+    try:
+        return dt.date.fromisoformat(valor)
+    except ValueError:
+        abort(400, f"Fecha no válida en '{nombre}': {valor}")
+
+
+@app.route('/facturas.zip')
+def descargar_facturas():
+    indice = indice_actual()
+    sucursal = request.args.get('sucursal')
+    if sucursal not in indice.sucursales:
+        abort(400, f"Sucursal desconocida: {sucursal}")
+    desde = _fecha('desde', indice.fechas[0])
+    hasta = _fecha('hasta', desde if request.args.get('desde') else indice.fechas[-1])
+    facturas = indice.facturas_rango(sucursal, desde, hasta)
+    nombre = f"facturas_{sucursal}_{desde}_{hasta}.zip"
+    return Response(stream_with_context(zip_facturas(facturas)), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename="{nombre}"'})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor de descarga de facturas en ZIP (streaming)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8502)
+    args = parser.parse_args()
+    app.run(host=args.host, port=args.puerto, threaded=True)
@@ -1,53 +1,49 @@
 import pandas as pd
-import plotly.express as px
 from pptx import Presentation
+from pptx.chart.data import CategoryChartData
 from pptx.util import Inches, Pt
+from pptx.enum.chart import XL_CHART_TYPE, XL_LABEL_POSITION, XL_LEGEND_POSITION
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.dml.color import RGBColor
 from io import BytesIO
 
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from comun.datos import cargar_ventas
+from comun.agregados import DIR_AGREGADOS, agregar_csv, cargar_agregados, leer_manifiesto, reconstruir
+from comun.cubo import construir_cubo, contar_por, metricas, sumar_por
+from comun.series import reducir_serie
+from comun.imagenes import exportar_figuras
+
+# Tamaño de exportación de los gráficos (píxeles)
+ANCHO_GRAFICO, ALTO_GRAFICO = 1000, 600
+MAX_PUNTOS_GRAFICO = 1000  # Puntos de la serie diaria, tanto en imagen como en gráfico nativo
+
+# 'nativo': gráficos de PowerPoint editables, sin renderizar; 'imagen': Plotly + Kaleido (PNG)
+GRAFICOS = ['nativo', 'imagen']
+TIPOS_GRAFICO = {
+    'linea': XL_CHART_TYPE.LINE,
+    'barras': XL_CHART_TYPE.COLUMN_CLUSTERED,
+    'barras_h': XL_CHART_TYPE.BAR_CLUSTERED,
+    'tarta': XL_CHART_TYPE.PIE,
+}
+
 # Cargar datos
 def load_data():
-    df = pd.read_csv("supermarket_Sales.csv")
-    columnas_traducidas = {
-        'Invoice ID': 'ID de Factura',
-        'Branch': 'Sucursal',
-        'City': 'Ciudad',
-        'Customer type': 'Tipo de Cliente',
-        'Gender': 'Género',
-        'Product line': 'Línea de Producto',
-        'Unit price': 'Precio Unitario',
-        'Quantity': 'Cantidad',
-        'Tax 5%': 'Impuesto 5%',
-        'Total': 'Total',
-        'Date': 'Fecha',
-        'Time': 'Hora',
-        'Payment': 'Método de Pago',
-        'Cost of goods sold': 'Costo de Bienes Vendidos',
-        'Gross margin percentage': 'Porcentaje de Margen Bruto',
-        'Gross income': 'Ingreso Bruto',
-        'Customer stratification rating': 'Calificación de Estratificación del Cliente'
-    }
-    df = df.rename(columns=columnas_traducidas)
-    df['Fecha'] = pd.to_datetime(df['Fecha'])
-    return df
-
-df = load_data()
-
-# Crear presentación
-prs = Presentation()
-prs.slide_width = Inches(16)
-prs.slide_height = Inches(9)
+    return cargar_ventas()
 
 # Función mejorada para agregar una diapositiva con un gráfico
-def add_chart_slide(prs, title, fig, layout_index=5):
+def add_chart_slide(prs, title, fig, layout_index=5, img_bytes=None):
     slide = prs.slides.add_slide(prs.slide_layouts[layout_index])
     slide.shapes.title.text = title
     
-    # Ajustar el tamaño de la figura
-    fig.update_layout(width=1000, height=600)
-    
-    img_bytes = fig.to_image(format="png")
+    # Imagen ya exportada en lote o, si no, exportada ahora (con caché)
+    if img_bytes is None:
+        img_bytes = exportar_figuras([fig], ancho=ANCHO_GRAFICO, alto=ALTO_GRAFICO)[0]
     img_stream = BytesIO(img_bytes)
     
     # Centrar la imagen en la diapositiva
@@ -55,64 +51,238 @@ def add_chart_slide(prs, title, fig, layout_index=5):
     top = (prs.slide_height - Inches(6)) / 2
     slide.shapes.add_picture(img_stream, left, top, width=Inches(10), height=Inches(6))
 
-# Diapositiva de título
-slide = prs.slides.add_slide(prs.slide_layouts[0])
-slide.shapes.title.text = "Dashboard de Ventas de Supermercado"
-
-# Diapositiva de métricas mejorada
-slide = prs.slides.add_slide(prs.slide_layouts[5])
-slide.shapes.title.text = "Métricas Principales"
-metrics = [
-    ("Ventas Totales", f"${df['Total'].sum():,.2f}"),
-    ("Transacciones", f"{len(df):,}"),
-    ("Venta Promedio", f"${df['Total'].mean():,.2f}"),
-    ("Margen Bruto Promedio", f"${df['Ingreso Bruto'].mean():,.2f}")
-]
-
-for i, (name, value) in enumerate(metrics):
-    left = Inches(1 + i * 3.75)
-    top = Inches(2)
-    width = Inches(3.5)
-    height = Inches(2)
-    
-    shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
-    shape.fill.solid()
-    shape.fill.fore_color.rgb = RGBColor(225, 225, 225)  # Light gray background
-    shape.line.color.rgb = RGBColor(200, 200, 200)  # Lighter border
-    
-    tf = shape.text_frame
-    tf.text = f"{name}\n{value}"
-    tf.paragraphs[0].font.size = Pt(18)
-    tf.paragraphs[0].font.bold = True
-    tf.paragraphs[1].font.size = Pt(24)
-    tf.paragraphs[1].font.color.rgb = RGBColor(0, 112, 192)  # Blue color for value
-
-# Ventas Diarias
-ventas_diarias = df.groupby('Fecha')['Total'].sum().reset_index()
-fig_ventas_diarias = px.line(ventas_diarias, x='Fecha', y='Total', title='Ventas Diarias')
-add_chart_slide(prs, "Ventas Diarias", fig_ventas_diarias)
-
-# Ventas por Tipo de Cliente y Género
-ventas_tipo_genero = df.groupby(['Tipo de Cliente', 'Género'])['Total'].sum().unstack()
-fig_tipo_genero = px.bar(ventas_tipo_genero, title='Ventas por Tipo de Cliente y Género', barmode='group')
-add_chart_slide(prs, "Ventas por Tipo de Cliente y Género", fig_tipo_genero)
-
-# Ventas por Línea de Producto
-productos = df['Línea de Producto'].value_counts()
-fig_productos = px.pie(values=productos.values, names=productos.index, title='Ventas por Línea de Producto')
-add_chart_slide(prs, "Ventas por Línea de Producto", fig_productos)
-
-# Ventas por Ciudad
-ventas_ciudad = df.groupby('Ciudad')['Total'].sum().sort_values(ascending=True)
-fig_ciudad = px.bar(ventas_ciudad, orientation='h', title='Ventas por Ciudad')
-add_chart_slide(prs, "Ventas por Ciudad", fig_ciudad)
-
-# Métodos de Pago
-metodos_pago = df['Método de Pago'].value_counts()
-fig_metodos_pago = px.pie(values=metodos_pago.values, names=metodos_pago.index, title='Métodos de Pago')
-add_chart_slide(prs, "Métodos de Pago", fig_metodos_pago)
-
-# Guardar presentación
-prs.save('dashboard_ventas_supermercado.pptx')
-
-print("Presentación de PowerPoint creada: dashboard_ventas_supermercado.pptx")
\ No newline at end of file
+def _datos_grafico(datos):
+    # Serie -> una serie de PowerPoint; DataFrame -> una por columna (p. ej. por género)
+    datos = datos.to_frame() if isinstance(datos, pd.Series) else datos
+    chart_data = CategoryChartData(number_format='#,##0.00')
+    if isinstance(datos.index, pd.DatetimeIndex):
+        chart_data.categories = datos.index.date.tolist()
+    else:
+        chart_data.categories = [str(categoria) for categoria in datos.index]
+    for columna in datos.columns:
+        chart_data.add_series(str(columna), datos[columna].astype(float).tolist())
+    return chart_data
+
+# Diapositiva con un gráfico nativo de PowerPoint a partir de la serie agregada
+def add_native_chart_slide(prs, title, tipo, datos, layout_index=5):
+    slide = prs.slides.add_slide(prs.slide_layouts[layout_index])
+    slide.shapes.title.text = title
+
+    left = (prs.slide_width - Inches(10)) / 2
+    top = (prs.slide_height - Inches(6)) / 2
+    chart = slide.shapes.add_chart(TIPOS_GRAFICO[tipo], left, top, Inches(10), Inches(6),
+                                   _datos_grafico(datos)).chart
+
+    if tipo == 'tarta':
+        chart.has_legend = True
+        chart.legend.position = XL_LEGEND_POSITION.RIGHT
+        chart.legend.include_in_layout = False
+        plot = chart.plots[0]
+        plot.has_data_labels = True
+        plot.data_labels.show_percentage = True
+        plot.data_labels.show_value = False
+        plot.data_labels.number_format = '0.0%'
+        plot.data_labels.number_format_is_linked = False
+        plot.data_labels.position = XL_LABEL_POSITION.OUTSIDE_END
+    else:
+        chart.has_legend = len(chart.plots[0].series) > 1
+        if chart.has_legend:
+            chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+            chart.legend.include_in_layout = False
+        chart.value_axis.tick_labels.number_format = '#,##0'
+        chart.value_axis.tick_labels.number_format_is_linked = False
+        chart.value_axis.has_major_gridlines = True
+        if tipo == 'linea':
+            chart.plots[0].series[0].smooth = False
+            chart.category_axis.tick_labels.number_format = 'dd/mm/yyyy'
+            chart.category_axis.tick_labels.number_format_is_linked = False
+    return chart
+
+def figura_plotly(title, tipo, datos):
+    """Figura de Plotly equivalente al gráfico nativo (motor 'imagen')."""
+    import plotly.express as px
+
+    if tipo == 'linea':
+        datos = pd.DataFrame({datos.index.name or 'x': datos.index, datos.name or 'y': datos.values})
+        x, y = datos.columns
+        # Imagen estática: sin WebGL (la serie ya llega reducida)
+        return px.line(datos, x=x, y=y, title=title, render_mode='svg')
+    if tipo == 'tarta':
+        return px.pie(values=datos.values, names=datos.index, title=title)
+    if tipo == 'barras_h':
+        return px.bar(datos, orientation='h', title=title)
+    return px.bar(datos, title=title, barmode='group')
+
+# Diapositiva de métricas mejorada (a partir del cubo de agregados)
+def add_metrics_slide(prs, cubo):
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = "Métricas Principales"
+    ventas_totales, transacciones, venta_promedio, margen_promedio = metricas(cubo)
+    metrics = [
+        ("Ventas Totales", f"${ventas_totales:,.2f}"),
+        ("Transacciones", f"{transacciones:,}"),
+        ("Venta Promedio", f"${venta_promedio:,.2f}"),
+        ("Margen Bruto Promedio", f"${margen_promedio:,.2f}")
+    ]
+
+    for i, (name, value) in enumerate(metrics):
+        left = Inches(1 + i * 3.75)
+        top = Inches(2)
+        width = Inches(3.5)
+        height = Inches(2)
+        
+        shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
+        shape.fill.solid()
+        shape.fill.fore_color.rgb = RGBColor(225, 225, 225)  # Light gray background
+        shape.line.color.rgb = RGBColor(200, 200, 200)  # Lighter border
+        
+        tf = shape.text_frame
+        tf.text = f"{name}\n{value}"
+        tf.paragraphs[0].font.size = Pt(18)
+        tf.paragraphs[0].font.bold = True
+        tf.paragraphs[1].font.size = Pt(24)
+        tf.paragraphs[1].font.color.rgb = RGBColor(0, 112, 192)  # Blue color for value
+
+def crear_presentacion(cubo, salida='dashboard_ventas_supermercado.pptx', subtitulo=None, paralelo=None,
+                       graficos_como='nativo'):
+    """Presentación a partir del cubo diario (``comun.cubo``/``comun.agregados``), no de las filas."""
+    # Crear presentación
+    prs = Presentation()
+    prs.slide_width = Inches(16)
+    prs.slide_height = Inches(9)
+
+    # Diapositiva de título
+    slide = prs.slides.add_slide(prs.slide_layouts[0])
+    slide.shapes.title.text = "Dashboard de Ventas de Supermercado"
+    if subtitulo:
+        slide.placeholders[1].text = subtitulo
+
+    add_metrics_slide(prs, cubo)
+
+    # Series agregadas de cada gráfico: (título, tipo, datos)
+    graficos = [
+        # Como mucho un punto por píxel de ancho de la imagen
+        ("Ventas Diarias", 'linea', reducir_serie(sumar_por(cubo, 'Fecha'), MAX_PUNTOS_GRAFICO)),
+        ("Ventas por Tipo de Cliente y Género", 'barras', sumar_por(cubo, ['Tipo de Cliente', 'Género']).unstack()),
+        ("Ventas por Línea de Producto", 'tarta', contar_por(cubo, 'Línea de Producto')),
+        ("Ventas por Ciudad", 'barras_h', sumar_por(cubo, 'Ciudad').sort_values(ascending=True)),
+        ("Métodos de Pago", 'tarta', contar_por(cubo, 'Método de Pago')),
+    ]
+
+    if graficos_como == 'nativo':
+        for titulo, tipo, datos in graficos:
+            add_native_chart_slide(prs, titulo, tipo, datos)
+    else:
+        figuras = [figura_plotly(titulo, tipo, datos) for titulo, tipo, datos in graficos]
+        # Todas las imágenes en una sola exportación (en paralelo); las que no cambiaron salen de la caché
+        imagenes = exportar_figuras(figuras, ancho=ANCHO_GRAFICO, alto=ALTO_GRAFICO, paralelo=paralelo)
+        for (titulo, _, _), fig, imagen in zip(graficos, figuras, imagenes):
+            add_chart_slide(prs, titulo, fig, img_bytes=imagen)
+
+    # Guardar presentación
+    prs.save(salida)
+    return salida
+
+# Presentaciones por (sucursal, periodo): un pool de procesos que comparte el cubo ya cargado
+_cubo_trabajador = None
+
+def _iniciar_trabajador(cubo):
+    global _cubo_trabajador
+    _cubo_trabajador = cubo
+
+def filtrar_corte(cubo, sucursal=None, periodo=None):
+    """Parte del cubo de una sucursal y un periodo (``'2019-01'``, ``'2019'``...); ``None`` es todo."""
+    mask = pd.Series(True, index=cubo.index)
+    if sucursal:
+        mask &= cubo['Sucursal'] == sucursal
+    if periodo:
+        periodo = pd.Period(periodo)
+        mask &= (cubo['Fecha'] >= periodo.start_time) & (cubo['Fecha'] <= periodo.end_time)
+    return cubo[mask]
+
+def nombre_corte(sucursal=None, periodo=None):
+    return f"ventas_{sucursal or 'todas'}_{periodo or 'total'}.pptx"
+
+def _crear_corte(sucursal, periodo, directorio, graficos_como):
+    inicio = time.perf_counter()
+    cubo = filtrar_corte(_cubo_trabajador, sucursal, periodo)
+    salida = None
+    if not cubo.empty:
+        subtitulo = f"Sucursal {sucursal or 'todas'} · {periodo or 'todo el periodo'}"
+        # Un proceso por presentación: la exportación de imágenes no abre otro pool
+        salida = crear_presentacion(cubo, str(Path(directorio) / nombre_corte(sucursal, periodo)),
+                                    subtitulo=subtitulo, paralelo=1, graficos_como=graficos_como)
+    return sucursal, periodo, salida, time.perf_counter() - inicio
+
+def crear_presentaciones(cubo, cortes, directorio='reportes', procesos=None, graficos_como='nativo'):
+    """Genera una presentación por cada ``(sucursal, periodo)`` de ``cortes`` en paralelo.
+
+    Devuelve ``(sucursal, periodo, ruta, segundos)`` en el orden en que terminan; cada
+    presentación ya está escrita al devolverse. Los cortes sin ventas tienen ruta ``None``.
+    """
+    Path(directorio).mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador, initargs=(cubo,)) as pool:
+        futuros = [pool.submit(_crear_corte, sucursal, periodo, directorio, graficos_como)
+                   for sucursal, periodo in cortes]
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+
+def resumen_tiempos(resultados, segundos_totales):
+    tiempos = sorted(segundos for *_, segundos in resultados)
+    creadas = sum(1 for _, _, ruta, _ in resultados if ruta)
+    if not tiempos:
+        return "Sin presentaciones"
+    return (f"{creadas} presentaciones ({len(resultados) - creadas} cortes vacíos) en {segundos_totales:.2f} s | "
+            f"por presentación: media {sum(tiempos) / len(tiempos):.2f} s, "
+            f"mediana {tiempos[len(tiempos) // 2]:.2f} s, máx {tiempos[-1]:.2f} s | "
+            f"paralelismo efectivo {sum(tiempos) / segundos_totales:.1f}x")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Presentación de ventas a partir del almacén de agregados diarios')
+    parser.add_argument('--agregar', nargs='*', default=[], metavar='CSV',
+                        help='CSV nuevos (p. ej. las ventas del día) que se añaden al almacén antes del informe')
+    parser.add_argument('--reemplazar', action='store_true',
+                        help='Los días de los CSV de --agregar sustituyen a los ya incorporados (correcciones)')
+    parser.add_argument('--directorio', default=str(DIR_AGREGADOS))
+    parser.add_argument('--sin-agregados', action='store_true',
+                        help='Calcular el cubo desde el dataset completo, sin usar el almacén')
+    parser.add_argument('--salida', default='dashboard_ventas_supermercado.pptx')
+    parser.add_argument('--sucursales', nargs='*', metavar='SUCURSAL',
+                        help='Una presentación por sucursal (sin valores: todas las del cubo)')
+    parser.add_argument('--periodos', nargs='*', metavar='PERIODO',
+                        help='Una presentación por periodo, p. ej. 2019-01 (sin valores: todos los meses)')
+    parser.add_argument('--directorio-salida', default='reportes')
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--graficos', choices=GRAFICOS, default='nativo',
+                        help="'nativo': gráficos de PowerPoint (sin renderizar); 'imagen': PNG con Plotly y Kaleido")
+    args = parser.parse_args()
+
+    if args.sin_agregados:
+        cubo = construir_cubo(load_data())
+    else:
+        if not leer_manifiesto(args.directorio)['partes']:
+            # Primera ejecución: el almacén se crea con el dataset completo
+            reconstruir(directorio=args.directorio)
+        for ruta in args.agregar:
+            agregar_csv(ruta, args.directorio, reemplazar=args.reemplazar)
+        cubo = cargar_agregados(args.directorio)
+
+    if args.sucursales is None and args.periodos is None:
+        salida = crear_presentacion(cubo, args.salida, graficos_como=args.graficos)
+        print(f"Presentación de PowerPoint creada: {salida}")
+    else:
+        sucursales = [None] if args.sucursales is None else (
+            args.sucursales or sorted(cubo['Sucursal'].unique()))
+        periodos = [None] if args.periodos is None else (
+            args.periodos or [str(p) for p in sorted(cubo['Fecha'].dt.to_period('M').unique())])
+        cortes = [(sucursal, periodo) for sucursal in sucursales for periodo in periodos]
+
+        inicio = time.perf_counter()
+        resultados = []
+        for sucursal, periodo, salida, segundos in crear_presentaciones(cubo, cortes, args.directorio_salida,
+                                                                        args.procesos, args.graficos):
+            resultados.append((sucursal, periodo, salida, segundos))
+            print(f"{segundos:6.2f} s  {salida or f'{sucursal} {periodo}: sin ventas'}")
+        print(resumen_tiempos(resultados, time.perf_counter() - inicio))
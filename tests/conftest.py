@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(RAIZ / "invoicing"))
+
+from comun.datos import RUTA_CSV, cargar_ventas  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def dir_cache(tmp_path_factory):
+    # Instantáneas de las pruebas fuera de data/.cache
+    return tmp_path_factory.mktemp('cache')
+
+
+@pytest.fixture(scope='session')
+def ventas(dir_cache):
+    return cargar_ventas(RUTA_CSV, dir_cache=dir_cache)
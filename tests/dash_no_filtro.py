@@ -1,9 +1,13 @@
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from comun.datos import cargar_ventas
 
 # Cargar datos desde la URL
 #data_url = "https://raw.githubusercontent.com/plotly/datasets/master/supermarket_Sales.csv"
@@ -13,8 +17,7 @@ import plotly.graph_objects as go
 #df.to_csv(ruta_excel, index=False)
 #print("DataFrame successfully exported to Excel.")
 
-df = pd.read_csv('supermarket_Sales.csv')
-df['Date'] = pd.to_datetime(df['Date'])
+df = cargar_ventas(traducir=False)
 
 
 # Calcular métricas
@@ -37,11 +40,11 @@ productos = df['Product line'].value_counts()
 fig_productos = px.pie(values=productos.values, names=productos.index, title='Ventas por Línea de Producto')
 
 # Gráfico de ventas por tipo de cliente y línea de producto
-ventas_tipo_producto = df.groupby(['Customer type', 'Product line'])['Total'].sum().unstack()
+ventas_tipo_producto = df.groupby(['Customer type', 'Product line'], observed=True)['Total'].sum().unstack()
 fig_tipo_producto = px.bar(ventas_tipo_producto, title='Ventas por Tipo de Cliente y Línea de Producto', barmode='group')
 
 # Gráfico de ventas por ciudad
-ventas_ciudad = df.groupby('City')['Total'].sum().sort_values(ascending=True)
+ventas_ciudad = df.groupby('City', observed=True)['Total'].sum().sort_values(ascending=True)
 fig_ciudad = px.bar(ventas_ciudad, orientation='h', title='Ventas por Ciudad')
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
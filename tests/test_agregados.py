@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from comun.agregados import agregar_csv, cargar_agregados, leer_manifiesto, reconstruir
+from comun.cubo import DIMENSIONES, construir_cubo
+from comun.datos import RUTA_CSV
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def csv_por_dia(tmp_path):
+    """Un CSV por día con las filas del CSV original (en su formato de texto)."""
+    df = pd.read_csv(RUTA_CSV, dtype=str)
+    directorio = tmp_path / "diarios"
+    directorio.mkdir()
+    rutas = []
+    for fecha, grupo in df.groupby(pd.to_datetime(df['Date']), sort=True):
+        ruta = directorio / f"ventas_{fecha.date()}.csv"
+        grupo.to_csv(ruta, index=False)
+        rutas.append(ruta)
+    return rutas
+
+
+def _normalizar(cubo):
+    cubo = cubo.copy()
+    for dimension in DIMENSIONES[1:]:
+        cubo[dimension] = cubo[dimension].astype(str)
+    return cubo.sort_values(DIMENSIONES).reset_index(drop=True)
+
+
+def _assert_mismo_cubo(cubo, esperado):
+    pd.testing.assert_frame_equal(_normalizar(cubo), _normalizar(esperado), check_dtype=False)
+
+
+def test_agregar_dias_igual_que_recalcular(ventas, csv_por_dia, tmp_path):
+    directorio = tmp_path / "agregados"
+    filas = sum(agregar_csv(ruta, directorio, max_partes=8) for ruta in csv_por_dia)
+    assert filas == len(ventas)
+    assert len(leer_manifiesto(directorio)['partes']) <= 8
+    _assert_mismo_cubo(cargar_agregados(directorio), construir_cubo(ventas))
+    # Solo quedan en disco las partes del manifiesto
+    archivos = {p.name for p in directorio.glob('*.parquet')}
+    assert archivos == {parte['archivo'] for parte in leer_manifiesto(directorio)['partes']}
+
+
+def test_csv_repetido_se_ignora(csv_por_dia, tmp_path):
+    directorio = tmp_path / "agregados"
+    assert agregar_csv(csv_por_dia[0], directorio) > 0
+    assert agregar_csv(csv_por_dia[0], directorio) == 0
+
+
+def test_dias_solapados(ventas, csv_por_dia, tmp_path):
+    directorio = tmp_path / "agregados"
+    reconstruir([RUTA_CSV], directorio)
+
+    # Otro CSV con un día ya incorporado: se rechaza sin tocar el almacén
+    corregido = pd.read_csv(csv_por_dia[5], dtype=str)
+    corregido['Quantity'] = '1'
+    ruta = tmp_path / "corregido.csv"
+    corregido.to_csv(ruta, index=False)
+    with pytest.raises(ValueError):
+        agregar_csv(ruta, directorio)
+    _assert_mismo_cubo(cargar_agregados(directorio), construir_cubo(ventas))
+
+    # Con reemplazar=True el día corregido sustituye al original
+    agregar_csv(ruta, directorio, reemplazar=True)
+    esperado = ventas.copy()
+    esperado.loc[esperado['Fecha'] == pd.Timestamp(corregido['Date'].iloc[0]), 'Cantidad'] = 1
+    _assert_mismo_cubo(cargar_agregados(directorio), construir_cubo(esperado))
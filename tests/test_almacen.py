@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+from comun.almacen import archivos_particion, ingerir, leer_manifiesto  # noqa: E402
+from comun.consultas import MotorDuckDB  # noqa: E402
+from comun.datos import RUTA_CSV  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def almacen(tmp_path_factory):
+    destino = tmp_path_factory.mktemp('almacen') / 'ventas'
+    ingerir(RUTA_CSV, destino)
+    return destino
+
+
+def _particiones(archivos, destino):
+    return {Path(a).relative_to(destino).parent.as_posix() for a in archivos}
+
+
+def test_poda_por_fecha_y_ciudad(almacen):
+    manifiesto = leer_manifiesto(almacen)
+    todos = archivos_particion(manifiesto, almacen)
+    assert len(_particiones(todos, almacen)) == 9  # 3 meses x 3 sucursales
+
+    febrero = archivos_particion(manifiesto, almacen, pd.Timestamp('2019-02-10'), pd.Timestamp('2019-02-20'))
+    assert _particiones(febrero, almacen) == {f'anio=2019/mes=2/Branch={s}' for s in 'ABC'}
+
+    yangon = archivos_particion(manifiesto, almacen, pd.Timestamp('2019-02-01'), None, ['Yangon'])
+    sucursal = manifiesto['ciudades']['Yangon'][0]
+    assert _particiones(yangon, almacen) == {f'anio=2019/mes={m}/Branch={sucursal}' for m in (2, 3)}
+
+    assert archivos_particion(manifiesto, almacen, pd.Timestamp('2019-05-01'), pd.Timestamp('2019-05-31')) == []
+    assert archivos_particion(manifiesto, almacen, ciudades=['Ciudad inexistente']) == []
+
+
+def test_motor_recarga_el_manifiesto_al_reingerir(tmp_path):
+    ruta_csv = tmp_path / 'ventas.csv'
+    df = pd.read_csv(RUTA_CSV)
+    fechas = pd.to_datetime(df['Date'], format='%m/%d/%Y')
+    df[fechas.dt.month == 1].to_csv(ruta_csv, index=False)
+    destino = tmp_path / 'almacen'
+    ingerir(ruta_csv, destino)
+
+    motor = MotorDuckDB(destino)
+    version = motor.version_datos()
+    filtros_marzo = (pd.Timestamp('2019-03-01'), pd.Timestamp('2019-03-31'), None, None)
+    assert motor.metricas(filtros_marzo)[1] == 0
+    assert motor.rango_fechas()[1] < pd.Timestamp('2019-02-01')
+
+    # Reingesta con los tres meses: la nueva partición de marzo entra en la poda
+    df.to_csv(ruta_csv, index=False)
+    ingerir(ruta_csv, destino)
+    assert motor.metricas(filtros_marzo)[1] == int((fechas.dt.month == 3).sum())
+    assert motor.rango_fechas()[1] >= pd.Timestamp('2019-03-01')
+    assert motor.version_datos() != version
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from comun.archivos import escritura_atomica, guardar_json
+
+
+def test_reemplaza_archivo(tmp_path):
+    destino = tmp_path / "datos.json"
+    destino.write_text('viejo')
+    guardar_json(destino, {'a': 1})
+    assert json.loads(destino.read_text()) == {'a': 1}
+    assert [p.name for p in tmp_path.iterdir()] == ['datos.json']
+
+
+def test_error_deja_el_destino_intacto(tmp_path):
+    destino = tmp_path / "datos.txt"
+    destino.write_text('viejo')
+    with pytest.raises(RuntimeError):
+        with escritura_atomica(destino) as tmp:
+            tmp.write_text('a medias')
+            raise RuntimeError
+    assert destino.read_text() == 'viejo'
+    assert [p.name for p in tmp_path.iterdir()] == ['datos.txt']
+
+
+def test_reemplaza_directorio(tmp_path):
+    destino = tmp_path / "almacen"
+    destino.mkdir()
+    (destino / "viejo.parquet").write_text('x')
+    with escritura_atomica(destino) as tmp:
+        tmp.mkdir()
+        (tmp / "nuevo.parquet").write_text('y')
+    assert [p.name for p in destino.iterdir()] == ['nuevo.parquet']
+    assert [p.name for p in tmp_path.iterdir()] == ['almacen']
+
+
+def test_sufijo_conserva_extension(tmp_path):
+    with escritura_atomica(tmp_path / "grafico.png", '.png') as tmp:
+        assert tmp.suffix == '.png'
+        tmp.write_bytes(b'png')
+    assert (tmp_path / "grafico.png").read_bytes() == b'png'
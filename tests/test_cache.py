@@ -0,0 +1,66 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from comun.cache import CacheLRU
+from comun.datos import RUTA_CSV, asegurar_instantanea
+
+
+def test_desaloja_por_bytes_la_menos_usada():
+    cache = CacheLRU(max_entradas=10, max_bytes=100)
+    cache.put('a', 1, 40)
+    cache.put('b', 2, 40)
+    assert cache.get('a') == 1  # 'b' pasa a ser la menos usada
+    cache.put('c', 3, 40)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.bytes == 80
+
+
+def test_desaloja_por_entradas():
+    cache = CacheLRU(max_entradas=2, max_bytes=10**6)
+    for clave in 'abc':
+        cache.put(clave, clave, 1)
+    assert len(cache) == 2 and cache.get('a') is None
+
+
+def test_reemplazar_entrada_actualiza_bytes():
+    cache = CacheLRU(max_entradas=10, max_bytes=100)
+    cache.put('a', 1, 60)
+    cache.put('a', 2, 30)
+    assert cache.bytes == 30 and cache.get('a') == 2
+
+
+def test_entrada_mayor_que_el_limite_no_desaloja():
+    cache = CacheLRU(max_entradas=10, max_bytes=100)
+    cache.put('a', 1, 50)
+    cache.put('enorme', 2, 101)
+    assert cache.get('enorme') is None and cache.get('a') == 1
+
+
+def test_invalidar_si_cambia_la_version():
+    cache = CacheLRU()
+    cache.invalidar_si_cambia('v1')
+    cache.put('a', 1, 10)
+    cache.invalidar_si_cambia('v1')
+    assert cache.get('a') == 1
+    cache.invalidar_si_cambia('v2')
+    assert cache.get('a') is None and cache.bytes == 0
+
+
+def test_version_datos_cambia_al_regenerar_la_instantanea(tmp_path):
+    pytest.importorskip('duckdb')
+    from comun.consultas import MotorDuckDB
+
+    ruta_csv = tmp_path / "ventas.csv"
+    shutil.copy(RUTA_CSV, ruta_csv)
+    ruta_parquet, huella = asegurar_instantanea(ruta_csv, tmp_path)
+    motor = MotorDuckDB(ruta_parquet, huella)
+    assert motor.version_datos() == huella
+
+    pd.read_csv(ruta_csv).head(10).to_csv(ruta_csv, index=False)
+    _, nueva = asegurar_instantanea(ruta_csv, tmp_path)
+    assert nueva != huella
+    assert motor.version_datos() == nueva
+    assert motor.metricas((None, None, None, None))[1] == 10
@@ -0,0 +1,45 @@
+import base64
+
+import pytest
+from barcode.charsets.code128 import CODES, START_CODES
+from barcode.codex import Code128
+
+from comun.codigos_barras import PARADA, data_uri, data_uris, modulos, svgs_codigos, svg_codigo
+
+
+def _decodificar(patron):
+    # Valores de los símbolos de 11 módulos hasta el símbolo de parada
+    assert patron.endswith(PARADA)
+    cuerpo = patron[:-len(PARADA)]
+    assert len(cuerpo) % 11 == 0
+    return [CODES.index(cuerpo[i:i + 11]) for i in range(0, len(cuerpo), 11)]
+
+
+@pytest.mark.parametrize('invoice_id', ['A1-B2-C3', 'Factura x/7', 'a', '~ {|}'])
+def test_modulos_igual_que_python_barcode(invoice_id):
+    # Sin tramos de dígitos python-barcode se queda en el juego B, como comun.codigos_barras
+    assert modulos(invoice_id) == Code128(invoice_id).build()[0]
+
+
+def test_digito_de_control(ventas):
+    for invoice_id in ventas['ID de Factura'].head(200):
+        inicio, *valores, control = _decodificar(modulos(invoice_id))
+        assert inicio == START_CODES['B']
+        assert valores == [ord(c) - 32 for c in invoice_id]
+        assert control == (inicio + sum(i * v for i, v in enumerate(valores, 1))) % 103
+
+
+def test_lote_igual_que_uno_a_uno(ventas):
+    # Longitudes distintas: el relleno de la matriz del lote no debe cambiar el dígito de control
+    ids = list(ventas['ID de Factura'].head(50)) + ['A', 'AB-12', 'x' * 30]
+    assert svgs_codigos(ids) == [svg_codigo(i) for i in ids]
+    assert data_uris(ids) == [data_uri(i) for i in ids]
+    assert base64.b64decode(data_uris(ids)[0].split(',', 1)[1]).decode() == svg_codigo(ids[0])
+    assert data_uris([]) == []
+
+
+def test_caracter_fuera_del_juego_b():
+    with pytest.raises(ValueError):
+        modulos('Año')
+    with pytest.raises(ValueError):
+        data_uris(['OK', 'Año'])
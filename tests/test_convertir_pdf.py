@@ -0,0 +1,86 @@
+import re
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('lxml')
+import convert_xml_pptx as convertir  # noqa: E402
+
+FACTURA = Path(convertir.__file__).with_name("factura_750-67-8428.xml")
+
+
+@pytest.fixture
+def entradas(tmp_path):
+    """Las mismas 12 facturas (3 días) como directorio, .zip y .tar.gz."""
+    base = FACTURA.read_text(encoding='utf-8')
+    directorio = tmp_path / "xml"
+    directorio.mkdir()
+    for i in range(12):
+        xml = re.sub(r'<Fecha>[^<]*', f'<Fecha>2019-01-0{i % 3 + 1} 00:00:00', base, count=1)
+        (directorio / f"factura_{i:03d}.xml").write_text(xml, encoding='utf-8')
+    (directorio / "notas.txt").write_text('no es una factura')
+    with zipfile.ZipFile(tmp_path / "facturas.zip", 'w') as zf:
+        for ruta in sorted(directorio.iterdir()):
+            zf.write(ruta, ruta.name)
+    with tarfile.open(tmp_path / "facturas.tar.gz", 'w:gz') as tf:
+        for ruta in sorted(directorio.iterdir()):
+            tf.add(ruta, ruta.name)
+    return [str(directorio), str(tmp_path / "facturas.zip"), str(tmp_path / "facturas.tar.gz")]
+
+
+def _contenido(origen):
+    return convertir.etree.tostring(convertir._parsear(origen))
+
+
+def test_leer_entradas_igual_en_todos_los_formatos(entradas):
+    leidas = [list(convertir.leer_entradas(entrada)) for entrada in entradas]
+    nombres = [[nombre for nombre, _ in facturas] for facturas in leidas]
+    assert nombres[0] == nombres[1] == nombres[2] == [f"factura_{i:03d}.xml" for i in range(12)]
+    for facturas in leidas[1:]:
+        assert [_contenido(o) for _, o in facturas] == [_contenido(o) for _, o in leidas[0]]
+    # Del .zip solo viajan referencias (ruta, miembro), no los bytes
+    assert all(isinstance(origen, tuple) for _, origen in leidas[1])
+
+
+def test_claves_por_sucursal_y_dia(entradas):
+    for entrada in entradas:
+        claves = convertir._claves_lote(list(convertir.leer_entradas(entrada)))
+        assert sorted({clave for clave, _, _ in claves}) == [('A', f'2019-01-0{d}') for d in (1, 2, 3)]
+        assert len(claves) == 12
+
+
+def test_volcar_tar_a_disco(entradas, tmp_path):
+    volcado = tmp_path / "volcado"
+    volcado.mkdir()
+    facturas = list(convertir._volcar_tar(entradas[2], volcado))
+    assert [nombre for nombre, _ in facturas] == [f"factura_{i:03d}.xml" for i in range(12)]
+    assert all(Path(ruta).parent == volcado for _, ruta in facturas)
+
+
+def test_tareas_en_vuelo_acotadas():
+    consumidas = []
+
+    def tareas():
+        for i in range(50):
+            consumidas.append(i)
+            yield (i,)
+
+    with ThreadPoolExecutor(2) as pool:
+        resultados = convertir._resultados_acotados(pool, lambda i: i * 2, tareas(), max_pendientes=4)
+        primero = next(resultados)
+        assert len(consumidas) <= 5  # Como mucho max_pendientes en vuelo más la que espera turno
+        assert sorted([primero] + list(resultados)) == [i * 2 for i in range(50)]
+
+
+def test_convertir_lote_unido(entradas, tmp_path):
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):  # Sin Pango la biblioteca no carga
+        pytest.skip('WeasyPrint no disponible')
+    xslt = Path(convertir.__file__).with_name(convertir.XSLT_POR_DEFECTO)
+    for i, entrada in enumerate(entradas):
+        pdfs = convertir.convertir_lote(entrada, tmp_path / f"pdf{i}", str(xslt), procesos=2, unir=True)
+        assert sorted(Path(p).name for p in pdfs) == [f"facturas_A_2019-01-0{d}.pdf" for d in (1, 2, 3)]
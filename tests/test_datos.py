@@ -0,0 +1,96 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from comun import datos
+from comun.datos import (COLUMNAS_INTERNAS, RUTA_CSV, asegurar_instantanea, cargar_instantanea_arrow, cargar_ventas,
+                         columnas_traducidas, escribir_instantanea_arrow, huella_csv)
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def copia_csv(tmp_path):
+    ruta = tmp_path / "ventas.csv"
+    shutil.copy(RUTA_CSV, ruta)
+    return ruta
+
+
+def test_instantanea_igual_que_csv(copia_csv, tmp_path):
+    cache = tmp_path / "cache"
+    primera = cargar_ventas(copia_csv, dir_cache=cache)
+    assert (cache / "ventas.parquet").exists()
+    segunda = cargar_ventas(copia_csv, dir_cache=cache)
+    pd.testing.assert_frame_equal(primera, segunda)
+    assert primera.attrs['huella'] == segunda.attrs['huella'] == huella_csv(copia_csv)['hash']
+    pd.testing.assert_frame_equal(primera, cargar_ventas(copia_csv, usar_cache=False))
+
+
+def test_tipos_y_columnas(ventas):
+    assert set(columnas_traducidas.values()) | set(COLUMNAS_INTERNAS) >= set(ventas.columns)
+    assert isinstance(ventas['Ciudad'].dtype, pd.CategoricalDtype)
+    assert ventas['Cantidad'].dtype == 'int64'
+    assert (ventas['Fecha'] == ventas['Fecha y Hora'].dt.normalize()).all()
+
+
+def test_csv_modificado_regenera_la_instantanea(copia_csv, tmp_path):
+    cache = tmp_path / "cache"
+    _, hash_original = asegurar_instantanea(copia_csv, cache)
+    df = pd.read_csv(copia_csv)
+    df.head(10).to_csv(copia_csv, index=False)
+    ruta, hash_nuevo = asegurar_instantanea(copia_csv, cache)
+    assert hash_nuevo != hash_original
+    assert len(pd.read_parquet(ruta)) == 10
+
+
+def test_instantanea_sin_csv(copia_csv, tmp_path):
+    cache = tmp_path / "cache"
+    ruta, huella = asegurar_instantanea(copia_csv, cache)
+    copia_csv.unlink()
+    assert asegurar_instantanea(copia_csv, cache) == (ruta, huella)
+    with pytest.raises(FileNotFoundError):
+        asegurar_instantanea(copia_csv, tmp_path / "vacia")
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    # Archivos que se vuelven a leer enteros para calcular su hash
+    leidos = []
+    original = datos._hash_archivo
+
+    def contar(ruta, *args, **kwargs):
+        leidos.append(Path(ruta).suffix)
+        return original(ruta, *args, **kwargs)
+
+    monkeypatch.setattr(datos, '_hash_archivo', contar)
+    return leidos
+
+
+def test_instantanea_arrow_no_se_vuelve_a_hashear(copia_csv, tmp_path, hashes):
+    ruta = tmp_path / "ventas.arrow"
+    escribir_instantanea_arrow(copia_csv, ruta)
+    hashes.clear()
+    df = cargar_instantanea_arrow(ruta, copia_csv)
+    assert hashes == []  # Ni la instantánea ni el CSV: tamaño y mtime coinciden
+    pd.testing.assert_frame_equal(df, cargar_ventas(copia_csv, usar_cache=False))
+
+    # Tocada pero intacta: se comprueba una vez y se registra el nuevo mtime
+    os.utime(ruta, ns=(0, ruta.stat().st_mtime_ns + 10**9))
+    cargar_instantanea_arrow(ruta, copia_csv)
+    assert hashes == ['.arrow']
+    cargar_instantanea_arrow(ruta, copia_csv)
+    assert hashes == ['.arrow']
+
+
+def test_instantanea_arrow_danada_se_regenera(copia_csv, tmp_path):
+    ruta = tmp_path / "ventas.arrow"
+    escribir_instantanea_arrow(copia_csv, ruta)
+    contenido = bytearray(ruta.read_bytes())
+    contenido[-100] ^= 0xFF
+    ruta.write_bytes(bytes(contenido))  # Mismo tamaño, otro mtime
+    df = cargar_instantanea_arrow(ruta, copia_csv)
+    assert ruta.read_bytes() != bytes(contenido)
+    assert len(df) == 1000
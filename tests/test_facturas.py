@@ -0,0 +1,105 @@
+import datetime as dt
+import functools
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+
+from comun import facturas
+from comun.datos import RUTA_CSV, cargar_ventas
+from comun.facturas import IndiceFacturas, cargar_datos, generar_html_factura, zip_facturas
+
+
+@pytest.fixture(scope='module')
+def datos(dir_cache):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(facturas, 'cargar_ventas', functools.partial(cargar_ventas, RUTA_CSV, dir_cache=dir_cache))
+        return cargar_datos()
+
+
+@pytest.fixture(scope='module')
+def indice(datos):
+    return IndiceFacturas(datos)
+
+
+def _ids(df):
+    return df['Invoice_ID'].tolist()
+
+
+def _por_mascara(datos, mascara):
+    # Búsqueda original: máscara sobre todas las filas, ordenada por fecha y hora
+    return datos[mascara].sort_values(['Date', 'Time'], kind='stable')
+
+
+def test_factura_por_id(datos, indice):
+    for i in (0, 500, len(datos) - 1):
+        fila = datos.iloc[i]
+        encontrada = indice.factura(fila['Invoice_ID'])
+        assert encontrada['Invoice_ID'] == fila['Invoice_ID'] and encontrada['Total'] == fila['Total']
+    assert indice.factura('000-00-0000') is None
+
+
+def test_facturas_de_un_dia(datos, indice):
+    for sucursal in indice.sucursales:
+        for fecha in indice.fechas[::10]:
+            esperado = _por_mascara(datos, (datos['Branch'] == sucursal) & (datos['Date'].dt.date == fecha))
+            assert _ids(indice.facturas(sucursal, fecha)) == _ids(esperado)
+    assert indice.facturas('Z', indice.fechas[0]).empty
+    assert indice.facturas('A', dt.date(2020, 1, 1)).empty
+
+
+@pytest.mark.parametrize('desde, hasta', [('2019-01-01', '2019-03-31'), ('2019-01-15', '2019-02-10'),
+                                          ('2019-02-28', '2019-02-28'), ('2019-03-10', '2019-03-01'),
+                                          ('2018-12-01', '2019-01-02'), ('2019-05-01', '2019-05-31')])
+def test_facturas_rango(datos, indice, desde, hasta):
+    for sucursal in indice.sucursales:
+        mascara = ((datos['Branch'] == sucursal) & (datos['Date'] >= pd.Timestamp(desde))
+                   & (datos['Date'] <= pd.Timestamp(hasta)))
+        assert _ids(indice.facturas_rango(sucursal, desde, hasta)) == _ids(_por_mascara(datos, mascara))
+    assert indice.facturas_rango('Z', desde, hasta).empty
+
+
+def test_sucursales_y_fechas(datos, indice):
+    assert indice.sucursales == sorted(datos['Branch'].unique())
+    assert indice.fechas == sorted(set(datos['Date'].dt.date))
+    assert sum(len(indice.facturas(s, f)) for s in indice.sucursales for f in indice.fechas) == len(datos)
+
+
+def _leer_zip(trozos):
+    with zipfile.ZipFile(io.BytesIO(b''.join(trozos))) as zf:
+        assert zf.testzip() is None
+        return {nombre: zf.read(nombre).decode('utf-8') for nombre in zf.namelist()}
+
+
+def test_zip_por_bloques_igual_que_render(indice):
+    seleccion = indice.facturas_rango('A', '2019-01-01', '2019-01-31')
+    trozos = list(zip_facturas(seleccion, tam_bloque=7))
+    assert len(trozos) == -(-len(seleccion) // 7) + 1
+    contenido = _leer_zip(trozos)
+    assert list(contenido) == [f"factura_{i}.html" for i in seleccion['Invoice_ID']]
+    for datos_factura in seleccion.to_dict('records'):
+        assert contenido[f"factura_{datos_factura['Invoice_ID']}.html"] == generar_html_factura(datos_factura)
+    assert _leer_zip(zip_facturas(seleccion.iloc[:0])) == {}
+
+
+@pytest.fixture
+def cliente(indice, monkeypatch):
+    pytest.importorskip('flask')
+    import servidor_facturas
+
+    monkeypatch.setattr(servidor_facturas, 'indice_actual', lambda: indice)
+    return servidor_facturas.app.test_client()
+
+
+def test_servidor_entrega_zip(cliente, indice):
+    respuesta = cliente.get('/facturas.zip?sucursal=B&desde=2019-02-01&hasta=2019-02-07')
+    assert respuesta.status_code == 200 and respuesta.mimetype == 'application/zip'
+    assert 'facturas_B_2019-02-01_2019-02-07.zip' in respuesta.headers['Content-Disposition']
+    esperado = indice.facturas_rango('B', '2019-02-01', '2019-02-07')
+    assert sorted(_leer_zip([respuesta.data])) == sorted(f"factura_{i}.html" for i in esperado['Invoice_ID'])
+
+
+@pytest.mark.parametrize('consulta', ['sucursal=Z', '', 'sucursal=A&desde=2019-13-01', 'sucursal=A&hasta=ayer'])
+def test_servidor_rechaza_parametros_no_validos(cliente, consulta):
+    assert cliente.get(f'/facturas.zip?{consulta}').status_code == 400
@@ -0,0 +1,51 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope='module')
+def generador():
+    # generate-xml-invoice.py no es importable por nombre; se registra para que el pool lo encuentre
+    spec = importlib.util.spec_from_file_location('generate_xml_invoice',
+                                                  RAIZ / "invoicing" / "generate-xml-invoice.py")
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = modulo
+    spec.loader.exec_module(modulo)
+    yield modulo
+    del sys.modules[spec.name]
+
+
+def xml_por_filas(generador, fila):
+    # Camino original: plantilla nueva por factura y str() por campo
+    datos = fila.to_dict()
+    datos['Codigo de Barras'] = generador.generate_barcode(str(fila['ID de Factura']))
+    return generador.crear_plantilla_personalizada().generate_xml(datos)
+
+
+def test_masivo_igual_que_por_filas(generador, ventas, tmp_path):
+    muestra = ventas.head(45)
+    assert generador.generar_facturas_masivo(muestra, tmp_path, procesos=2, tam_lote=7) == len(muestra)
+    (tmp_path / "ref").mkdir()
+    for _, fila in muestra.iterrows():
+        generador.escribir_factura(fila['ID de Factura'], xml_por_filas(generador, fila), tmp_path / "ref")
+    for _, fila in muestra.iterrows():
+        nombre = f"factura_{fila['ID de Factura']}.xml"
+        assert (tmp_path / nombre).read_text(encoding='utf-8') == (tmp_path / "ref" / nombre).read_text(encoding='utf-8')
+
+
+def test_factura_individual_igual_que_por_filas(generador, ventas, tmp_path):
+    for i in (0, 17, 999):
+        fila = ventas.iloc[i]
+        ruta = generador.generar_factura_xml(fila, tmp_path)
+        esperado = xml_por_filas(generador, fila)
+        assert open(ruta, encoding='utf-8').read().endswith('\n' + esperado)
+
+
+def test_xsl_junto_a_las_facturas(generador, tmp_path):
+    ruta = generador.crear_xsl_basico(tmp_path / "facturas")
+    assert ruta == str(tmp_path / "facturas" / "factura_style.xsl")
+    assert 'xsl:stylesheet' in open(ruta, encoding='utf-8').read()
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import plotly.graph_objects as go
+import pytest
+
+from comun import imagenes
+from comun.imagenes import clave_figura, exportar_figuras
+
+
+def _figura(y, titulo='Ventas'):
+    return go.Figure(go.Bar(x=['A', 'B', 'C'], y=y), layout={'title': titulo})
+
+
+def test_clave_por_contenido_y_opciones():
+    fig = _figura([1, 2, 3])
+    assert clave_figura(fig) == clave_figura(_figura([1, 2, 3]))
+    assert clave_figura(fig) != clave_figura(_figura([1, 2, 4]))
+    assert clave_figura(fig) != clave_figura(_figura([1, 2, 3], 'Otro título'))
+    assert clave_figura(fig) != clave_figura(fig, 'svg')
+    assert clave_figura(fig) != clave_figura(fig, ancho=800)
+    assert clave_figura(fig) != clave_figura(fig, escala=2)
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    # Sustituye a Kaleido: escribe la clave como imagen y anota cada lote renderizado
+    lotes = []
+
+    def renderizar(figs, rutas, formato, ancho, alto, escala, paralelo):
+        lotes.append(len(figs))
+        for fig, ruta in zip(figs, rutas):
+            Path(ruta).write_bytes(clave_figura(fig, formato, ancho, alto, escala).encode())
+
+    monkeypatch.setattr(imagenes, '_renderizar', renderizar)
+    return lotes
+
+
+def test_solo_se_renderizan_las_nuevas(renders, tmp_path):
+    a, b, c = _figura([1, 2, 3]), _figura([3, 2, 1]), _figura([5, 5, 5])
+    primera = exportar_figuras([a, b, _figura([1, 2, 3])], dir_cache=tmp_path)
+    assert renders == [2]  # Las figuras idénticas se renderizan una vez
+    assert primera[0] == primera[2] == clave_figura(a).encode()
+
+    segunda = exportar_figuras([b, c, a], dir_cache=tmp_path)
+    assert renders == [2, 1]
+    assert segunda == [clave_figura(f).encode() for f in (b, c, a)]
+
+    exportar_figuras([a, b, c], dir_cache=tmp_path)
+    assert renders == [2, 1]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"{clave_figura(f)}.png" for f in (a, b, c))
+
+
+def test_render_fallido_no_deja_imagenes_a_medias(monkeypatch, tmp_path):
+    def renderizar(figs, rutas, *args):
+        Path(rutas[0]).write_bytes(b'a medias')
+        raise RuntimeError('Kaleido no disponible')
+
+    monkeypatch.setattr(imagenes, '_renderizar', renderizar)
+    with pytest.raises(RuntimeError):
+        exportar_figuras([_figura([1, 2, 3])], dir_cache=tmp_path)
+    assert list(tmp_path.iterdir()) == []
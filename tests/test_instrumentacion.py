@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from comun import instrumentacion
+from comun.instrumentacion import (DURACION_CALLBACK, DURACION_FASE, FILAS, Arranque, Histograma, fase,
+                                   instrumentar, registrar_filas)
+
+
+def _series(histograma):
+    # Copia de las series: etiquetas -> (conteos por bucket, suma, total)
+    return {etiquetas: (list(c), s, n) for etiquetas, (c, s, n) in histograma._series.items()}
+
+
+def test_exposicion_formato_prometheus():
+    h = Histograma('prueba_segundos', 'Ayuda', ['callback', 'fase'], (0.1, 1))
+    for valor in (0.05, 0.5, 5):
+        h.observar(valor, 'graficos', 'agrupar:"Ciudad"\n')
+    assert h.exposicion().split('\n') == [
+        '# HELP prueba_segundos Ayuda',
+        '# TYPE prueba_segundos histogram',
+        r'prueba_segundos_bucket{callback="graficos",fase="agrupar:\"Ciudad\"\n",le="0.1"} 1',
+        r'prueba_segundos_bucket{callback="graficos",fase="agrupar:\"Ciudad\"\n",le="1"} 2',
+        r'prueba_segundos_bucket{callback="graficos",fase="agrupar:\"Ciudad\"\n",le="+Inf"} 3',
+        r'prueba_segundos_sum{callback="graficos",fase="agrupar:\"Ciudad\"\n"} 5.55',
+        r'prueba_segundos_count{callback="graficos",fase="agrupar:\"Ciudad\"\n"} 3',
+    ]
+
+
+def test_exposicion_sin_etiquetas():
+    h = Histograma('prueba_bytes', 'Ayuda', [], (10,))
+    h.observar(3)
+    assert 'prueba_bytes_bucket{le="10"} 1' in h.exposicion()
+    assert 'prueba_bytes_count{} 1' in h.exposicion()
+
+
+def test_fases_dentro_de_un_callback():
+    @instrumentar('prueba_fases')
+    def callback():
+        with fase('filtrado'):
+            time.sleep(0.01)
+        for _ in range(2):  # Una fase repetida se acumula en una sola observación
+            with fase('agrupar:Ciudad'):
+                time.sleep(0.005)
+        registrar_filas(7)
+        registrar_filas(3)
+        return 'ok'
+
+    assert callback() == 'ok'
+    fases = _series(DURACION_FASE)
+    assert fases[('prueba_fases', 'filtrado')][2] == 1 and fases[('prueba_fases', 'filtrado')][1] >= 0.01
+    assert fases[('prueba_fases', 'agrupar:Ciudad')][2] == 1
+    assert fases[('prueba_fases', 'agrupar:Ciudad')][1] >= 0.01
+    total = _series(DURACION_CALLBACK)[('prueba_fases',)]
+    assert total[2] == 1 and total[1] >= fases[('prueba_fases', 'filtrado')][1]
+    assert _series(FILAS)[('prueba_fases',)][1] == 10
+
+
+def test_fase_fuera_de_un_callback_no_registra():
+    antes = _series(DURACION_FASE)
+    with fase('filtrado'):
+        pass
+    registrar_filas(5)
+    assert _series(DURACION_FASE) == antes
+
+
+def test_callback_con_error_se_mide():
+    @instrumentar('prueba_error')
+    def callback():
+        with fase('filtrado'):
+            raise ValueError
+
+    with pytest.raises(ValueError):
+        callback()
+    assert _series(DURACION_CALLBACK)[('prueba_error',)][2] == 1
+    assert ('prueba_error', 'filtrado') in _series(DURACION_FASE)
+    assert not instrumentacion._activo()
+
+
+def test_metricas_y_serializacion_en_el_servidor(tmp_path):
+    flask = pytest.importorskip('flask')
+    servidor = flask.Flask(__name__)
+
+    @servidor.route(instrumentacion.RUTA_ACTUALIZACION, methods=['POST'])
+    @instrumentar('prueba_servidor')
+    def actualizar():
+        return {'figura': list(range(100))}
+
+    arranque = Arranque()
+    arranque.marcar('datos')
+    instrumentacion.instalar(servidor, muestreo=0, dir_perfiles=tmp_path, arranque=arranque)
+    cliente = servidor.test_client()
+    assert cliente.post(instrumentacion.RUTA_ACTUALIZACION).status_code == 200
+
+    assert _series(DURACION_FASE)[('prueba_servidor', 'serializacion')][2] == 1
+    texto = cliente.get('/metrics').get_data(as_text=True)
+    assert 'dash_respuesta_bytes_count{callback="prueba_servidor"} 1' in texto
+    assert 'dash_arranque_segundos{etapa="datos"}' in texto
+    assert texto.endswith('\n')
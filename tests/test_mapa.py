@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from comun.consultas import MotorPandas
+from comun.mapa import COORDENADAS_CIUDADES, MODOS, puntos_ventas
+
+TOTALES = pd.Series({('Yangon', 'A'): 100.004, ('Mandalay', 'B'): 50.5, ('Naypyitaw', 'C'): 75.0,
+                     ('Atlantis', 'Z'): 1.0})
+
+
+def test_puntos_son_clave_de_cache_estable():
+    puntos = puntos_ventas(TOTALES)
+    hash(puntos)
+    # Mismos totales en otro orden y con ruido por debajo del céntimo: misma clave
+    reordenados = TOTALES.iloc[::-1] + 1e-9
+    assert puntos_ventas(reordenados) == puntos
+    assert [etiqueta for _, _, etiqueta, _ in puntos] == ['A (Yangon)', 'C (Naypyitaw)', 'B (Mandalay)']
+    assert puntos_ventas(TOTALES.replace(50.5, 51.0)) != puntos
+
+
+def test_puntos_por_ciudad_y_por_sucursal():
+    totales = pd.Series({('Yangon', 'A'): 10.0, ('Yangon', 'D'): 5.0})
+    assert puntos_ventas(totales, por_sucursal=False) == ((*COORDENADAS_CIUDADES['Yangon'], 'Yangon', 15.0),)
+    propias = {'D': (16.9, 96.2)}
+    assert puntos_ventas(totales, propias) == ((*COORDENADAS_CIUDADES['Yangon'], 'A (Yangon)', 10.0),
+                                               (16.9, 96.2, 'D (Yangon)', 5.0))
+
+
+def test_mismos_filtros_mismos_puntos(ventas):
+    # La clave del mapa depende solo de los totales agregados, no de la consulta que los produjo
+    motor = MotorPandas(df=ventas)
+    filtros = (pd.Timestamp('2019-01-01'), pd.Timestamp('2019-02-28'), ['Yangon', 'Mandalay'], None)
+    mismos = (pd.Timestamp('2019-01-01'), pd.Timestamp('2019-02-28'), ['Mandalay', 'Yangon'], None)
+    puntos = puntos_ventas(motor.sumar_por(filtros, ['Ciudad', 'Sucursal']))
+    assert puntos_ventas(motor.sumar_por(mismos, ['Ciudad', 'Sucursal'])) == puntos
+    assert len(puntos) == 2
+
+
+@pytest.mark.parametrize('modo', list(MODOS))
+def test_mapa_html_por_modo(modo):
+    pytest.importorskip('folium')
+    from comun.mapa import mapa_html
+
+    html = mapa_html(puntos_ventas(TOTALES, por_sucursal=modo != 'ciudades'), modo)
+    assert html.lstrip().startswith('<!DOCTYPE html>')
+    if modo == 'calor':
+        assert 'heatLayer' in html
+    else:
+        assert html.count('L.marker(') == 3
+        assert ('markerClusterGroup' in html) == (modo == 'clusters')
@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip('pptx')
+from pptx import Presentation  # noqa: E402
+
+from comun.cubo import construir_cubo  # noqa: E402
+from reporting import crear_pptx  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def cubo(ventas):
+    return construir_cubo(ventas)
+
+
+def contenido(ruta):
+    """Texto de cada forma y datos de cada gráfico, diapositiva a diapositiva."""
+    diapositivas = []
+    for slide in Presentation(ruta).slides:
+        formas = []
+        for shape in slide.shapes:
+            if shape.has_chart:
+                plot = shape.chart.plots[0]
+                formas.append((shape.chart.chart_type, list(plot.categories),
+                               [(serie.name, list(serie.values)) for serie in plot.series]))
+            elif shape.has_text_frame:
+                formas.append(shape.text_frame.text)
+            else:
+                formas.append(shape.shape_type)
+        diapositivas.append(formas)
+    return diapositivas
+
+
+def test_paralelo_igual_que_secuencial(cubo, tmp_path):
+    cortes = [(s, p) for s in ('A', 'B', 'C') for p in ('2019-01', '2019-02')] + [(None, None), ('A', '2020-01')]
+    resultados = list(crear_pptx.crear_presentaciones(cubo, cortes, tmp_path / "paralelo", procesos=3))
+    assert sorted((s or '', p or '') for s, p, _, _ in resultados) == sorted((s or '', p or '') for s, p in cortes)
+
+    (tmp_path / "secuencial").mkdir()
+    for sucursal, periodo, ruta, _ in resultados:
+        corte = crear_pptx.filtrar_corte(cubo, sucursal, periodo)
+        if corte.empty:
+            assert ruta is None
+            continue
+        esperado = crear_pptx.crear_presentacion(
+            corte, str(tmp_path / "secuencial" / crear_pptx.nombre_corte(sucursal, periodo)),
+            subtitulo=f"Sucursal {sucursal or 'todas'} · {periodo or 'todo el periodo'}")
+        assert contenido(ruta) == contenido(esperado)
+
+
+def test_graficos_nativos_sin_imagenes(cubo, tmp_path, monkeypatch):
+    def sin_kaleido(*args, **kwargs):
+        raise AssertionError('El modo nativo no debe exportar imágenes')
+
+    monkeypatch.setattr(crear_pptx, 'exportar_figuras', sin_kaleido)
+    ruta = crear_pptx.crear_presentacion(cubo, str(tmp_path / "nativo.pptx"), graficos_como='nativo')
+    graficos = [forma for diapositiva in contenido(ruta)[2:] for forma in diapositiva[1:]]
+    tipos = crear_pptx.TIPOS_GRAFICO
+    assert [tipo for tipo, _, _ in graficos] == [tipos['linea'], tipos['barras'], tipos['tarta'],
+                                                tipos['barras_h'], tipos['tarta']]
+
+    # Los datos del gráfico son los agregados del cubo, no una imagen
+    diario = crear_pptx.sumar_por(cubo, 'Fecha')
+    _, _, [(_, valores)] = graficos[0]
+    assert len(valores) == len(diario) <= crear_pptx.MAX_PUNTOS_GRAFICO
+    assert valores == pytest.approx(diario.tolist())
+    _, categorias, series = graficos[1]
+    assert sorted(categorias) == sorted(cubo['Tipo de Cliente'].astype(str).unique())
+    assert [nombre for nombre, _ in series] == sorted(cubo['Género'].astype(str).unique())
+    _, _, [(_, valores)] = graficos[2]
+    assert sum(valores) == crear_pptx.metricas(cubo)[1]  # Una venta por transacción
@@ -0,0 +1,65 @@
+import gzip
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+from comun.datos import COLUMNAS_INTERNAS, RUTA_CSV, columnas_traducidas
+from comun.serializacion import columna_a_texto
+from crear_xml import clean_column_name, crear_xml, crear_xml_streaming
+
+
+def xml_por_filas(ruta_csv):
+    # Exportación original: iterrows y str() por celda sobre el CSV sin tipar
+    df = pd.read_csv(ruta_csv).rename(columns=columnas_traducidas)
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    root = ET.Element("Facturas")
+    for _, row in df.iterrows():
+        factura = ET.SubElement(root, "Factura")
+        for field in df.columns:
+            ET.SubElement(factura, clean_column_name(field)).text = str(row[field])
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<?xml-stylesheet type="text/xsl" href="factura_style.xslt"?>\n'
+            + ET.tostring(root, encoding='unicode'))
+
+
+def test_xml_por_columnas_igual_que_por_filas(ventas, tmp_path):
+    crear_xml(ventas, salida=tmp_path / "facturas.xml")
+    assert (tmp_path / "facturas.xml").read_text(encoding='utf-8') == xml_por_filas(RUTA_CSV)
+
+
+def test_xml_streaming_igual_que_completo(ventas, tmp_path):
+    crear_xml(ventas, salida=tmp_path / "completo.xml")
+    crear_xml_streaming(RUTA_CSV, tmp_path / "bloques.xml", tam_bloque=97)
+    salida = crear_xml_streaming(RUTA_CSV, tmp_path / "bloques_gz.xml", tam_bloque=97, comprimir=True)
+    completo = (tmp_path / "completo.xml").read_bytes()
+    assert (tmp_path / "bloques.xml").read_bytes() == completo
+    with gzip.open(salida, 'rb') as f:
+        assert f.read() == completo
+
+
+def test_xml_sin_columnas_internas(ventas, tmp_path):
+    crear_xml(ventas, salida=tmp_path / "facturas.xml")
+    texto = (tmp_path / "facturas.xml").read_text(encoding='utf-8')
+    for columna in COLUMNAS_INTERNAS:
+        assert f"<{clean_column_name(columna)}>" not in texto
+
+
+def test_columna_a_texto_igual_que_str_por_celda():
+    serie = pd.Series(['a&b', '<x>', 'normal', 'a&b'])
+    esperado = [_escapado(v) for v in serie]
+    assert columna_a_texto(serie) == esperado
+    assert columna_a_texto(serie.astype('category')) == esperado
+
+    reales = pd.Series([15.28, 0.1 + 0.2, 548.9715, 3.0])
+    assert columna_a_texto(reales, decimales=4) == [str(round(v, 4)) for v in reales]
+    enteros = pd.Series(np.array([1, 10, 7], dtype='int64'))
+    assert columna_a_texto(enteros) == ['1', '10', '7']
+    fechas = pd.Series(pd.to_datetime(['2019-01-05 13:08', '2019-03-08 10:29', '2019-01-05 13:08']))
+    assert columna_a_texto(fechas) == [str(v) for v in fechas]
+
+
+def _escapado(texto):
+    elemento = ET.Element('e')
+    elemento.text = texto
+    return ET.tostring(elemento, encoding='unicode')[3:-4]
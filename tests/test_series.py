@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comun.series import lttb, minmax, reducir_serie
+
+
+def lttb_referencia(x, y, n):
+    # Implementación de referencia de Steinarsson (2013), punto a punto
+    total = len(y)
+    cada = (total - 2) / (n - 2)
+    indices, a = [0], 0
+    for i in range(n - 2):
+        inicio_media = math.floor((i + 1) * cada) + 1
+        fin_media = min(math.floor((i + 2) * cada) + 1, total)
+        media_x = sum(x[inicio_media:fin_media]) / (fin_media - inicio_media)
+        media_y = sum(y[inicio_media:fin_media]) / (fin_media - inicio_media)
+        mejor, area_max = None, -1.0
+        for j in range(math.floor(i * cada) + 1, math.floor((i + 1) * cada) + 1):
+            area = abs((x[a] - media_x) * (y[j] - y[a]) - (x[a] - x[j]) * (media_y - y[a]))
+            if area > area_max:
+                mejor, area_max = j, area
+        indices.append(mejor)
+        a = mejor
+    return indices + [total - 1]
+
+
+@pytest.fixture
+def serie():
+    rng = np.random.default_rng(7)
+    indice = pd.date_range('2019-01-01', periods=5000, freq='h', name='Fecha')
+    valores = np.cumsum(rng.normal(size=len(indice))) + 10 * np.sin(np.arange(len(indice)) / 200)
+    valores[3217] = 500  # pico aislado
+    return pd.Series(valores, index=indice, name='Total')
+
+
+@pytest.mark.parametrize('n', [3, 10, 200, 999])
+def test_lttb_igual_que_referencia(serie, n):
+    x = np.arange(len(serie), dtype=float)
+    indices = lttb(x, serie.to_numpy(), n)
+    assert len(indices) == n
+    assert indices[0] == 0 and indices[-1] == len(serie) - 1
+    assert (np.diff(indices) > 0).all()
+    assert indices.tolist() == lttb_referencia(x.tolist(), serie.tolist(), n)
+
+
+def test_lttb_sin_reduccion():
+    assert lttb(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_reducir_serie_conserva_picos(serie):
+    for metodo in ('lttb', 'minmax'):
+        reducida = reducir_serie(serie, max_puntos=100, metodo=metodo)
+        assert len(reducida) <= 100
+        assert reducida.max() == serie.max() and reducida.index.is_monotonic_increasing
+
+
+def test_minmax_conserva_extremos(serie):
+    indices = minmax(serie.to_numpy(), 50)
+    assert len(indices) <= 50
+    assert serie.to_numpy().argmax() in indices and serie.to_numpy().argmin() in indices
+
+
+def test_reducir_serie_rango_visible(serie):
+    reducida = reducir_serie(serie, max_puntos=100, desde='2019-03-01', hasta='2019-03-10')
+    assert reducida.index.min() >= pd.Timestamp('2019-03-01')
+    assert reducida.index.max() < pd.Timestamp('2019-03-11')
+    assert len(reducida) <= 100
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comun.sintetico import COLUMNAS, TASA_IMPUESTO, ModeloVentas, generar_bloque
+
+
+@pytest.fixture(scope='module')
+def modelo():
+    return ModeloVentas.desde_csv()
+
+
+def test_totales_cuadran(modelo):
+    df = generar_bloque(modelo, 0, 5000, semilla=3)
+    assert list(df.columns) == COLUMNAS
+    cogs = df['Cost of goods sold']
+    np.testing.assert_allclose(cogs, df['Unit price'] * df['Quantity'], atol=0.005)
+    np.testing.assert_allclose(df['Tax 5%'], cogs * TASA_IMPUESTO, atol=1e-4)
+    np.testing.assert_allclose(df['Total'], cogs + df['Tax 5%'], atol=1e-4)
+    assert (df['Gross income'] == df['Tax 5%']).all()
+    assert df['Invoice ID'].is_unique
+
+
+def test_semilla_fija_reproducible(modelo):
+    a = generar_bloque(modelo, 1000, 2000, semilla=7)
+    b = generar_bloque(modelo, 1000, 2000, semilla=7)
+    pd.testing.assert_frame_equal(a, b)
+    otra = generar_bloque(modelo, 1000, 2000, semilla=8)
+    assert not otra['Unit price'].equals(a['Unit price'])
+
+
+def test_bloques_con_ids_disjuntos(modelo):
+    # Cada bloque se genera a partir de su fila global: los IDs no se repiten entre bloques
+    a = generar_bloque(modelo, 0, 1000)
+    b = generar_bloque(modelo, 1000, 1000)
+    assert not set(a['Invoice ID']) & set(b['Invoice ID'])
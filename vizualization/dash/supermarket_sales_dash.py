@@ -1,66 +1,58 @@
 # Importación de librerías necesarias
+import time
+INICIO_ARRANQUE = time.perf_counter()  # Desglose del arranque: se imprime al cargar el módulo
 import dash
-from dash import html, dcc, Input, Output  # Componentes de Dash
+from dash import html, dcc, Input, Output, Patch  # Componentes de Dash
 import dash_bootstrap_components as dbc  # Para estilos
+import numpy as np
 import pandas as pd  # Para manipulación de datos
 import plotly.express as px  # Para crear gráficos
 import plotly.graph_objects as go  # Para gráficos más personalizados
+import sys
+from pathlib import Path
 
-# Cargar datos desde la URL
-data_url = "https://raw.githubusercontent.com/plotly/datasets/master/supermarket_Sales.csv"
-df = pd.read_csv(data_url)
-# Cargar datos local
-# datos = "supermarket_Sales.csv"
-# df = pd.read_csv(datos)
-
-# Diccionario para traducir nombres de columnas
-columnas_traducidas = {
-    'Invoice ID': 'ID de Factura',
-    'Branch': 'Sucursal',
-    'City': 'Ciudad',
-    'Customer type': 'Tipo de Cliente',
-    'Gender': 'Género',
-    'Product line': 'Línea de Producto',
-    'Unit price': 'Precio Unitario',
-    'Quantity': 'Cantidad',
-    'Tax 5%': 'Impuesto 5%',
-    'Total': 'Total',
-    'Date': 'Fecha',
-    'Time': 'Hora',
-    'Payment': 'Método de Pago',
-    'Cost of goods sold': 'Costo de Bienes Vendidos',
-    'Gross margin percentage': 'Porcentaje de Margen Bruto',
-    'Gross income': 'Ingreso Bruto',
-    'Customer stratification rating': 'Calificación de Estratificación del Cliente'
-}
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comun.consultas import crear_motor  # Motor de consultas intercambiable (pandas o DuckDB)
+from comun.cache import CacheLRU
+from comun import instrumentacion  # Tiempos por fase y /metrics (Prometheus)
+from comun.instrumentacion import Arranque, fase, instrumentar, registrar_filas
+from comun.series import figura_serie_temporal, reducir_serie
+
+arranque = Arranque(INICIO_ARRANQUE)
+arranque.marcar('importaciones')
 
-# Renombrar las columnas del DataFrame
-df = df.rename(columns=columnas_traducidas)
+# Motor elegido con MOTOR_CONSULTAS: 'pandas' (datos en memoria y cubo pre-agregado por fecha,
+# ciudad, producto, tipo de cliente, género y pago) o 'duckdb' (SQL sobre la instantánea Parquet).
+# Con pandas los datos salen de la instantánea Arrow verificada (python -m comun.instantanea): sin red ni CSV
+motor = crear_motor()
+arranque.marcar('datos y motor')
 
-# Convertir la columna 'Fecha' a tipo datetime
-df['Fecha'] = pd.to_datetime(df['Fecha'])
+# Caché de resultados (series, métricas y figuras) ligada a la versión de los datos consultados
+cache_resultados = CacheLRU(max_entradas=256, max_bytes=128 * 2**20)
 
 # Inicializar la aplicación Dash
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+instrumentacion.instalar(app.server, arranque=arranque)  # Perfilado por muestreo con PERFILADO_MUESTREO=0.01
 
 # Componentes de filtro
+fecha_min, fecha_max = motor.rango_fechas()
 filtro_fecha = dcc.DatePickerRange(
     id='filtro-fecha',
-    start_date=df['Fecha'].min(),  # Fecha inicial del rango
-    end_date=df['Fecha'].max(),    # Fecha final del rango
+    start_date=fecha_min,  # Fecha inicial del rango
+    end_date=fecha_max,    # Fecha final del rango
     display_format='YYYY-MM-DD'
 )
 
 filtro_ciudad = dcc.Dropdown(
     id='filtro-ciudad',
-    options=[{'label': ciudad, 'value': ciudad} for ciudad in df['Ciudad'].unique()],
+    options=[{'label': ciudad, 'value': ciudad} for ciudad in motor.categorias('Ciudad')],
     multi=True,
     placeholder="Seleccionar ciudad(es)"
 )
 
 filtro_producto = dcc.Dropdown(
     id='filtro-producto',
-    options=[{'label': producto, 'value': producto} for producto in df['Línea de Producto'].unique()],
+    options=[{'label': producto, 'value': producto} for producto in motor.categorias('Línea de Producto')],
     multi=True,
     placeholder="Seleccionar línea(s) de producto"
 )
@@ -113,77 +105,199 @@ app.layout = dbc.Container([
     ])
 ], style={'backgroundColor': styles['background'], 'padding': '20px'})  # Aplicar color de fondo al contenedor principal
 
-# El callback y la función update_dashboard permanecen sin cambios
-@app.callback(
-    # Outputs: todos los elementos que se actualizarán
-    [Output('ventas-totales', 'children'),
-     Output('num-transacciones', 'children'),
-     Output('venta-promedio', 'children'),
-     Output('margen-bruto-promedio', 'children'),
-     Output('grafico-ventas-diarias', 'figure'),
-     Output('grafico-productos', 'figure'),
-     Output('grafico-tipo-genero', 'figure'),
-     Output('grafico-ciudad', 'figure'),
-     Output('grafico-metodos-pago', 'figure')],
-    # Inputs: los filtros que activarán la actualización
-    [Input('filtro-fecha', 'start_date'),
-     Input('filtro-fecha', 'end_date'),
-     Input('filtro-ciudad', 'value'),
-     Input('filtro-producto', 'value')]
-)
-def update_dashboard(start_date, end_date, ciudades, productos):
-    # Crear una copia del DataFrame original
-    dff = df.copy()
-    
-    # Aplicar filtros
-    if start_date and end_date:
-        dff = dff[(dff['Fecha'] >= start_date) & (dff['Fecha'] <= end_date)]
-    
-    if ciudades:
-        dff = dff[dff['Ciudad'].isin(ciudades)]
-    
-    if productos:
-        dff = dff[dff['Línea de Producto'].isin(productos)]
+# Filtros que disparan todos los callbacks
+FILTROS = [Input('filtro-fecha', 'start_date'),
+           Input('filtro-fecha', 'end_date'),
+           Input('filtro-ciudad', 'value'),
+           Input('filtro-producto', 'value')]
 
-    # Calcular métricas
-    ventas_totales = dff['Total'].sum()
-    num_transacciones = len(dff)
-    venta_promedio = ventas_totales / num_transacciones if num_transacciones > 0 else 0
-    margen_bruto_promedio = dff['Ingreso Bruto'].mean()
+# Categorías fijas del gráfico por tipo de cliente y género: la estructura de trazas
+# no cambia con el filtro y se puede actualizar solo con los datos
+TIPOS_CLIENTE = motor.categorias('Tipo de Cliente')
+GENEROS = motor.categorias('Género')
 
-    # Crear gráfico de ventas diarias
-    ventas_diarias = dff.groupby('Fecha')['Total'].sum().reset_index()
-    fig_ventas_diarias = px.line(ventas_diarias, x='Fecha', y='Total', title='Ventas Diarias')
+def clave_filtros(start_date, end_date, ciudades, productos):
+    # Fechas canónicas y listas ordenadas: el mismo filtro siempre da la misma clave
+    def fecha(valor):
+        return pd.Timestamp(valor).isoformat() if valor else None
+    return (fecha(start_date), fecha(end_date), tuple(sorted(ciudades or ())), tuple(sorted(productos or ())))
 
-    # Crear gráfico de líneas de productos
-    productos = dff['Línea de Producto'].value_counts()
-    fig_productos = px.pie(values=productos.values, names=productos.index, title='Ventas por Línea de Producto')
+# Propiedades de las trazas que llevan los datos (lo que domina el JSON de una figura)
+CAMPOS_DATOS = ('x', 'y', 'z', 'values', 'labels', 'text', 'customdata')
 
-    # Crear gráfico de ventas por tipo de cliente y género
-    ventas_tipo_genero = dff.groupby(['Tipo de Cliente', 'Género'])['Total'].sum().unstack()
-    fig_tipo_genero = px.bar(ventas_tipo_genero, title='Ventas por Tipo de Cliente y Género', barmode='group')
+def tamano_figura(fig):
+    # Estimación desde los arrays de las trazas, sin serializar la figura
+    total = 4096  # Layout y atributos de estilo
+    for traza in fig.data:
+        for campo in CAMPOS_DATOS:
+            valor = getattr(traza, campo, None)
+            if isinstance(valor, np.ndarray):
+                total += valor.nbytes
+            elif isinstance(valor, (tuple, list)):
+                total += 8 * len(valor)
+    return total
 
-    # Crear gráfico de ventas por ciudad
-    ventas_ciudad = dff.groupby('Ciudad')['Total'].sum().sort_values(ascending=True)
-    fig_ciudad = px.bar(ventas_ciudad, orientation='h', title='Ventas por Ciudad')
+def tamano_objeto(obj):
+    # Aproximación en bytes de textos, figuras y objetos de pandas
+    if isinstance(obj, str):
+        return len(obj)
+    if isinstance(obj, tuple):
+        return sum(tamano_objeto(o) for o in obj)
+    if isinstance(obj, go.Figure):
+        return tamano_figura(obj)
+    return int(np.sum(obj.memory_usage(deep=True)))
 
-    # Crear gráfico de métodos de pago
-    metodos_pago = dff['Método de Pago'].value_counts()
-    fig_metodos_pago = px.pie(values=metodos_pago.values, names=metodos_pago.index, title='Métodos de Pago')
+def memoizar(clave, calcular):
+    # Resultados memoizados por combinación de filtros normalizada
+    # La versión se pregunta al motor en cada llamada: con DuckDB los datos se leen del disco
+    cache_resultados.invalidar_si_cambia(motor.version_datos())
+    valor = cache_resultados.get(clave)
+    if valor is None:
+        valor = calcular()
+        cache_resultados.put(clave, valor, tamano_objeto(valor))
+    return valor
 
-    # Retornar todos los valores actualizados
+def calcular_metricas(clave):
+    ventas_totales, num_transacciones, venta_promedio, margen_bruto_promedio = motor.metricas(clave)
     return (
         f"${ventas_totales:,.2f}",
         f"{num_transacciones}",
         f"${venta_promedio:,.2f}",
         f"${margen_bruto_promedio:,.2f}",
-        fig_ventas_diarias,
-        fig_productos,
-        fig_tipo_genero,
-        fig_ciudad,
-        fig_metodos_pago
     )
 
+# Serie agregada de cada gráfico, consultada al motor con los filtros normalizados
+SERIES = {
+    'ventas-diarias': lambda clave: motor.sumar_por(clave, 'Fecha'),
+    'productos': lambda clave: motor.contar_por(clave, 'Línea de Producto'),
+    'tipo-genero': lambda clave: (motor.sumar_por(clave, ['Tipo de Cliente', 'Género']).unstack()
+                                  .reindex(index=TIPOS_CLIENTE, columns=GENEROS)),
+    'ciudad': lambda clave: motor.sumar_por(clave, 'Ciudad').sort_values(ascending=True),
+    'metodos-pago': lambda clave: motor.contar_por(clave, 'Método de Pago'),
+}
+
+# Figura completa (primera carga de la página)
+FIGURAS = {
+    'ventas-diarias': lambda s: figura_serie_temporal(s, 'Ventas Diarias'),
+    'productos': lambda s: px.pie(values=s.values, names=s.index, title='Ventas por Línea de Producto'),
+    'tipo-genero': lambda s: px.bar(s, title='Ventas por Tipo de Cliente y Género', barmode='group'),
+    'ciudad': lambda s: px.bar(s, orientation='h', title='Ventas por Ciudad'),
+    'metodos-pago': lambda s: px.pie(values=s.values, names=s.index, title='Métodos de Pago'),
+}
+
+def parche_linea(s):
+    patch = Patch()
+    patch['data'][0]['x'] = s.index
+    patch['data'][0]['y'] = s.values
+    return patch
+
+def parche_pie(s):
+    patch = Patch()
+    patch['data'][0]['labels'] = s.index
+    patch['data'][0]['values'] = s.values
+    return patch
+
+def parche_barras_agrupadas(s):
+    patch = Patch()
+    for i, columna in enumerate(s.columns):
+        patch['data'][i]['x'] = s.index
+        patch['data'][i]['y'] = s[columna].values
+    return patch
+
+def parche_barras_horizontales(s):
+    patch = Patch()
+    patch['data'][0]['x'] = s.values
+    patch['data'][0]['y'] = s.index
+    return patch
+
+# Actualización parcial: solo los datos de las trazas, sin reenviar layout ni estilos
+PARCHES = {
+    'ventas-diarias': lambda s: parche_linea(reducir_serie(s)),
+    'productos': parche_pie,
+    'tipo-genero': parche_barras_agrupadas,
+    'ciudad': parche_barras_horizontales,
+    'metodos-pago': parche_pie,
+}
+
+def serie_grafico(clave, nombre):
+    serie = memoizar((clave, nombre), lambda: SERIES[nombre](clave))
+    registrar_filas(len(serie))
+    return serie
+
+def construir_figura(nombre, serie):
+    with fase('figura'):
+        return FIGURAS[nombre](serie)
+
+def construir_parche(nombre, serie):
+    with fase('figura'):
+        return PARCHES[nombre](serie)
+
+def figura_grafico(clave, nombre):
+    return memoizar((clave, 'figura', nombre), lambda: construir_figura(nombre, serie_grafico(clave, nombre)))
+
+@app.callback(
+    [Output('ventas-totales', 'children'),
+     Output('num-transacciones', 'children'),
+     Output('venta-promedio', 'children'),
+     Output('margen-bruto-promedio', 'children')],
+    FILTROS
+)
+@instrumentar('metricas')
+def actualizar_metricas(start_date, end_date, ciudades, productos):
+    clave = clave_filtros(start_date, end_date, ciudades, productos)
+    return memoizar((clave, 'metricas'), lambda: calcular_metricas(clave))
+
+def registrar_grafico(nombre):
+    # Un callback independiente por gráfico
+    @app.callback(Output(f'grafico-{nombre}', 'figure'), FILTROS)
+    @instrumentar(nombre)
+    def actualizar_grafico(start_date, end_date, ciudades, productos):
+        clave = clave_filtros(start_date, end_date, ciudades, productos)
+        if dash.ctx.triggered_id is None:
+            return figura_grafico(clave, nombre)  # Llamada inicial: figura completa
+        return construir_parche(nombre, serie_grafico(clave, nombre))
+    return actualizar_grafico
+
+for nombre_grafico in FIGURAS:
+    if nombre_grafico != 'ventas-diarias':
+        registrar_grafico(nombre_grafico)
+
+def rango_visible(relayout):
+    # Rango del eje x tras un zoom/desplazamiento; (None, None) si se ve la serie completa
+    relayout = relayout or {}
+    if 'xaxis.range[0]' in relayout:
+        return pd.Timestamp(relayout['xaxis.range[0]']), pd.Timestamp(relayout['xaxis.range[1]'])
+    if 'xaxis.range' in relayout:
+        desde, hasta = relayout['xaxis.range']
+        return pd.Timestamp(desde), pd.Timestamp(hasta)
+    return None, None
+
+@app.callback(
+    Output('grafico-ventas-diarias', 'figure'),
+    FILTROS + [Input('grafico-ventas-diarias', 'relayoutData')]
+)
+@instrumentar('ventas-diarias')
+def actualizar_ventas_diarias(start_date, end_date, ciudades, productos, relayout):
+    # Serie temporal reducida (LTTB) al rango visible: los puntos enviados no crecen con el histórico
+    clave = clave_filtros(start_date, end_date, ciudades, productos)
+    if dash.ctx.triggered_id is None:
+        return figura_grafico(clave, 'ventas-diarias')
+    relayout = relayout or {}
+    if dash.ctx.triggered_id == 'grafico-ventas-diarias' and not any(k.startswith('xaxis.') for k in relayout):
+        return dash.no_update  # Eventos sin cambio de rango (p. ej. autosize)
+    desde, hasta = rango_visible(relayout)
+    serie = serie_grafico(clave, 'ventas-diarias')
+    with fase('figura'):
+        return parche_linea(reducir_serie(serie, desde=desde, hasta=hasta))
+
+def update_dashboard(start_date, end_date, ciudades, productos):
+    # Las nueve salidas completas de una vez (métricas y figuras), fuera de Dash
+    clave = clave_filtros(start_date, end_date, ciudades, productos)
+    return calcular_metricas(clave) + tuple(figura_grafico(clave, nombre) for nombre in FIGURAS)
+
+arranque.marcar('layout y callbacks')
+print(arranque.resumen(), file=sys.stderr)
+
 # Ejecutar la aplicación
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
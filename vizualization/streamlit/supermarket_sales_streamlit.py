@@ -1,109 +1,106 @@
+import time
+INICIO_ARRANQUE = time.perf_counter()  # Desglose del primer arranque del proceso (en la consola)
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from streamlit_folium import st_folium
-import folium
+import streamlit.components.v1 as components
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from comun.consultas import crear_motor
+from comun.instrumentacion import Arranque
+from comun.series import figura_serie_temporal
+# plotly y folium se importan en los gráficos y el mapa: la tabla de datos no los carga nunca
+from comun.mapa import MODOS, cargar_coordenadas_sucursales, mapa_html, puntos_ventas
+
+arranque = Arranque(INICIO_ARRANQUE)
+arranque.marcar('importaciones')
 
 # Configuración de la página
 st.set_page_config(page_title="Dashboard de Ventas de Supermercado de Myanmar", layout="wide")
 
-# Cargar datos
-@st.cache_data
-def cargar_datos():
-    # Cargar datos desde la URL
-    # data_url = "https://raw.githubusercontent.com/plotly/datasets/master/supermarket_Sales.csv"
-    # df = pd.read_csv(data_url)
-    # Cargar datos local
-    df = pd.read_csv("../../data/supermarket_Sales.csv")
-    columnas_traducidas = {
-        'Invoice ID': 'ID de Factura',
-        'Branch': 'Sucursal',
-        'City': 'Ciudad',
-        'Customer type': 'Tipo de Cliente',
-        'Gender': 'Género',
-        'Product line': 'Línea de Producto',
-        'Unit price': 'Precio Unitario',
-        'Quantity': 'Cantidad',
-        'Tax 5%': 'Impuesto 5%',
-        'Total': 'Total',
-        'Date': 'Fecha',
-        'Time': 'Hora',
-        'Payment': 'Método de Pago',
-        'Cost of goods sold': 'Costo de Bienes Vendidos',
-        'Gross margin percentage': 'Porcentaje de Margen Bruto',
-        'Gross income': 'Ingreso Bruto',
-        'Customer stratification rating': 'Calificación de Estratificación del Cliente'
-    }
-    df = df.rename(columns=columnas_traducidas)
-    df['Fecha'] = pd.to_datetime(df['Fecha'])
-    return df
-
-df = cargar_datos()
-
-# Coordenadas de las ciudades de Myanmar
-city_coordinates = {
-    'Yangon': [16.8409, 96.1735],
-    'Naypyitaw': [19.7633, 96.0785],
-    'Mandalay': [21.9588, 96.0891]  # Agregamos Mandalay por si acaso
-}
+# Motor de consultas compartido entre sesiones (MOTOR_CONSULTAS: 'pandas' o 'duckdb')
+@st.cache_resource
+def cargar_motor():
+    # Datos locales: instantánea Arrow verificada en memoria (pandas) o SQL sobre el Parquet (duckdb)
+    return crear_motor()
+
+motor = cargar_motor()
+arranque.marcar('datos y motor')
+
+# Solo la primera ejecución del script en el proceso: las siguientes reutilizan el motor
+@st.cache_resource
+def registrar_arranque(_arranque):
+    print(_arranque.resumen(), file=sys.stderr)
+    return _arranque
+
+# Coordenadas propias de cada sucursal (data/sucursales.csv); sin ellas se usa la ciudad
+coordenadas_sucursales = cargar_coordenadas_sucursales()
+
+# HTML del mapa cacheado por los totales agregados: solo se reconstruye si cambian
+@st.cache_data(max_entries=64)
+def html_mapa(puntos, modo):
+    return mapa_html(puntos, modo)
+
+def px():
+    # plotly.express se importa al dibujar el primer gráfico, no al arrancar
+    import plotly.express
+    return plotly.express
 
 # Funciones para los gráficos
-def graficar_ventas_diarias(df):
-    ventas_diarias = df.groupby('Fecha')['Total'].sum().reset_index()
-    fig = px.line(ventas_diarias, x='Fecha', y='Total', title='Ventas Diarias')
+def graficar_ventas_diarias(filtros):
+    # Serie reducida con LTTB y trazas WebGL: puntos acotados aunque crezca el histórico
+    ventas_diarias = motor.sumar_por(filtros, 'Fecha')
+    fig = figura_serie_temporal(ventas_diarias, 'Ventas Diarias')
     st.plotly_chart(fig, use_container_width=True)
 
-def graficar_ventas_por_tipo_cliente_y_genero(df):
-    ventas_tipo_genero = df.groupby(['Tipo de Cliente', 'Género'])['Total'].sum().unstack()
-    fig = px.bar(ventas_tipo_genero, title='Ventas por Tipo de Cliente y Género', barmode='group')
+def graficar_ventas_por_tipo_cliente_y_genero(filtros):
+    ventas_tipo_genero = motor.sumar_por(filtros, ['Tipo de Cliente', 'Género']).unstack()
+    fig = px().bar(ventas_tipo_genero, title='Ventas por Tipo de Cliente y Género', barmode='group')
     st.plotly_chart(fig, use_container_width=True)
 
-def graficar_ventas_por_linea_de_producto(df):
-    productos = df['Línea de Producto'].value_counts()
-    fig = px.pie(values=productos.values, names=productos.index, title='Ventas por Línea de Producto')
+def graficar_ventas_por_linea_de_producto(filtros):
+    productos = motor.contar_por(filtros, 'Línea de Producto')
+    fig = px().pie(values=productos.values, names=productos.index, title='Ventas por Línea de Producto')
     st.plotly_chart(fig, use_container_width=True)
 
-def graficar_mapa_de_ventas(df):
-    m = folium.Map(location=[19.7500, 96.0800], zoom_start=6)  # Centrado en Myanmar
-    for city, sales in df.groupby('Ciudad')['Total'].sum().items():
-        if city in city_coordinates:
-            folium.Marker(
-                location=city_coordinates[city],
-                popup=f"{city}: ${sales:,.2f}",
-                icon=folium.Icon(color='red', icon='dollar-sign', prefix='fa')
-            ).add_to(m)
-    st_folium(m, width=800, height=500)
-
-def graficar_metodos_de_pago(df):
-    metodos_pago = df['Método de Pago'].value_counts()
-    fig = px.pie(values=metodos_pago.values, names=metodos_pago.index, title='Métodos de Pago')
+def graficar_mapa_de_ventas(filtros, modo='ciudades'):
+    # Agregado por ubicación (ciudad o sucursal): el mapa no depende del número de filas
+    totales = motor.sumar_por(filtros, ['Ciudad', 'Sucursal'])
+    puntos = puntos_ventas(totales, coordenadas_sucursales, por_sucursal=modo != 'ciudades')
+    components.html(html_mapa(puntos, modo), width=800, height=500)
+
+def graficar_metodos_de_pago(filtros):
+    metodos_pago = motor.contar_por(filtros, 'Método de Pago')
+    fig = px().pie(values=metodos_pago.values, names=metodos_pago.index, title='Métodos de Pago')
     st.plotly_chart(fig, use_container_width=True)
 
-def graficar_cantidad_de_productos(df):
-    ventas_cantidad = df.groupby('Línea de Producto')['Cantidad'].sum().sort_values(ascending=False)
-    fig = px.bar(ventas_cantidad, title='Cantidad de Productos Vendidos por Línea de Producto')
+def graficar_cantidad_de_productos(filtros):
+    ventas_cantidad = motor.sumar_por(filtros, 'Línea de Producto', 'Cantidad').sort_values(ascending=False)
+    fig = px().bar(ventas_cantidad, title='Cantidad de Productos Vendidos por Línea de Producto')
     st.plotly_chart(fig, use_container_width=True)
 
-def graficar_distribucion_precios_unitarios(df):
-    fig = px.histogram(df, x="Precio Unitario", nbins=20, title="Distribución de Precios Unitarios")
+def graficar_distribucion_precios_unitarios(filtros):
+    # Solo la columna que se dibuja
+    fig = px().histogram(motor.filas(filtros, ['Precio Unitario']), x="Precio Unitario", nbins=20, title="Distribución de Precios Unitarios")
     st.plotly_chart(fig, use_container_width=True)
 
-def mostrar_metricas(df):
+def mostrar_metricas(filtros):
+    ventas_totales, num_transacciones, venta_promedio, margen_bruto_promedio = motor.metricas(filtros)
     col1, col2, col3, col4 = st.columns(4)
     # para poner las metricas verticales remplazar col(n) por st
-    col1.metric("Ventas Totales", f"${df['Total'].sum():,.2f}")
-    col2.metric("Transacciones", f"{len(df):,}")
-    col3.metric("Venta Promedio", f"${df['Total'].mean():,.2f}")
-    col4.metric("Margen Bruto Promedio", f"${df['Ingreso Bruto'].mean():,.2f}")
+    col1.metric("Ventas Totales", f"${ventas_totales:,.2f}")
+    col2.metric("Transacciones", f"{num_transacciones:,}")
+    col3.metric("Venta Promedio", f"${venta_promedio:,.2f}")
+    col4.metric("Margen Bruto Promedio", f"${margen_bruto_promedio:,.2f}")
 
-def mostrar_analisis_margen_bruto(df):
+def mostrar_analisis_margen_bruto(filtros):
     st.subheader("Análisis del Margen Bruto")
-    margen_promedio = df['Porcentaje de Margen Bruto'].mean()
+    margen_promedio = motor.promedio(filtros, 'Porcentaje de Margen Bruto')
     st.write(f"El margen bruto promedio es: {margen_promedio:.2f}%")
 
-def mostrar_top_productos(filtered_df):
+def mostrar_top_productos(filtros):
     # Calcular top productos
-    top_products = filtered_df.groupby('Línea de Producto')['Cantidad'].sum().reset_index()
+    top_products = motor.sumar_por(filtros, 'Línea de Producto', 'Cantidad').reset_index()
     top_products = top_products.sort_values(by='Cantidad', ascending=False).head(5)
     top_products.columns = ['producto', 'cantidad']
     
@@ -128,6 +125,27 @@ def mostrar_top_productos(filtered_df):
             )}
     )
 
+FILAS_POR_PAGINA = [50, 100, 500, 1000]
+
+def mostrar_tabla_de_datos(filtros):
+    # Solo se consulta y envía la página visible: orden y columnas se resuelven en el motor
+    columnas_disponibles = motor.columnas()
+    col1, col2, col3, col4 = st.columns([4, 2, 1, 1])
+    columnas = col1.multiselect("Columnas", columnas_disponibles, default=columnas_disponibles)
+    # None: orden cronológico (fecha y hora), el de los datos
+    orden = col2.selectbox("Ordenar por", [None] + columnas_disponibles,
+                           format_func=lambda c: "Fecha y hora" if c is None else c)
+    descendente = col3.checkbox("Descendente")
+    filas_por_pagina = col4.selectbox("Filas por página", FILAS_POR_PAGINA)
+
+    total = motor.metricas(filtros)[1]
+    paginas = max(1, -(-total // filas_por_pagina))
+    pagina = st.number_input(f"Página (de {paginas:,})", min_value=1, max_value=paginas, value=1)
+    desplazamiento = (pagina - 1) * filas_por_pagina
+    datos = motor.pagina(filtros, columnas or None, orden, descendente, desplazamiento, filas_por_pagina)
+    st.dataframe(datos, hide_index=True, use_container_width=True)
+    st.caption(f"Filas {min(desplazamiento + 1, total):,}–{min(desplazamiento + filas_por_pagina, total):,} de {total:,}")
+
 # Título y barra de navegación
 st.sidebar.header("Secciones")
 st.title("Dashboard de Ventas de Supermercado de Myanmar")
@@ -135,10 +153,12 @@ nav = st.sidebar.radio("Navegar a", ["Ventas", "Tabla de Datos"])
 
 # Filtros en el sidebar
 st.sidebar.header("Filtros")
-start_date = st.sidebar.date_input("Fecha de inicio", df['Fecha'].min())
-end_date = st.sidebar.date_input("Fecha de fin", df['Fecha'].max())
-ciudades = st.sidebar.multiselect("Seleccionar ciudades", df['Ciudad'].unique())
-productos = st.sidebar.multiselect("Seleccionar líneas de producto", df['Línea de Producto'].unique())
+fecha_min, fecha_max = motor.rango_fechas()
+start_date = st.sidebar.date_input("Fecha de inicio", fecha_min)
+end_date = st.sidebar.date_input("Fecha de fin", fecha_max)
+ciudades = st.sidebar.multiselect("Seleccionar ciudades", motor.categorias('Ciudad'))
+productos = st.sidebar.multiselect("Seleccionar líneas de producto", motor.categorias('Línea de Producto'))
+modo_mapa = st.sidebar.selectbox("Modo del mapa", list(MODOS), format_func=MODOS.get)
 
 with st.sidebar.expander('Acerca de', expanded=True):
     st.write('''
@@ -161,35 +181,33 @@ st.sidebar.info(
 )
 
 
-# Aplicar filtros
-mask = (df['Fecha'].dt.date >= start_date) & (df['Fecha'].dt.date <= end_date)
-if ciudades:
-    mask &= df['Ciudad'].isin(ciudades)
-if productos:
-    mask &= df['Línea de Producto'].isin(productos)
-filtered_df = df[mask]
+# Filtros que recibe el motor de consultas (cada gráfico consulta solo lo que dibuja)
+filtros = (start_date, end_date, ciudades, productos)
 
 # Sección de ventas
 if nav == "Ventas":
-    mostrar_metricas(filtered_df)
-    graficar_mapa_de_ventas(filtered_df)
+    mostrar_metricas(filtros)
+    graficar_mapa_de_ventas(filtros, modo_mapa)
     col1, col2 = st.columns(2)
     
     with col1:
-        graficar_ventas_diarias(filtered_df)
-        graficar_ventas_por_tipo_cliente_y_genero(filtered_df)
-        # graficar_cantidad_de_productos(filtered_df)
-        mostrar_top_productos(filtered_df)
+        graficar_ventas_diarias(filtros)
+        graficar_ventas_por_tipo_cliente_y_genero(filtros)
+        # graficar_cantidad_de_productos(filtros)
+        mostrar_top_productos(filtros)
 
     with col2:
-        graficar_ventas_por_linea_de_producto(filtered_df)
-        graficar_metodos_de_pago(filtered_df)
-        graficar_distribucion_precios_unitarios(filtered_df)
+        graficar_ventas_por_linea_de_producto(filtros)
+        graficar_metodos_de_pago(filtros)
+        graficar_distribucion_precios_unitarios(filtros)
 
-    mostrar_analisis_margen_bruto(filtered_df)
+    mostrar_analisis_margen_bruto(filtros)
 
 elif nav == "Tabla de Datos":
-    st.dataframe(filtered_df)
+    mostrar_tabla_de_datos(filtros)
 
 # Añadir más componentes
 st.markdown("---")
+
+arranque.marcar('primer render')
+registrar_arranque(arranque)